@@ -1,16 +1,54 @@
-from flask import render_template, jsonify, Flask
-from flask_socketio import emit
+from functools import wraps
+
+from flask import render_template, jsonify, request, Flask, Response
+from flask_socketio import emit, join_room, leave_room
 
-from simulation.simulation_config import SimulationConfig
 from socketio_config import socketio
-from simulation.market_simulation import MarketSimulation
+from simulation.hosting import SimulationLimitReached, SimulationManager
+from simulation.metrics import to_prometheus
+from simulation.payloads import EncodedJSON
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key'
 socketio.init_app(app)
 
-# Pass the initialized socketio object into the MarketSimulation constructor
-simulation = MarketSimulation(SimulationConfig(), socketio=socketio)
+# Every simulation runs in its own worker process; clients receive updates through the
+# socket room named after the simulation id. Clients are served run loop metrics, risk
+# analytics and rankings, which simulations only keep when asked to.
+simulations = SimulationManager(socketio, defaults={'collect_metrics': True, 'risk_analytics': True,
+                                                    'leaderboard': True})
+
+# Simulation behind the single-simulation API of earlier versions (/api/start, /api/market_data,
+# ...). It is started on first use, with the server's settings, and kept running when idle.
+DEFAULT_SIMULATION = 'default'
+
+MAX_DEPTH_LEVELS = 1000
+MAX_ORDERS_PAGE = 500
+MAX_TRADERS_PAGE = 500
+
+
+def default_simulation():
+    return simulations.create(sim_id=DEFAULT_SIMULATION, pinned=True)
+
+
+def with_simulation(view):
+    """Resolve the `sim_id` URL parameter to its simulation handle, or answer 404."""
+    @wraps(view)
+    def wrapper(sim_id, *args, **kwargs):
+        try:
+            handle = default_simulation() if sim_id == DEFAULT_SIMULATION else simulations.get(sim_id)
+        except KeyError:
+            return jsonify({'error': f"Unknown simulation: {sim_id}"}), 404
+        except SimulationLimitReached as e:
+            return jsonify({'error': str(e)}), 429
+        try:
+            return view(handle, *args, **kwargs)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except RuntimeError as e:
+            return jsonify({'error': str(e)}), 503
+    return wrapper
+
 
 @app.route('/')
 def index():
@@ -20,38 +58,196 @@ def index():
 def traders_page():
     return render_template('traders.html')
 
-@app.route('/api/market_data')
-def get_market_data():
-    return jsonify(simulation.get_market_data())
+@app.route('/api/simulations', methods=['GET'])
+def list_simulations():
+    return jsonify(simulations.list())
+
+@app.route('/api/simulations', methods=['POST'])
+def create_simulation():
+    # The JSON body holds SimulationConfig overrides, e.g. {"random_traders": 500, "seed": 7}.
+    # Only the settings in hosting.WEB_SETTINGS are accepted, within their bounds.
+    overrides = request.get_json(silent=True) or {}
+    try:
+        handle = simulations.create(overrides)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except SimulationLimitReached as e:
+        return jsonify({'error': str(e)}), 429
+    return jsonify(handle.info()), 201
+
+@app.route('/api/metrics')
+def get_metrics():
+    # Prometheus text format by default; ?format=json for the same data as JSON
+    metrics = simulations.metrics()
+    if request.args.get('format') == 'json':
+        return jsonify(metrics)
+    return Response(to_prometheus(metrics), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/simulations/<sim_id>', methods=['DELETE'])
+def delete_simulation(sim_id):
+    if not simulations.remove(sim_id):
+        return jsonify({'error': f"Unknown simulation: {sim_id}"}), 404
+    return jsonify({'status': 'deleted'})
+
+@app.route('/api/simulations/<sim_id>/market_data')
+@with_simulation
+def get_market_data(handle):
+    return Response(handle.call('get_market_data_json'), mimetype='application/json')
 
-@app.route('/api/start', methods=['POST'])
-def start_simulation():
-    simulation.start()
+@app.route('/api/simulations/<sim_id>/depth')
+@with_simulation
+def get_depth(handle):
+    # Aggregated price levels (L2) with cumulative depth, e.g. ?levels=50
+    levels = request.args.get('levels', 10, type=int)
+    if not 0 < levels <= MAX_DEPTH_LEVELS:
+        raise ValueError(f"levels must be between 1 and {MAX_DEPTH_LEVELS}")
+    return jsonify(handle.call('get_depth', levels))
+
+@app.route('/api/simulations/<sim_id>/orders')
+@with_simulation
+def get_orders(handle):
+    # Individual resting orders (L3) of one side, paged: ?side=asks&offset=100&limit=50
+    side = request.args.get('side', 'bids')
+    offset = request.args.get('offset', 0, type=int)
+    limit = request.args.get('limit', 50, type=int)
+    if offset < 0 or not 0 < limit <= MAX_ORDERS_PAGE:
+        raise ValueError(f"offset must be >= 0 and limit between 1 and {MAX_ORDERS_PAGE}")
+    return jsonify(handle.call('get_orders', side, offset, limit))
+
+@app.route('/api/simulations/<sim_id>/start', methods=['POST'])
+@with_simulation
+def start_simulation(handle):
+    handle.call('start')
     return jsonify({'status': 'started'})
 
-@app.route('/api/stop', methods=['POST'])
-def stop_simulation():
-    simulation.stop()
+@app.route('/api/simulations/<sim_id>/stop', methods=['POST'])
+@with_simulation
+def stop_simulation(handle):
+    handle.call('stop')
     return jsonify({'status': 'stopped'})
 
-@app.route('/api/reset', methods=['POST'])
-def reset_simulation():
-    simulation.reset()
+@app.route('/api/simulations/<sim_id>/reset', methods=['POST'])
+@with_simulation
+def reset_simulation(handle):
+    handle.call('reset')
     return jsonify({'status': 'reset'})
 
-@app.route('/api/traders')
-def get_traders_data():
-    return jsonify(simulation.get_all_traders_data())
+@app.route('/api/simulations/<sim_id>/snapshot')
+@with_simulation
+def save_snapshot(handle):
+    # Binary checkpoint of the full simulation state, loadable with /restore
+    return Response(handle.call('save_checkpoint'), mimetype='application/octet-stream', headers={
+        'Content-Disposition': f'attachment; filename="simulation-{handle.id}.ckpt"'
+    })
+
+@app.route('/api/simulations/<sim_id>/restore', methods=['POST'])
+@with_simulation
+def restore_snapshot(handle):
+    # The request body is a checkpoint from /snapshot, possibly of another simulation
+    return jsonify(handle.call('restore_checkpoint', request.get_data()))
+
+@app.route('/api/simulations/<sim_id>/tick_rate', methods=['GET'])
+@with_simulation
+def get_tick_rate(handle):
+    return jsonify(handle.call('get_run_status'))
+
+@app.route('/api/simulations/<sim_id>/tick_rate', methods=['POST'])
+@with_simulation
+def set_tick_rate(handle):
+    # {"tick_rate": 50} for a target rate, {"tick_rate": "max"} or null for max-speed mode
+    tick_rate = (request.get_json(silent=True) or {}).get('tick_rate')
+    if tick_rate in (None, 'max'):
+        tick_rate = None
+    elif isinstance(tick_rate, (int, float)) and not isinstance(tick_rate, bool):
+        tick_rate = float(tick_rate)
+    else:
+        raise ValueError(f"tick_rate must be a number, 'max' or null, got {tick_rate!r}")
+    return jsonify(handle.call('set_tick_rate', tick_rate))
+
+@app.route('/api/simulations/<sim_id>/traders')
+@with_simulation
+def get_traders_data(handle):
+    return Response(handle.call('get_all_traders_data_json'), mimetype='application/json')
+
+@app.route('/api/simulations/<sim_id>/traders/leaderboard')
+@with_simulation
+def query_traders(handle):
+    # Whole population ranked by pnl, volume or drawdown, filtered and paged:
+    # ?metric=volume&type=RandomTrader&min=100&max=5000&order=desc&offset=0&limit=50
+    offset = request.args.get('offset', 0, type=int)
+    limit = request.args.get('limit', 50, type=int)
+    if offset < 0 or not 0 < limit <= MAX_TRADERS_PAGE:
+        raise ValueError(f"offset must be >= 0 and limit between 1 and {MAX_TRADERS_PAGE}")
+    return jsonify(handle.call(
+        'query_traders',
+        request.args.get('metric', 'pnl'),
+        request.args.get('type', 'all'),
+        request.args.get('min', type=float),
+        request.args.get('max', type=float),
+        request.args.get('order', 'desc'),
+        offset,
+        limit,
+    ))
+
+@app.route('/api/simulations/<sim_id>/traders/summary')
+@with_simulation
+def get_population_summary(handle):
+    return jsonify(handle.call('get_population_summary'))
+
+# The single-simulation API paths of earlier versions, served by the default simulation
+# (its /api/simulations/default/... paths keep answering directly instead of redirecting)
+app.url_map.redirect_defaults = False
+for rule, endpoint, methods in (
+    ('/api/market_data', 'get_market_data', ['GET']),
+    ('/api/start', 'start_simulation', ['POST']),
+    ('/api/stop', 'stop_simulation', ['POST']),
+    ('/api/reset', 'reset_simulation', ['POST']),
+    ('/api/tick_rate', 'get_tick_rate', ['GET']),
+    ('/api/tick_rate', 'set_tick_rate', ['POST']),
+    ('/api/traders', 'get_traders_data', ['GET']),
+    ('/api/traders/summary', 'get_population_summary', ['GET']),
+):
+    app.add_url_rule(rule, endpoint, methods=methods, defaults={'sim_id': DEFAULT_SIMULATION})
 
 @socketio.on('connect')
 def on_connect():
     print('Client connected')
-    emit('market_update', simulation.get_market_data())
-    emit('traders_update', simulation.get_all_traders_data())
+    # Clients of the single-simulation API get the default simulation's stream until they
+    # join another one
+    try:
+        handle = simulations.join(request.sid, default_simulation().id)
+    except SimulationLimitReached:
+        return
+    join_room(handle.id)
+    emit('market_snapshot', EncodedJSON(handle.call('snapshot_json')))
+    emit('traders_update', EncodedJSON(handle.call('get_all_traders_data_json')))
+
+@socketio.on('join_simulation')
+def on_join_simulation(data):
+    sim_id = (data or {}).get('sim_id')
+    previous = simulations.sessions.get(request.sid)
+    try:
+        handle = simulations.join(request.sid, sim_id)
+    except KeyError:
+        emit('simulation_closed', {'id': sim_id})
+        return
+    if previous:
+        leave_room(previous)
+    join_room(sim_id)
+    emit('market_snapshot', EncodedJSON(handle.call('snapshot_json')))
+    emit('traders_update', EncodedJSON(handle.call('get_all_traders_data_json')))
+
+@socketio.on('market_resync')
+def on_market_resync():
+    # Sent by clients that detected a gap in the market_update sequence numbers
+    sim_id = simulations.sessions.get(request.sid)
+    if sim_id in simulations.simulations:
+        emit('market_snapshot', EncodedJSON(simulations.get(sim_id).call('snapshot_json')))
 
 @socketio.on('disconnect')
 def on_disconnect():
+    simulations.leave(request.sid)
     print('Client disconnected')
 
 if __name__ == '__main__':
-    socketio.run(app, host='0.0.0.0', port=5000)
\ No newline at end of file
+    socketio.run(app, host='0.0.0.0', port=5000)
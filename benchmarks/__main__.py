@@ -0,0 +1,98 @@
+"""
+Benchmark runner.
+
+    python -m benchmarks run --output bench/base.json        # run the whole suite
+    python -m benchmarks run --filter order_book --no-memory  # run a subset, timings only
+    python -m benchmarks compare bench/base.json bench/head.json
+
+`compare` prints the throughput and p99 change of every case present in both
+files and exits with status 1 if any case regressed by more than `--threshold`.
+"""
+import argparse
+import json
+import os
+import sys
+
+from benchmarks.suite import all_cases, environment, time_case
+
+
+def run(args):
+    cases = all_cases()
+    if args.filter:
+        cases = {name: case for name, case in cases.items() if args.filter in name}
+    if not cases:
+        sys.exit(f"No benchmark matches filter: {args.filter}")
+
+    results = {}
+    for name, case in cases.items():
+        result = time_case(case, args.seed, measure_memory=not args.no_memory)
+        results[name] = result
+        memory = f"  peak={result['peak_memory_mb']:.1f}MiB" if 'peak_memory_mb' in result else ''
+        print(f"{name:<60} {result['ops_per_sec']:>12.1f} ops/s  p50={result['p50_us']:.1f}us  "
+              f"p99={result['p99_us']:.1f}us{memory}")
+
+    report = {'environment': environment(), 'seed': args.seed, 'results': results}
+    output_dir = os.path.dirname(args.output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved {len(results)} results to {args.output}")
+
+
+def _change(before, after):
+    return (after - before) / before * 100 if before else 0.0
+
+
+def compare(args):
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+
+    print(f"base: {base['environment'].get('commit')}   head: {head['environment'].get('commit')}")
+    print(f"{'case':<60} {'base ops/s':>12} {'head ops/s':>12} {'change':>8} {'p99 change':>11}")
+
+    regressions = []
+    for name, before in base['results'].items():
+        after = head['results'].get(name)
+        if after is None:
+            continue
+        throughput_change = _change(before['ops_per_sec'], after['ops_per_sec'])
+        p99_change = _change(before['p99_us'], after['p99_us'])
+        flag = ''
+        if throughput_change < -args.threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print(f"{name:<60} {before['ops_per_sec']:>12.1f} {after['ops_per_sec']:>12.1f} "
+              f"{throughput_change:>+7.1f}% {p99_change:>+10.1f}%{flag}")
+
+    if regressions:
+        print(f"{len(regressions)} case(s) regressed by more than {args.threshold}%")
+        sys.exit(1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description="Matching engine and step benchmarks.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help="Run the benchmark suite.")
+    run_parser.add_argument('--output', default=os.path.join('bench', 'results.json'), help="JSON results file.")
+    run_parser.add_argument('--seed', type=int, default=1234)
+    run_parser.add_argument('--filter', default=None, help="Only run cases whose name contains this string.")
+    run_parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc peak memory pass.")
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = subparsers.add_parser('compare', help="Compare two result files.")
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('head')
+    compare_parser.add_argument('--threshold', type=float, default=10.0,
+                                help="Throughput drop (percent) reported as a regression.")
+    compare_parser.set_defaults(handler=compare)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == '__main__':
+    main()
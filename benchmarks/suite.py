@@ -0,0 +1,218 @@
+"""
+Benchmark cases and the harness that times them.
+
+Each case is a function taking a seed and returning `(setup, operation, count)`:
+`setup()` builds fresh state and `operation(state, i)` performs the i-th timed
+operation. The harness times every operation individually, so results include
+latency percentiles as well as throughput, and measures peak memory in a
+separate tracemalloc pass so tracing overhead never skews the timings.
+"""
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from simulation.journal import JournalReplay
+from simulation.market_simulation import MarketSimulation
+from simulation.order import Order
+from simulation.order_book import OrderBook
+from simulation.pricing import DEFAULT_TICK_GRID
+from simulation.simulation_config import SimulationConfig
+
+BOOK_DEPTHS = (100, 1000, 10000)
+MARKET_ORDER_MIXES = (0.0, 0.2, 0.5)  # Fraction of market orders in the timed flow
+STEP_POPULATIONS = (
+    # (traders, vectorized, timed steps)
+    (2000, False, 50),
+    (20000, False, 10),
+    (2000, True, 100),
+    (20000, True, 50),
+    (200000, True, 10),
+)
+REPLAY_POPULATIONS = (
+    # (traders, vectorized, replayed steps)
+    (2000, False, 200),
+    (20000, True, 50),
+)
+
+
+def _random_order(rng, order_id, market_fraction, mid=100.0):
+    if rng.random() < market_fraction:
+        return Order(order_id, 'market', rng.choice(('buy', 'sell')), rng.randint(1, 50), trader_id=f"t{order_id % 500}")
+    side = rng.choice(('buy', 'sell'))
+    # Mostly passive quotes with some marketable ones, so the book depth stays roughly stable
+    offset = rng.uniform(-0.5, 5.0)
+    price = DEFAULT_TICK_GRID.to_ticks(mid - offset if side == 'buy' else mid + offset)
+    return Order(order_id, 'limit', side, rng.randint(1, 50), price=price, trader_id=f"t{order_id % 500}")
+
+
+def order_book_case(depth, market_fraction, operations=20000):
+    def case(seed):
+        rng = random.Random(seed)
+        resting = [_random_order(rng, i, 0.0) for i in range(depth)]
+        flow = [_random_order(rng, depth + i, market_fraction) for i in range(operations)]
+
+        def setup():
+            book = OrderBook()
+            for order in resting:
+                book.add_order(Order(order.id, order.type, order.side, order.quantity, order.price, order.trader_id))
+            return book
+
+        def operation(book, i):
+            order = flow[i]
+            book.add_order(Order(order.id, order.type, order.side, order.quantity, order.price, order.trader_id))
+
+        return setup, operation, operations
+    return case
+
+
+def _population_config(traders, vectorized, seed):
+    # Keep the default 3:1 random to mean-reverting split at every population size
+    return SimulationConfig(
+        random_traders=traders * 3 // 4,
+        mean_reverting_traders=traders // 4,
+        vectorized_traders=vectorized,
+        seed=seed,
+    )
+
+
+def step_case(traders, vectorized, steps, warmup=10):
+    def case(seed):
+        def setup():
+            simulation = MarketSimulation(_population_config(traders, vectorized, seed))
+            for _ in range(warmup):
+                simulation.step()
+            return simulation
+
+        def operation(simulation, i):
+            simulation.step()
+
+        return setup, operation, steps
+    return case
+
+
+def replay_case(traders, vectorized, steps):
+    """Replay a recorded order flow into a fresh book, one tick per operation: matching alone."""
+    def case(seed):
+        def setup():
+            directory = tempfile.mkdtemp()
+            config = _population_config(traders, vectorized, seed)
+            config.journal_path = os.path.join(directory, 'flow.journal')
+            simulation = MarketSimulation(config)
+            for _ in range(steps):
+                simulation.step()
+            simulation.journal.close()
+            simulation.order_book.tape.close()
+            replay = JournalReplay(config.journal_path)
+            # The replay keeps the journal mapped, so the file itself can go
+            shutil.rmtree(directory)
+            return replay
+
+        def operation(replay, i):
+            replay.run(until=i)
+
+        return setup, operation, steps
+    return case
+
+
+def serialization_case(method, encode, calls=200, warmup=50):
+    def case(seed):
+        def setup():
+            simulation = MarketSimulation(_population_config(2000, False, seed))
+            for _ in range(warmup):
+                simulation.step()
+            return simulation
+
+        def operation(simulation, i):
+            data = getattr(simulation, method)()
+            if encode:
+                json.dumps(data)
+
+        return setup, operation, calls
+    return case
+
+
+def all_cases():
+    """Return the full suite as an ordered dict of name -> case."""
+    cases = {}
+    for depth in BOOK_DEPTHS:
+        for market_fraction in MARKET_ORDER_MIXES:
+            name = f"order_book.add_order[depth={depth},market={market_fraction:.0%}]"
+            cases[name] = order_book_case(depth, market_fraction)
+    for traders, vectorized, steps in STEP_POPULATIONS:
+        mode = 'vectorized' if vectorized else 'objects'
+        cases[f"simulation.step[traders={traders},{mode}]"] = step_case(traders, vectorized, steps)
+    for traders, vectorized, steps in REPLAY_POPULATIONS:
+        mode = 'vectorized' if vectorized else 'objects'
+        cases[f"order_book.replay[traders={traders},{mode}]"] = replay_case(traders, vectorized, steps)
+    for method in ('get_market_data', 'get_all_traders_data'):
+        cases[f"serialize.{method}"] = serialization_case(method, encode=False)
+        cases[f"serialize.{method}+json"] = serialization_case(method, encode=True)
+    return cases
+
+
+def time_case(case, seed, measure_memory=True):
+    """
+    Run one case and return its statistics.
+
+    Returns:
+        dict: ops, ops_per_sec, mean/p50/p99/max latency in microseconds, and peak
+        memory in MiB (setup plus operations) when `measure_memory` is set.
+    """
+    setup, operation, count = case(seed)
+
+    state = setup()
+    latencies = np.empty(count, dtype=np.int64)
+    perf_counter_ns = time.perf_counter_ns
+    for i in range(count):
+        started = perf_counter_ns()
+        operation(state, i)
+        latencies[i] = perf_counter_ns() - started
+    del state
+
+    total_seconds = latencies.sum() / 1e9
+    result = {
+        'ops': count,
+        'ops_per_sec': count / total_seconds if total_seconds > 0 else None,
+        'mean_us': float(latencies.mean() / 1e3),
+        'p50_us': float(np.percentile(latencies, 50) / 1e3),
+        'p99_us': float(np.percentile(latencies, 99) / 1e3),
+        'max_us': float(latencies.max() / 1e3),
+    }
+
+    if measure_memory:
+        # Second, identically seeded pass under tracemalloc
+        setup, operation, count = case(seed)
+        tracemalloc.start()
+        try:
+            state = setup()
+            for i in range(count):
+                operation(state, i)
+            result['peak_memory_mb'] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+
+    return result
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
@@ -0,0 +1,139 @@
+import numpy as np
+
+
+class RiskAnalytics:
+    """
+    Streaming risk metrics for every trader, updated once per tick.
+
+    Each trader is a row in a set of NumPy arrays. Every tick the whole population is
+    marked to market in one vectorized pass, and the running statistics are updated
+    in O(1) per trader:
+
+    - equity and per-tick return
+    - running mean and variance of returns (Welford's algorithm), giving volatility
+      and a per-tick Sharpe ratio (risk-free rate of zero, not annualized)
+    - peak equity and maximum drawdown
+    - traded notional and turnover (traded notional / initial equity), read from
+      the new rows of the trade tape, whose traders are mapped to rows by the ledger
+
+    Trade histories are never replayed.
+    """
+
+    def __init__(self, initial_equity):
+        """
+        Args:
+            initial_equity (np.ndarray): Starting portfolio value of each trader row.
+        """
+        size = len(initial_equity)
+        self.initial_equity = np.asarray(initial_equity, dtype=np.float64).copy()
+        self.equity = self.initial_equity.copy()
+        self.peak_equity = self.initial_equity.copy()
+        self.max_drawdown = np.zeros(size)
+        self.return_mean = np.zeros(size)
+        self.return_m2 = np.zeros(size)
+        self.traded_notional = np.zeros(size)
+        self.ticks = 0
+
+        self._tape_position = 0
+
+    def update(self, ledger, price, trade_tape):
+        """
+        Mark every trader to market at `price` and fold the tick into the running statistics.
+
+        Args:
+            ledger (PortfolioLedger): Cash and shares of each trader row, and the rows of the tape's traders.
+            price (float): Current market price.
+            trade_tape (TradeTape): Tape holding the trades executed so far.
+        """
+        equity = ledger.cash + ledger.shares * price
+        returns = np.divide(equity - self.equity, self.equity, out=np.zeros_like(equity), where=self.equity > 0)
+
+        self.ticks += 1
+        delta = returns - self.return_mean
+        self.return_mean += delta / self.ticks
+        self.return_m2 += delta * (returns - self.return_mean)
+
+        np.maximum(self.peak_equity, equity, out=self.peak_equity)
+        drawdown = np.divide(self.peak_equity - equity, self.peak_equity, out=np.zeros_like(equity),
+                             where=self.peak_equity > 0)
+        np.maximum(self.max_drawdown, drawdown, out=self.max_drawdown)
+        self.equity = equity
+
+        self._consume_trades(trade_tape, ledger)
+
+    def _consume_trades(self, trade_tape, ledger):
+        """Add the notional of trades appended to the tape since the last tick."""
+        end = len(trade_tape)
+        if end == self._tape_position:
+            return
+
+        tape_rows = ledger.tape_rows(trade_tape)
+        notional = trade_tape.column('price', self._tape_position, end) * trade_tape.column(
+            'quantity', self._tape_position, end)
+        buyer_rows = tape_rows[trade_tape.column('buyer', self._tape_position, end)]
+        seller_rows = tape_rows[trade_tape.column('seller', self._tape_position, end)]
+        valid_buyers = buyer_rows >= 0
+        valid_sellers = seller_rows >= 0
+        np.add.at(self.traded_notional, buyer_rows[valid_buyers], notional[valid_buyers])
+        np.add.at(self.traded_notional, seller_rows[valid_sellers], notional[valid_sellers])
+        self._tape_position = end
+
+    def volatility(self):
+        """Standard deviation of per-tick returns for every trader."""
+        if self.ticks < 2:
+            return np.zeros_like(self.return_m2)
+        return np.sqrt(self.return_m2 / (self.ticks - 1))
+
+    def sharpe_ratio(self):
+        """Mean over standard deviation of per-tick returns (0 where volatility is 0)."""
+        volatility = self.volatility()
+        return np.divide(self.return_mean, volatility, out=np.zeros_like(volatility), where=volatility > 0)
+
+    def turnover(self):
+        return np.divide(self.traded_notional, self.initial_equity, out=np.zeros_like(self.traded_notional),
+                         where=self.initial_equity > 0)
+
+    def trader_metrics(self, row):
+        """Return the risk metrics of one trader row."""
+        volatility = float(np.sqrt(self.return_m2[row] / (self.ticks - 1))) if self.ticks > 1 else 0.0
+        initial_equity = self.initial_equity[row]
+        return {
+            'sharpe_ratio': float(self.return_mean[row] / volatility) if volatility > 0 else 0.0,
+            'volatility': volatility,
+            'max_drawdown': float(self.max_drawdown[row]),
+            'turnover': float(self.traded_notional[row] / initial_equity) if initial_equity > 0 else 0.0,
+        }
+
+    def summary(self, groups):
+        """
+        Summarize the population.
+
+        Args:
+            groups (dict): Group name -> slice or index array of the rows in that group.
+
+        Returns:
+            dict: Group name -> distribution (mean and percentiles) of each metric.
+        """
+        metrics = {
+            'pnl': self.equity - self.initial_equity,
+            'sharpe_ratio': self.sharpe_ratio(),
+            'volatility': self.volatility(),
+            'max_drawdown': self.max_drawdown,
+            'turnover': self.turnover(),
+        }
+
+        summary = {}
+        for name, rows in groups.items():
+            group = {'traders': int(len(self.equity[rows]))}
+            if group['traders']:
+                for metric, values in metrics.items():
+                    values = values[rows]
+                    p5, p50, p95 = np.percentile(values, (5, 50, 95))
+                    group[metric] = {
+                        'mean': float(values.mean()),
+                        'p5': float(p5),
+                        'median': float(p50),
+                        'p95': float(p95),
+                    }
+            summary[name] = group
+        return summary
@@ -0,0 +1,110 @@
+"""
+Batch call auction: uncross a batch of orders at a single price.
+
+Prices are integer ticks. Market orders take part at any price: market buys are
+priced `MARKET_BUY_PRICE` and market sells `MARKET_SELL_PRICE`, which rank them
+ahead of every limit order on their side.
+
+The clearing price is the limit price that maximizes executed volume
+(`clearing_price`). Every order that crosses it is eligible; the side with more
+eligible quantity is rationed by price priority, and at its marginal price level
+pro rata to order size or by time priority (`allocate`). Buy and sell fills are
+then paired into trades (`pair_fills`). Each step is a few NumPy array operations,
+whatever the number of orders.
+"""
+import numpy as np
+
+MARKET_BUY_PRICE = np.iinfo(np.int64).max
+MARKET_SELL_PRICE = 0
+
+
+def clearing_price(buy_prices, buy_quantities, sell_prices, sell_quantities, reference):
+    """
+    Find the price that maximizes executed volume.
+
+    Ties go to the price with the smallest demand/supply imbalance, then to the one
+    closest to `reference`.
+
+    Args:
+        buy_prices (np.ndarray): Buy limit prices in ticks.
+        buy_quantities (np.ndarray): Buy quantities.
+        sell_prices (np.ndarray): Sell limit prices in ticks.
+        sell_quantities (np.ndarray): Sell quantities.
+        reference (int): Tie-break price in ticks, e.g. the last trade price.
+
+    Returns:
+        tuple: `(price, volume)`, or `(None, 0)` if no orders cross.
+    """
+    candidates = np.unique(np.concatenate((buy_prices[buy_prices != MARKET_BUY_PRICE],
+                                           sell_prices[sell_prices != MARKET_SELL_PRICE])))
+    if not candidates.size or not buy_prices.size or not sell_prices.size:
+        return None, 0
+
+    # Demand at p: buy quantity priced at p or above; supply: sell quantity at p or below
+    buy_order = np.argsort(buy_prices, kind='stable')
+    buy_cumulative = np.concatenate(([0], np.cumsum(buy_quantities[buy_order])))
+    demand = buy_cumulative[-1] - buy_cumulative[np.searchsorted(buy_prices[buy_order], candidates, 'left')]
+    sell_order = np.argsort(sell_prices, kind='stable')
+    sell_cumulative = np.concatenate(([0], np.cumsum(sell_quantities[sell_order])))
+    supply = sell_cumulative[np.searchsorted(sell_prices[sell_order], candidates, 'right')]
+
+    volume = np.minimum(demand, supply)
+    if volume.max() <= 0:
+        return None, 0
+    best = np.lexsort((np.abs(candidates - reference), np.abs(demand - supply), -volume))[0]
+    return int(candidates[best]), int(volume[best])
+
+
+def allocate(ranks, quantities, volume, pro_rata=True):
+    """
+    Split `volume` across one side's eligible orders.
+
+    Orders fill in rank order (better price first). At the marginal level, where the
+    volume runs out, it is shared pro rata to order size (remainder units going to
+    the earliest orders) or by time priority.
+
+    Args:
+        ranks (np.ndarray): Price rank of each order; lower is better.
+        quantities (np.ndarray): Order quantities.
+        volume (int): Quantity to allocate, at most `quantities.sum()`.
+        pro_rata (bool): Pro-rata rather than time priority at the marginal level.
+
+    Returns:
+        np.ndarray: Filled quantity of each order. Array position is time priority.
+    """
+    order = np.lexsort((np.arange(ranks.size), ranks))
+    sorted_quantities = quantities[order]
+    before = np.cumsum(sorted_quantities) - sorted_quantities
+    sorted_fills = np.clip(volume - before, 0, sorted_quantities)
+
+    partial = np.flatnonzero(sorted_fills < sorted_quantities)
+    if pro_rata and partial.size:
+        sorted_ranks = ranks[order]
+        level = np.flatnonzero(sorted_ranks == sorted_ranks[partial[0]])
+        available = volume - before[level[0]]
+        level_quantities = sorted_quantities[level]
+        shares = level_quantities * available // level_quantities.sum()
+        shares[:available - shares.sum()] += 1
+        sorted_fills[level] = shares
+
+    fills = np.empty_like(sorted_fills)
+    fills[order] = sorted_fills
+    return fills
+
+
+def pair_fills(buy_fills, sell_fills):
+    """
+    Pair buy and sell fills of equal total into trades, each side in array order.
+
+    Returns:
+        tuple: Arrays `(buy index, sell index, quantity)`, one entry per trade.
+    """
+    buys = np.flatnonzero(buy_fills)
+    sells = np.flatnonzero(sell_fills)
+    buy_cumulative = np.cumsum(buy_fills[buys])
+    sell_cumulative = np.cumsum(sell_fills[sells])
+    # Every point where either side's cumulative fill steps ends a trade
+    bounds = np.union1d(buy_cumulative, sell_cumulative)
+    quantities = np.diff(bounds, prepend=0)
+    return (buys[np.searchsorted(buy_cumulative, bounds)], sells[np.searchsorted(sell_cumulative, bounds)],
+            quantities)
@@ -0,0 +1,176 @@
+"""
+Binary checkpoints of a simulation's state.
+
+A checkpoint is a short header followed by the zlib-compressed pickle of the state
+objects (traders, populations, order book, trade tape, histories, scheduler and
+random generators). Array-backed state pickles as raw buffers and the trade tape
+saves only its recorded rows, so checkpoints are compact and load faster than a
+simulation initializes.
+
+Checkpoints can come from API clients, so loading only accepts the classes that
+make up a simulation's state, and only the attributes those classes set. Whether
+the loaded objects are consistent with each other is checked by the simulation
+before it adopts them (`MarketSimulation.restore_checkpoint`).
+"""
+import dis
+import functools
+import gc
+import io
+import pickle
+import zlib
+from collections import deque
+
+import numpy as np
+
+MAGIC = b'MSIMCKPT'
+VERSION = 1
+MAX_CHECKPOINT_BYTES = 1 << 30  # Largest decompressed payload accepted by `loads`
+
+# Classes outside the `simulation` package that a checkpoint may reference
+_ALLOWED_GLOBALS = {
+    ('collections', 'deque'),
+    ('random', 'Random'),
+    ('numpy', 'dtype'),
+    ('numpy', 'ndarray'),
+    ('numpy.core.multiarray', '_reconstruct'),
+    ('numpy.core.multiarray', 'scalar'),
+    ('numpy._core.multiarray', '_reconstruct'),
+    ('numpy._core.multiarray', 'scalar'),
+    ('numpy._core.numeric', '_frombuffer'),
+    ('numpy.core.numeric', '_frombuffer'),
+    ('numpy.random._pickle', '__generator_ctor'),
+    ('numpy.random._pickle', '__bit_generator_ctor'),
+    ('numpy.random.bit_generator', 'SeedSequence'),
+    ('numpy.random.bit_generator', '__pyx_unpickle_SeedSequence'),
+}
+
+# Classes of the `simulation` package that make up a simulation's state
+_ALLOWED_CLASSES = {
+    ('simulation.analytics', 'RiskAnalytics'),
+    ('simulation.event_scheduler', 'EventScheduler'),
+    ('simulation.ledger', 'PortfolioLedger'),
+    ('simulation.market_view', 'MarketIndicators'),
+    ('simulation.order', 'Order'),
+    ('simulation.order_book', 'OrderBook'),
+    ('simulation.order_book', 'PriceLadder'),
+    ('simulation.pricing', 'TickGrid'),
+    ('simulation.trade_tape', 'TradeTape'),
+    ('simulation.traders.mean_reverting_trader', 'MeanRevertingTrader'),
+    ('simulation.traders.population', 'MeanRevertingTraderPopulation'),
+    ('simulation.traders.population', 'RandomTraderPopulation'),
+    ('simulation.traders.random_trader', 'RandomTrader'),
+    ('simulation.traders.trend_following_trader', 'TrendFollowingTrader'),
+}
+
+
+class _CheckpointUnpickler(pickle.Unpickler):
+    def find_class(self, module, name):
+        if (module, name) in _ALLOWED_GLOBALS or (module, name) in _ALLOWED_CLASSES:
+            return super().find_class(module, name)
+        # NumPy bit generators are looked up by class name when a Generator is rebuilt
+        if module.startswith('numpy.random.') and name in ('PCG64', 'PCG64DXSM', 'MT19937', 'Philox', 'SFC64'):
+            return super().find_class(module, name)
+        raise pickle.UnpicklingError(f"Checkpoint references a disallowed global: {module}.{name}")
+
+
+@functools.lru_cache(maxsize=None)
+def _assigned_attributes(cls):
+    """Return every attribute name the methods of a class and its bases assign."""
+    names = set()
+    for klass in cls.__mro__:
+        for value in vars(klass).values():
+            code = getattr(getattr(value, '__func__', value), '__code__', None)
+            if code is not None:
+                names.update(instruction.argval for instruction in dis.get_instructions(code)
+                             if instruction.opname == 'STORE_ATTR')
+    return frozenset(names)
+
+
+def _check_objects(state):
+    """
+    Walk the loaded state and reject object arrays and simulation objects carrying
+    attributes their class never sets, which pickle would otherwise restore as given.
+    """
+    seen = set()
+    pending = [state]
+    while pending:
+        value = pending.pop()
+        kind = type(value)
+        if kind in (int, float, str, bool, type(None)) or id(value) in seen:
+            continue
+        seen.add(id(value))
+        if kind is dict:
+            pending.extend(value.keys())
+            pending.extend(value.values())
+        elif kind in (list, tuple, set, frozenset, deque):
+            pending.extend(value)
+        elif kind is np.ndarray:
+            if value.dtype.hasobject:
+                raise ValueError("Checkpoint contains an array of objects")
+        elif (kind.__module__, kind.__qualname__) in _ALLOWED_CLASSES:
+            attributes = getattr(value, '__dict__', None)
+            if attributes is not None:
+                unknown = attributes.keys() - _assigned_attributes(kind)
+                if unknown:
+                    raise ValueError(f"Checkpoint sets unknown {kind.__name__} attributes: "
+                                     f"{', '.join(sorted(map(str, unknown)))}")
+                pending.extend(attributes.values())
+            for klass in kind.__mro__:
+                for slot in vars(klass).get('__slots__', ()):
+                    pending.append(getattr(value, slot, None))
+
+
+def dumps(state, level=1):
+    """
+    Serialize a dict of state objects to checkpoint bytes.
+
+    Args:
+        state (dict): Attribute name -> value.
+        level (int): zlib compression level.
+
+    Returns:
+        bytes: The checkpoint.
+    """
+    payload = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+    return MAGIC + bytes([VERSION]) + zlib.compress(payload, level)
+
+
+def loads(data):
+    """
+    Deserialize checkpoint bytes produced by `dumps`.
+
+    Raises:
+        ValueError: If the data is not a checkpoint of a supported version, is corrupt
+            or larger than `MAX_CHECKPOINT_BYTES` once decompressed, or sets attributes
+            the simulation's classes do not have.
+    """
+    if len(data) <= len(MAGIC) or data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a simulation checkpoint")
+    version = data[len(MAGIC)]
+    if version != VERSION:
+        raise ValueError(f"Unsupported checkpoint version: {version}")
+    # Loading allocates many objects at once; pausing the cyclic GC avoids repeated
+    # full-heap collections while they are created
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        decompressor = zlib.decompressobj()
+        payload = decompressor.decompress(data[len(MAGIC) + 1:], MAX_CHECKPOINT_BYTES)
+        if decompressor.unconsumed_tail:
+            raise ValueError(f"Checkpoint exceeds {MAX_CHECKPOINT_BYTES} bytes when decompressed")
+        if not decompressor.eof:
+            raise ValueError("Corrupt checkpoint: truncated data")
+        state = _CheckpointUnpickler(io.BytesIO(payload)).load()
+    except ValueError:
+        raise
+    except Exception as e:
+        # Checkpoints come from clients: whatever a malformed one makes fail while it is
+        # rebuilt (a missing key, a wrong type, a bad array shape) is invalid input
+        raise ValueError(f"Corrupt checkpoint: {type(e).__name__}: {e}")
+    finally:
+        if gc_enabled:
+            gc.enable()
+    if not isinstance(state, dict):
+        raise ValueError("Corrupt checkpoint: state is not a dict")
+    _check_objects(state)
+    return state
@@ -1,17 +1,74 @@
+import heapq
+
+
 class EventScheduler:
+    """
+    Discrete-event scheduler backed by a binary heap.
+
+    Events are kept in a min-heap ordered by time, so scheduling and popping an event
+    are both O(log n). Times are continuous: the simulation clock advances one tick
+    per step, and a step handles every event due before the start of the next tick.
+    Events scheduled for the same time are returned in the order they were scheduled.
+    """
+
     def __init__(self):
-        self.events = []
+        self.events = []  # Heap of (time, sequence, event_type, data)
         self.current_time = 0
+        self._sequence = 0  # Tie-breaker keeping same-time events in scheduling order
+
+    def __len__(self):
+        return len(self.events)
 
     def schedule_event(self, time, event_type, data):
-        self.events.append({'time': time, 'event_type': event_type, 'data': data})
-        self.events.sort(key=lambda x: x['time'])
+        heapq.heappush(self.events, (time, self._sequence, event_type, data))
+        self._sequence += 1
+
+    def schedule_arrival(self, rate, rng, event_type, data, after=None):
+        """
+        Schedule the next arrival of a Poisson process.
 
-    def get_next_events(self):
+        Args:
+            rate (float): Expected number of arrivals per tick.
+            rng (random.Random): Source of the exponential inter-arrival draw.
+            event_type (str): Type of the scheduled event.
+            data: Payload of the scheduled event.
+            after (float): Time of the previous arrival. Defaults to the current time.
+
+        Returns:
+            float: Time of the scheduled arrival.
+        """
+        start = self.current_time if after is None else after
+        time = start + rng.expovariate(rate)
+        self.schedule_event(time, event_type, data)
+        return time
+
+    def get_next_events(self, until=None):
+        """
+        Pop every event due before `until`, in time order.
+
+        Args:
+            until (float): Exclusive time bound. Defaults to the start of the next tick.
+
+        Returns:
+            list: `(time, event_type, data)` tuples.
+        """
+        if until is None:
+            until = self.current_time + 1
+        events = self.events
         current_events = []
-        while self.events and self.events[0]['time'] <= self.current_time:
-            current_events.append(self.events.pop(0))
+        while events and events[0][0] < until:
+            time, _, event_type, data = heapq.heappop(events)
+            current_events.append((time, event_type, data))
         return current_events
 
+    def pop_next_event(self, until=None):
+        """Pop the earliest event due before `until`, or return None if there is none."""
+        if until is None:
+            until = self.current_time + 1
+        if self.events and self.events[0][0] < until:
+            time, _, event_type, data = heapq.heappop(self.events)
+            return time, event_type, data
+        return None
+
     def advance(self):
         self.current_time += 1
@@ -41,19 +41,20 @@ def get_mid_fair_value(best_bid: float,
     return (best_bid + best_ask) / 2.0
 
 
-def fair_value_strategy(private_odds=0.5, alpha_range=(0.1, 0.5)):
+def fair_value_strategy(private_odds=0.5, alpha_range=(0.1, 0.5), rng=random):
     """
     Generate a fair value strategy based on private and mid fair value estimates.
 
     Args:
         private_odds (float): Probability of using private fair value.
         alpha_range (tuple): Range for the smoothing factor alpha.
+        rng: Random number source (the `random` module or a `random.Random` instance).
 
     Returns:
         dict: A strategy with probabilities and alpha values.
     """
-    if random.random() < private_odds:
-        alpha = random.uniform(*alpha_range)
+    if rng.random() < private_odds:
+        alpha = rng.uniform(*alpha_range)
         return {
             'type': 'private',
             'alpha': alpha
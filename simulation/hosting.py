@@ -0,0 +1,455 @@
+"""
+Hosting of many concurrent simulations, each in its own worker process.
+
+The web app talks to a `SimulationManager`, which starts one worker process per
+simulation. Requests are forwarded to the worker over a pipe and answered from the
+simulation's own state; market and trader updates produced by the worker come back
+over a second pipe and are emitted to the Flask-SocketIO room named after the
+simulation id, so clients only receive the simulations they joined.
+"""
+import multiprocessing
+import numbers
+import threading
+import time
+import uuid
+
+from simulation.market_simulation import MAX_TICK_RATE, MIN_TICK_RATE, MarketSimulation
+from simulation.payloads import EncodedJSON
+from simulation.simulation_config import SimulationConfig
+
+MAX_SIMULATIONS = 8
+IDLE_TIMEOUT = 600  # Seconds without clients or requests before a simulation is evicted
+CALL_TIMEOUT = 30  # Seconds to wait for a worker to answer a request
+PUMP_INTERVAL = 0.02  # Seconds between polls of the workers' event pipes
+
+
+class SimulationLimitReached(RuntimeError):
+    pass
+
+
+def _count(maximum, minimum=0):
+    def check(value):
+        return isinstance(value, int) and not isinstance(value, bool) and minimum <= value <= maximum
+    check.description = f"an integer between {minimum} and {maximum}"
+    return check
+
+
+def _number(low, high):
+    def check(value):
+        return isinstance(value, numbers.Real) and not isinstance(value, bool) and low <= value <= high
+    check.description = f"a number between {low} and {high}"
+    return check
+
+
+def _range(bound):
+    def check(value):
+        return (isinstance(value, (list, tuple)) and len(value) == 2 and all(bound(end) for end in value)
+                and value[0] <= value[1])
+    check.description = f"a [low, high] range of {bound.description.replace('a number', 'numbers')}"
+    return check
+
+
+def _amount(maximum):
+    # Capital settings are a fixed amount or a [low, high] range drawn once per simulation
+    count = _count(maximum)
+    count_range = _range(count)
+
+    def check(value):
+        return count(value) or count_range(value)
+    check.description = f"an integer or a [low, high] range of integers between 0 and {maximum}"
+    return check
+
+
+def _choice(*choices):
+    def check(value):
+        # Compared by type too, so 1 is not taken for True
+        return any(type(value) is type(choice) and value == choice for choice in choices)
+    check.description = f"one of {', '.join(map(repr, choices))}"
+    return check
+
+
+def _optional(check):
+    def optional(value):
+        return value is None or check(value)
+    optional.description = f"null or {check.description}"
+    return optional
+
+
+_FLAG = _choice(True, False)
+
+# The settings web clients may override, each with the check its value must pass.
+# Anything touching the server's files (trade_tape_dir, journal_path) or sized without
+# bound (trade_tape_memory_rows, ...) is left to the server's own configuration.
+WEB_SETTINGS = {
+    'random_traders': _count(200_000),
+    'mean_reverting_traders': _count(100_000),
+    'trend_following_traders': _count(2_000),
+    'random_trader_cash': _amount(1_000_000_000),
+    'random_trader_shares': _amount(1_000_000),
+    'mean_reverting_trader_cash': _amount(1_000_000_000),
+    'mean_reverting_trader_shares': _amount(1_000_000),
+    'trend_following_trader_cash': _amount(1_000_000_000),
+    'trend_following_trader_shares': _amount(1_000_000),
+    'initial_price': _number(1, 10_000),
+    'fair_value_private_odds': _number(0, 1),
+    'fair_value_alpha_range': _range(_number(0, 1)),
+    'trader_history_depth': _count(1_000, minimum=1),
+    'order_book_levels': _count(100, minimum=1),
+    'matching': _choice('continuous', 'call_auction'),
+    'auction_allocation': _choice('pro_rata', 'time'),
+    'cancel_stale_orders': _FLAG,
+    'vectorized_traders': _FLAG,
+    'tick_rate': _optional(_number(MIN_TICK_RATE, MAX_TICK_RATE)),
+    'broadcast_rate': _number(0.1, 60),
+    'risk_analytics': _FLAG,
+    'leaderboard': _FLAG,
+    'seed': _optional(_count(2 ** 32 - 1)),
+    'all_traders_tracking': _optional(_count(20)),
+    'random_trader_tracking': _optional(_count(20)),
+    'mean_reverting_trader_tracking': _optional(_count(20)),
+    'trend_following_trader_tracking': _optional(_count(20)),
+}
+
+
+def validate_web_overrides(overrides):
+    """
+    Check settings sent by a web client against `WEB_SETTINGS`.
+
+    Raises:
+        ValueError: If a setting may not be set from the web or its value is out of bounds.
+    """
+    if not isinstance(overrides, dict):
+        raise ValueError("Simulation settings must be a JSON object")
+    for name, value in overrides.items():
+        check = WEB_SETTINGS.get(name)
+        if check is None:
+            raise ValueError(f"Setting {name!r} cannot be set through the API")
+        if not check(value):
+            raise ValueError(f"Setting {name!r} must be {check.description}, got {value!r}")
+
+
+class WorkerChannel:
+    """
+    Stands in for the Flask-SocketIO server inside a worker process: background tasks
+    are threads and emitted events are sent to the parent over a pipe.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._send_lock = threading.Lock()
+
+    def emit(self, event, data):
+        with self._send_lock:
+            self.conn.send((event, data))
+
+    @staticmethod
+    def start_background_task(target, *args):
+        thread = threading.Thread(target=target, args=args, daemon=True)
+        thread.start()
+        return thread
+
+    @staticmethod
+    def sleep(seconds):
+        time.sleep(seconds)
+
+
+class SimulationWorker:
+    """
+    The request handlers of a worker process, run against its simulation.
+
+    Market and trader payloads are returned as JSON bytes, encoded once per simulation
+    state version however many requests and clients ask for them.
+    """
+
+    def __init__(self, overrides, channel):
+        self.channel = channel
+        self.simulation = MarketSimulation(SimulationConfig(**overrides), socketio=channel)
+
+    def _read(self, method, *args):
+        # Reads take the simulation lock so they never see a half-applied step
+        with self.simulation._lock:
+            return method(*args)
+
+    def start(self):
+        self.simulation.start()
+        return self.simulation.get_run_status()
+
+    def stop(self):
+        self.simulation.stop()
+        return self.simulation.get_run_status()
+
+    def reset(self):
+        self.simulation.reset()
+        # The market stream restarts with the new simulation, so every client needs a fresh snapshot
+        self.channel.emit('market_snapshot', EncodedJSON(self.snapshot_json()))
+        return self.simulation.get_run_status()
+
+    def save_checkpoint(self):
+        return self._read(self.simulation.save_checkpoint)
+
+    def restore_checkpoint(self, data):
+        self.simulation.restore_checkpoint(data)
+        self.channel.emit('market_snapshot', EncodedJSON(self.snapshot_json()))
+        return self.simulation.get_run_status()
+
+    def set_tick_rate(self, tick_rate):
+        self.simulation.set_tick_rate(tick_rate)
+        return self.simulation.get_run_status()
+
+    def get_run_status(self):
+        return self.simulation.get_run_status()
+
+    def snapshot_json(self):
+        return self._read(self.simulation.market_stream.snapshot_json)
+
+    def get_market_data_json(self):
+        return self._read(self.simulation.get_market_data_json)
+
+    def get_all_traders_data_json(self):
+        return self._read(self.simulation.get_all_traders_data_json)
+
+    def get_population_summary(self):
+        return self._read(self.simulation.get_population_summary)
+
+    def query_traders(self, *query):
+        return self._read(self.simulation.query_traders, *query)
+
+    def get_depth(self, levels):
+        return self._read(self.simulation.order_book.get_depth, levels)
+
+    def get_orders(self, side, offset, limit):
+        return self._read(self.simulation.order_book.get_orders, side, offset, limit)
+
+    def get_metrics(self):
+        return self._read(self.simulation.get_metrics)
+
+
+def _worker_main(overrides, command_conn, event_conn):
+    """Entry point of a worker process: serve requests until told to close."""
+    worker = SimulationWorker(overrides, WorkerChannel(event_conn))
+    while True:
+        try:
+            method, args = command_conn.recv()
+        except EOFError:
+            break
+        if method == 'close':
+            break
+        try:
+            command_conn.send(('ok', getattr(worker, method)(*args)))
+        except Exception as e:
+            command_conn.send(('error', (type(e).__name__, str(e))))
+    worker.simulation.close()
+
+
+class SimulationHandle:
+    """Parent-side handle of one simulation worker process."""
+
+    def __init__(self, sim_id, overrides, context):
+        self.id = sim_id
+        self.overrides = overrides
+        self.created = self.last_active = time.monotonic()
+        self.clients = set()  # Socket session ids in the simulation's room
+        self.pinned = False  # Kept running when idle
+
+        self._command_conn, worker_command_conn = context.Pipe()
+        self.event_conn, worker_event_conn = context.Pipe(duplex=False)
+        self._call_lock = threading.Lock()
+        self.process = context.Process(target=_worker_main, args=(overrides, worker_command_conn, worker_event_conn),
+                                       name=f"simulation-{sim_id}", daemon=True)
+        self.process.start()
+
+    def touch(self):
+        self.last_active = time.monotonic()
+
+    def call(self, method, *args):
+        """
+        Run a `SimulationWorker` method in the worker process and return its result.
+
+        Raises:
+            ValueError: If the worker rejected the request as invalid.
+            RuntimeError: If the worker failed or did not answer in time.
+        """
+        with self._call_lock:
+            try:
+                self._command_conn.send((method, args))
+                if not self._command_conn.poll(CALL_TIMEOUT):
+                    raise RuntimeError(f"Simulation {self.id} did not answer {method}")
+                status, result = self._command_conn.recv()
+            except (EOFError, OSError) as e:
+                raise RuntimeError(f"Simulation {self.id} is not running: {e}")
+        if status == 'ok':
+            return result
+        error_type, message = result
+        if error_type in ('ValueError', 'TypeError', 'AttributeError'):
+            raise ValueError(message)
+        raise RuntimeError(f"{error_type}: {message}")
+
+    def info(self):
+        return {
+            'id': self.id,
+            'overrides': self.overrides,
+            'clients': len(self.clients),
+            'idle_seconds': round(time.monotonic() - self.last_active, 1),
+            'alive': self.process.is_alive(),
+        }
+
+    def close(self, timeout=5):
+        try:
+            with self._call_lock:
+                self._command_conn.send(('close', ()))
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self._command_conn.close()
+        self.event_conn.close()
+
+
+class SimulationManager:
+    """
+    Registry of the running simulations.
+
+    A background task relays the events of every worker to its socket room and evicts
+    simulations that have had no clients and no requests for `idle_timeout` seconds.
+    """
+
+    def __init__(self, socketio, max_simulations=MAX_SIMULATIONS, idle_timeout=IDLE_TIMEOUT, defaults=None):
+        """
+        Args:
+            socketio: Flask-SocketIO server to emit worker events on.
+            max_simulations (int): Simulations allowed to run at once.
+            idle_timeout (float): Seconds of inactivity before a simulation is evicted.
+            defaults (dict): Server-side `SimulationConfig` settings for every simulation,
+                under the overrides of each request.
+        """
+        self.socketio = socketio
+        self.max_simulations = max_simulations
+        self.idle_timeout = idle_timeout
+        self.defaults = dict(defaults or {})
+        self.simulations = {}  # simulation id -> SimulationHandle
+        self.sessions = {}  # socket session id -> id of the simulation it joined
+        self._lock = threading.Lock()
+        # Workers are spawned rather than forked: the parent runs server threads
+        self._context = multiprocessing.get_context('spawn')
+        self._pump_started = False
+
+    def create(self, overrides=None, sim_id=None, pinned=False):
+        """
+        Start a new simulation.
+
+        Args:
+            overrides (dict): `SimulationConfig` settings for this simulation, as sent by
+                a web client: only those in `WEB_SETTINGS` are accepted.
+            sim_id (str): Id to give the simulation instead of a random one. If a
+                simulation with this id is running, it is returned as is.
+            pinned (bool): Keep the simulation running when it is idle.
+
+        Returns:
+            SimulationHandle: The new simulation.
+
+        Raises:
+            ValueError: If an override is not allowed or out of bounds.
+            SimulationLimitReached: If `max_simulations` are already running.
+        """
+        overrides = {} if overrides is None else overrides
+        validate_web_overrides(overrides)
+        overrides = dict(self.defaults, **overrides)
+        try:
+            SimulationConfig(**overrides)  # Fail here, not in the worker
+        except AttributeError as e:
+            raise ValueError(str(e))
+
+        with self._lock:
+            if sim_id in self.simulations:
+                return self.get(sim_id)
+            if len(self.simulations) >= self.max_simulations:
+                raise SimulationLimitReached(f"At most {self.max_simulations} simulations can run at once")
+            if sim_id is None:
+                sim_id = uuid.uuid4().hex[:12]
+            handle = self.simulations[sim_id] = SimulationHandle(sim_id, overrides, self._context)
+            handle.pinned = pinned
+
+        if not self._pump_started:
+            self._pump_started = True
+            self.socketio.start_background_task(self._pump)
+        return handle
+
+    def get(self, sim_id):
+        """Return a simulation by id, marking it active. Raises KeyError if there is none."""
+        handle = self.simulations[sim_id]
+        handle.touch()
+        return handle
+
+    def list(self):
+        return [handle.info() for handle in list(self.simulations.values())]
+
+    def remove(self, sim_id):
+        with self._lock:
+            handle = self.simulations.pop(sim_id, None)
+        if handle is None:
+            return False
+        for sid in handle.clients:
+            self.sessions.pop(sid, None)
+        self.socketio.emit('simulation_closed', {'id': sim_id}, to=sim_id)
+        handle.close()
+        return True
+
+    def join(self, sid, sim_id):
+        """Record that a socket session joined a simulation's room, leaving any previous one."""
+        handle = self.get(sim_id)
+        self.leave(sid)
+        handle.clients.add(sid)
+        self.sessions[sid] = sim_id
+        return handle
+
+    def leave(self, sid):
+        """Forget a socket session's membership. Returns the simulation id it had joined, if any."""
+        sim_id = self.sessions.pop(sid, None)
+        handle = self.simulations.get(sim_id)
+        if handle is not None:
+            handle.clients.discard(sid)
+            handle.touch()
+        return sim_id
+
+    def metrics(self):
+        """
+        Collect the metrics of every simulation (see `MarketSimulation.get_metrics`),
+        with its connected client count added to the gauges. Workers that fail to
+        answer are left out.
+
+        Returns:
+            dict: Simulation id -> metrics.
+        """
+        collected = {}
+        for handle in list(self.simulations.values()):
+            try:
+                metrics = handle.call('get_metrics')
+            except (ValueError, RuntimeError):
+                continue
+            metrics['gauges']['connected_clients'] = len(handle.clients)
+            collected[handle.id] = metrics
+        return collected
+
+    def shutdown(self):
+        for sim_id in list(self.simulations):
+            self.remove(sim_id)
+
+    def _pump(self):
+        """Relay worker events to socket rooms, reap dead workers and evict idle ones."""
+        while True:
+            now = time.monotonic()
+            for handle in list(self.simulations.values()):
+                try:
+                    while handle.event_conn.poll():
+                        event, data = handle.event_conn.recv()
+                        self.socketio.emit(event, data, to=handle.id)
+                except (EOFError, OSError):
+                    pass
+
+                if not handle.process.is_alive():
+                    self.remove(handle.id)
+                elif not handle.pinned and not handle.clients and now - handle.last_active > self.idle_timeout:
+                    self.remove(handle.id)
+            self.socketio.sleep(PUMP_INTERVAL)
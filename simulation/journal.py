@@ -0,0 +1,293 @@
+"""
+Order-flow journal: an append-only binary log of everything sent to an order book.
+
+With `SimulationConfig.journal_path` set, the order book records every tick
+boundary, order, cancellation, amendment and call auction it receives, before
+acting on it. Replaying the journal into a fresh `OrderBook` (`JournalReplay`)
+reproduces the book and the trades of the run exactly, with no trader logic. It
+can stop at any tick to inspect the book, e.g. just before an odd price move, and
+it times the matching engine on its own.
+
+The file is a 32-byte header (magic, format version, seed, tick size) followed by
+32-byte little-endian records `(kind, side, order type, trader, id, price, quantity)`.
+Trader ids are interned: before the first record that uses one, a TRADER record
+gives its number and name length, and the UTF-8 name fills the record slots that
+follow it. Records are packed into an in-memory buffer, written out when it fills
+up and at every tick boundary, so the file is complete up to the last tick started.
+
+Examples:
+    python -m simulation.journal runs/session.journal
+    python -m simulation.journal runs/session.journal --until 1500
+"""
+import argparse
+import json
+import mmap
+import struct
+import time
+
+from simulation.order import Order
+from simulation.order_book import OrderBook
+from simulation.pricing import DEFAULT_TICK_SIZE, TickGrid
+from simulation.trade_tape import TradeTape
+
+MAGIC = b'OBJL'
+VERSION = 1
+HEADER = struct.Struct('<4sHHqd8x')  # magic, version, has seed, seed, tick size
+RECORD = struct.Struct('<BBBxiqqq')  # kind, side, order type, trader, id, price, quantity
+BUFFER_RECORDS = 65536
+
+# Record kinds
+TICK = 1  # id: the tick
+ORDER = 2  # An order given to `add_order`
+CANCEL = 3  # id: the cancelled order
+MODIFY = 4  # id: the amended order; price and quantity: the new values, or NO_VALUE
+AUCTION = 5  # id: reference price; side: pro rata; quantity: number of ORDER records that follow
+TRADER = 6  # trader: its number; quantity: length of the name that follows
+# The book was replaced by a reset or a checkpoint restore; side: has seed; id: the seed the run
+# continues from. The new book's resting orders follow as ORDERs.
+RESET = 7
+
+NO_VALUE = -2 ** 63  # A market order's price, or an amendment that leaves the value unchanged
+NO_TRADER = -1
+
+
+class OrderJournal:
+    """Writes the order flow of one order book to a journal file."""
+
+    def __init__(self, path, seed=None, tick_size=DEFAULT_TICK_SIZE, buffer_records=BUFFER_RECORDS,
+                 overwrite=False):
+        """
+        Args:
+            path (str): File to write.
+            seed (int): Seed of the simulation, recorded for reference.
+            tick_size (float): Price increment the book's integer prices are in.
+            buffer_records (int): Records held in memory between writes.
+            overwrite (bool): Replace the file if it already exists.
+
+        Raises:
+            FileExistsError: If the file exists and `overwrite` is not set.
+        """
+        self.path = path
+        self._file = open(path, 'wb' if overwrite else 'xb')
+        self._file.write(HEADER.pack(MAGIC, VERSION, seed is not None, seed or 0, tick_size))
+        self._buffer = bytearray(RECORD.size * buffer_records)
+        self._capacity = buffer_records
+        self._count = 0  # Records in the buffer
+        self._trader_numbers = {}  # trader id -> interned number
+
+    def _record(self, kind, side=0, order_type=0, trader=NO_TRADER, value=0, price=NO_VALUE, quantity=0):
+        if self._count == self._capacity:
+            self._write()
+        RECORD.pack_into(self._buffer, self._count * RECORD.size, kind, side, order_type, trader, value, price,
+                         quantity)
+        self._count += 1
+
+    def _trader(self, trader_id):
+        """Return the number of a trader id, recording the id on first use."""
+        number = self._trader_numbers.get(trader_id)
+        if number is None:
+            if trader_id is None:
+                return NO_TRADER
+            number = self._trader_numbers[trader_id] = len(self._trader_numbers)
+            name = str(trader_id).encode()
+            self._record(TRADER, trader=number, quantity=len(name))
+            for start in range(0, len(name), RECORD.size):
+                if self._count == self._capacity:
+                    self._write()
+                offset = self._count * RECORD.size
+                self._buffer[offset:offset + RECORD.size] = name[start:start + RECORD.size].ljust(RECORD.size, b'\0')
+                self._count += 1
+        return number
+
+    def record_tick(self, tick):
+        # Everything up to the new tick reaches the file
+        self.flush()
+        self._record(TICK, value=tick)
+
+    def record_order(self, order):
+        trader = self._trader(order.trader_id)
+        self._record(ORDER, order.side == 'sell', order.type == 'market', trader, order.id,
+                     NO_VALUE if order.price is None else order.price, order.quantity)
+
+    def record_cancel(self, order_id):
+        self._record(CANCEL, value=order_id)
+
+    def record_modify(self, order_id, quantity=None, price=None):
+        self._record(MODIFY, value=order_id, price=NO_VALUE if price is None else price,
+                     quantity=NO_VALUE if quantity is None else quantity)
+
+    def record_auction(self, orders, reference, pro_rata):
+        for order in orders:
+            self._trader(order.trader_id)
+        self._record(AUCTION, side=pro_rata, value=reference, quantity=len(orders))
+        for order in orders:
+            self.record_order(order)
+
+    def record_reset(self, order_book, seed=None):
+        """
+        Record that the book was replaced by `order_book`, with its resting orders in priority order.
+
+        Args:
+            order_book (OrderBook): The new book.
+            seed (int): Seed of the simulation from here on, recorded for reference.
+        """
+        orders = list(order_book.bid_ladder.orders()) + list(order_book.ask_ladder.orders())
+        for order in orders:
+            self._trader(order.trader_id)
+        self._record(RESET, side=seed is not None, value=seed or 0)
+        for order in orders:
+            self.record_order(order)
+
+    def _write(self):
+        self._file.write(memoryview(self._buffer)[:self._count * RECORD.size])
+        self._count = 0
+
+    def flush(self):
+        """Write the buffered records to the file."""
+        if self._count:
+            self._write()
+            self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+class JournalReplay:
+    """
+    Feeds a journal into a fresh `OrderBook` as fast as possible.
+
+    `run(until)` replays up to the end of a tick and can be called again to carry
+    on; in between, `book` is the order book as it was at that point of the run.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Journal file written by `OrderJournal`.
+
+        Raises:
+            ValueError: If the file is not a journal.
+        """
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise ValueError(f"Not an order journal: {path}")
+            magic, version, has_seed, seed, tick_size = HEADER.unpack(header)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"Not an order journal (version {VERSION}): {path}")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.seed = seed if has_seed else None  # Seed of the run at the replayed point; RESET records may change it
+        self.tick_grid = TickGrid(tick_size)
+        self.book = OrderBook(TradeTape(), self.tick_grid)
+        self.tick = None  # Last tick started
+        self.trader_ids = []  # interned number -> trader id
+        self.counts = {'orders': 0, 'cancels': 0, 'modifies': 0, 'auctions': 0, 'trades': 0}
+        self._position = HEADER.size
+        # A record cut short by an interrupted write is ignored
+        self._end = HEADER.size + (len(self._map) - HEADER.size) // RECORD.size * RECORD.size
+
+    def _order(self, record):
+        _, side, is_market, trader, order_id, price, quantity = record
+        return Order(order_id, 'market' if is_market else 'limit', 'sell' if side else 'buy', quantity,
+                     None if is_market else price, self.trader_ids[trader] if trader != NO_TRADER else None)
+
+    def run(self, until=None):
+        """
+        Replay the journal until tick `until` is complete, or to its end.
+
+        Args:
+            until (int): Last tick to replay. None replays everything.
+
+        Returns:
+            bool: True if the end of the journal was reached.
+        """
+        counts = self.counts
+        book = self.book
+        trades = 0
+        with memoryview(self._map)[self._position:self._end] as view:
+            records = RECORD.iter_unpack(view)
+            position = self._position
+            for record in records:
+                kind = record[0]
+                if kind == ORDER:
+                    trades += len(book.add_order(self._order(record)))
+                    counts['orders'] += 1
+                elif kind == CANCEL:
+                    book.cancel_order(record[4])
+                    counts['cancels'] += 1
+                elif kind == TICK:
+                    if until is not None and record[4] > until:
+                        break
+                    self.tick = record[4]
+                    book.set_tick(self.tick)
+                elif kind == TRADER:
+                    length = record[6]
+                    start = position + RECORD.size
+                    self.trader_ids.append(self._map[start:start + length].decode())
+                    slots = -(-length // RECORD.size)
+                    for _ in range(slots):
+                        next(records)
+                    position += slots * RECORD.size
+                elif kind == MODIFY:
+                    _, _, _, _, order_id, price, quantity = record
+                    result = book.modify_order(order_id, None if quantity == NO_VALUE else quantity,
+                                               None if price == NO_VALUE else price)
+                    trades += len(result or ())
+                    counts['modifies'] += 1
+                elif kind == AUCTION:
+                    orders = [self._order(next(records)) for _ in range(record[6])]
+                    position += len(orders) * RECORD.size
+                    trades += len(book.call_auction(orders, record[4], bool(record[1])))
+                    counts['orders'] += len(orders)
+                    counts['auctions'] += 1
+                elif kind == RESET:
+                    if record[1]:
+                        self.seed = record[4]
+                    book = self.book = OrderBook(book.tape, self.tick_grid)
+                    book.set_tick(self.tick or 0)
+                position += RECORD.size
+            del records
+        self._position = position
+        counts['trades'] += trades
+        return position == self._end
+
+    def close(self):
+        self.book.tape.close()
+        self._map.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay an order-flow journal at maximum speed.")
+    parser.add_argument('journal', help="Journal file written with SimulationConfig.journal_path.")
+    parser.add_argument('--until', type=int, default=None, help="Stop once this tick has been replayed.")
+    args = parser.parse_args(argv)
+
+    replay = JournalReplay(args.journal)
+    started = time.perf_counter()
+    finished = replay.run(args.until)
+    elapsed = time.perf_counter() - started
+
+    book = replay.book
+    tape = book.tape
+    events = replay.counts['orders'] + replay.counts['cancels'] + replay.counts['modifies']
+    summary = {
+        'seed': replay.seed,
+        'tick': replay.tick,
+        'finished': finished,
+        **replay.counts,
+        'elapsed_seconds': elapsed,
+        'events_per_second': events / elapsed if elapsed > 0 else None,
+        'last_price': float(tape.column('price', len(tape) - 1)[0]) if len(tape) else None,
+        'best_bid': book.get_best_bid(),
+        'best_ask': book.get_best_ask(),
+        'resting_orders': len(book.orders),
+    }
+    replay.close()
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
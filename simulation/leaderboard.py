@@ -0,0 +1,156 @@
+"""
+Rankings of the whole trader population.
+
+`Leaderboard` keeps the trader rows sorted by the value of each ranking metric,
+for all traders together and for each trader type. A query for a page of the top
+or bottom traders, optionally restricted to a range of metric values, is two
+binary searches and a slice of the sorted rows.
+
+Traded volume only changes for the traders in each step's trades, so the volume
+indexes are updated as trades settle (`update_volume`): those rows are taken out
+and merged back in at their new positions, leaving the rest of the order as is.
+PnL and drawdown move for every trader with the price, so their indexes are not
+maintained incrementally. They are re-sorted when queried, at most once per
+simulation state version: the first PnL or drawdown query of a group after a step
+costs an O(n log n) sort of the group, and only later queries at the same version
+are answered from the sorted rows alone. A client polling those rankings every
+tick therefore pays a full sort per tick, where the volume rankings cost nothing
+between trades.
+"""
+import numpy as np
+
+METRICS = ('pnl', 'volume', 'drawdown')
+
+
+class SortedIndex:
+    """The rows of one group of traders, in ascending order of one metric."""
+
+    def __init__(self, members, values):
+        """
+        Args:
+            members (np.ndarray): Trader rows of the group.
+            values (np.ndarray): Metric value of every trader row.
+        """
+        self.members = members
+        self.rebuild(values)
+
+    def rebuild(self, values):
+        self.rows = self.members[np.argsort(values[self.members])]
+        self.keys = values[self.rows]
+
+    def update(self, changed, values, scratch):
+        """
+        Move rows whose value changed to their new positions.
+
+        Args:
+            changed (np.ndarray): Changed rows, all members of the group, without duplicates.
+            values (np.ndarray): Metric value of every trader row.
+            scratch (np.ndarray): All-False boolean array with an entry per trader row,
+                used to mark the changed rows and left all False.
+        """
+        scratch[changed] = True
+        unchanged = ~scratch[self.rows]
+        scratch[changed] = False
+        rows, keys = self.rows[unchanged], self.keys[unchanged]
+
+        order = np.argsort(values[changed])
+        changed_rows = changed[order]
+        changed_keys = values[changed_rows]
+        positions = np.searchsorted(keys, changed_keys, 'right')
+        self.rows = np.insert(rows, positions, changed_rows)
+        self.keys = np.insert(keys, positions, changed_keys)
+
+    def between(self, minimum=None, maximum=None):
+        """Return the `(start, stop)` positions of the rows with values in `[minimum, maximum]`."""
+        start = 0 if minimum is None else int(np.searchsorted(self.keys, minimum, 'left'))
+        stop = len(self.keys) if maximum is None else int(np.searchsorted(self.keys, maximum, 'right'))
+        return start, max(start, stop)
+
+
+class Leaderboard:
+    """Sorted indexes of every ranking metric, for all traders and per trader type."""
+
+    def __init__(self, groups, initial_equity, volume):
+        """
+        Args:
+            groups (dict): Trader type -> array of the trader rows of that type.
+            initial_equity (np.ndarray): Starting portfolio value of each trader row, the PnL baseline.
+            volume (np.ndarray): Traded volume of each trader row.
+        """
+        size = len(initial_equity)
+        self.initial_equity = initial_equity
+        self.groups = {'all': np.arange(size)}
+        self.groups.update(groups)
+        self.types = list(groups)
+        self.row_types = np.empty(size, dtype=np.int64)  # trader row -> position of its type in `types`
+        for code, rows in enumerate(groups.values()):
+            self.row_types[rows] = code
+        self._scratch = np.zeros(size, dtype=bool)
+
+        self.indexes = {}  # (metric, group) -> SortedIndex
+        self.versions = {}  # (metric, group) -> state version the index was sorted at
+        for group, members in self.groups.items():
+            self.indexes['volume', group] = SortedIndex(members, volume)
+
+    def update_volume(self, traded, volume):
+        """
+        Re-rank the traders whose volume changed.
+
+        Args:
+            traded (np.ndarray): Rows of the traders in the settled trades, without duplicates.
+            volume (np.ndarray): Traded volume of every trader row.
+        """
+        if not traded.size:
+            return
+        self.indexes['volume', 'all'].update(traded, volume, self._scratch)
+        codes = self.row_types[traded]
+        for code, group in enumerate(self.types):
+            changed = traded[codes == code]
+            if changed.size:
+                self.indexes['volume', group].update(changed, volume, self._scratch)
+
+    def query(self, metric, values, version, group='all', minimum=None, maximum=None, descending=True,
+              offset=0, limit=50):
+        """
+        Return a page of trader rows ranked by a metric.
+
+        Args:
+            metric (str): One of `METRICS`.
+            values (callable): Returns the metric value of every trader row. Called only
+                when a PnL or drawdown index has to be re-sorted, which is a full sort of
+                the group.
+            version: Current simulation state version.
+            group (str): 'all' or a trader type.
+            minimum (float): Only rank traders with a value of at least this.
+            maximum (float): Only rank traders with a value of at most this.
+            descending (bool): Highest values first, else lowest first.
+            offset (int): Number of ranked traders to skip.
+            limit (int): Maximum number of rows to return.
+
+        Returns:
+            tuple: `(rows, total)`, the page of trader rows and the number of traders
+            within the value range.
+
+        Raises:
+            ValueError: If the metric or group is unknown.
+        """
+        if metric not in METRICS:
+            raise ValueError(f"metric must be one of {', '.join(METRICS)}, got {metric!r}")
+        if group not in self.groups:
+            raise ValueError(f"Unknown trader type {group!r}; expected one of {', '.join(self.groups)}")
+
+        key = (metric, group)
+        if metric != 'volume' and self.versions.get(key) != version:
+            if key in self.indexes:
+                self.indexes[key].rebuild(values())
+            else:
+                self.indexes[key] = SortedIndex(self.groups[group], values())
+            self.versions[key] = version
+
+        index = self.indexes[key]
+        start, stop = index.between(minimum, maximum)
+        if descending:
+            rows = index.rows[max(start, stop - offset - limit):max(start, stop - offset)][::-1]
+        else:
+            rows = index.rows[start + offset:min(stop, start + offset + limit)]
+        return rows, stop - start
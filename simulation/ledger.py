@@ -0,0 +1,100 @@
+import numpy as np
+
+
+class PortfolioLedger:
+    """
+    Cash, shares and traded volume of every trader, as arrays indexed by trader row.
+
+    Fills are not applied one trade at a time. Once per step, `settle` reads the
+    step's trades from the trade tape columns, nets them into one cash, share and
+    volume delta per trader and applies those in a single vectorized pass.
+
+    Settlement only moves cash and shares between traders, so their totals never
+    change; `check_conservation` verifies this (see `SimulationConfig.debug_checks`).
+    """
+
+    # Allowed drift of the total cash, relative to its size, from float rounding
+    CASH_TOLERANCE = 1e-9
+
+    def __init__(self, cash, shares, resolve_row):
+        """
+        Args:
+            cash (np.ndarray): Starting cash of each trader row.
+            shares (np.ndarray): Starting shares of each trader row.
+            resolve_row (callable): Maps a trader id to its row number, or -1 if unknown.
+        """
+        self.cash = np.asarray(cash, dtype=np.float64).copy()
+        self.shares = np.asarray(shares, dtype=np.int64).copy()
+        self.volume = np.zeros(len(self.cash), dtype=np.int64)
+        self.total_cash = float(self.cash.sum())
+        self.total_shares = int(self.shares.sum())
+
+        self.resolve_row = resolve_row
+        self._tape_rows = np.empty(0, dtype=np.int64)  # trade tape trader index -> ledger row
+        self._tape_position = 0
+
+    def __getstate__(self):
+        # The row resolver belongs to the simulation; it is re-attached when a checkpoint is restored
+        state = self.__dict__.copy()
+        state['resolve_row'] = None
+        return state
+
+    def tape_rows(self, trade_tape):
+        """
+        Return the ledger row of every trader index of the tape (-1 for unknown traders),
+        mapping the trader ids first seen on the tape since the last call.
+
+        Args:
+            trade_tape (TradeTape): Tape whose `buyer` and `seller` columns are to be mapped.
+
+        Returns:
+            np.ndarray: Trade tape trader index -> ledger row.
+        """
+        known = len(self._tape_rows)
+        if len(trade_tape.trader_ids) > known:
+            new_rows = [self.resolve_row(trader_id) for trader_id in trade_tape.trader_ids[known:]]
+            self._tape_rows = np.concatenate((self._tape_rows, np.array(new_rows, dtype=np.int64)))
+        return self._tape_rows
+
+    def settle(self, trade_tape):
+        """
+        Apply every trade appended to the tape since the last call.
+
+        Args:
+            trade_tape (TradeTape): Tape holding the trades executed so far.
+
+        Returns:
+            tuple: `(start, stop, buyer rows, seller rows)` of the settled tape rows.
+        """
+        start, stop = self._tape_position, len(trade_tape)
+        self._tape_position = stop
+        if stop == start:
+            empty = np.empty(0, dtype=np.int64)
+            return start, stop, empty, empty
+
+        tape_rows = self.tape_rows(trade_tape)
+        buyers = tape_rows[trade_tape.column('buyer', start, stop)]
+        sellers = tape_rows[trade_tape.column('seller', start, stop)]
+        quantity = trade_tape.column('quantity', start, stop).astype(np.int64)
+        notional = trade_tape.column('price', start, stop) * quantity
+
+        rows = np.concatenate((buyers, sellers))
+        known_rows = rows >= 0
+        touched, inverse = np.unique(rows[known_rows], return_inverse=True)
+        self.cash[touched] += np.bincount(inverse, np.concatenate((-notional, notional))[known_rows], len(touched))
+        self.shares[touched] += np.bincount(
+            inverse, np.concatenate((quantity, -quantity))[known_rows], len(touched)).astype(np.int64)
+        self.volume[touched] += np.bincount(
+            inverse, np.concatenate((quantity, quantity))[known_rows], len(touched)).astype(np.int64)
+        return start, stop, buyers, sellers
+
+    def check_conservation(self):
+        """
+        Raise AssertionError if settlement created or destroyed cash or shares.
+        """
+        total_cash = float(self.cash.sum())
+        if abs(total_cash - self.total_cash) > self.CASH_TOLERANCE * max(abs(self.total_cash), 1.0):
+            raise AssertionError(f"Total cash changed from {self.total_cash} to {total_cash}")
+        total_shares = int(self.shares.sum())
+        if total_shares != self.total_shares:
+            raise AssertionError(f"Total shares changed from {self.total_shares} to {total_shares}")
@@ -1,80 +1,389 @@
+import logging
+import math
 import random
+import threading
+import time
 from collections import deque
+from time import perf_counter
 
+import numpy as np
+
+from simulation.analytics import RiskAnalytics
 from simulation.event_scheduler import EventScheduler
+from simulation.journal import OrderJournal
+from simulation.leaderboard import Leaderboard
+from simulation.ledger import PortfolioLedger
+from simulation.market_stream import MarketStream
+from simulation.market_view import MarketIndicators, MarketView
+from simulation.metrics import SimulationMetrics
+from simulation import checkpoint, payloads
+from simulation.order import release_order, reserve_order_ids
 from simulation.order_book import OrderBook
+from simulation.pricing import DEFAULT_TICK_SIZE, TickGrid
+from simulation.sharding import ShardPool
+from simulation.trade_tape import TradeTape
 from simulation.traders.mean_reverting_trader import MeanRevertingTrader
+from simulation.traders.population import MeanRevertingTraderPopulation, RandomTraderPopulation, TraderPopulation
 from simulation.traders.random_trader import RandomTrader
+from simulation.traders.trader import Trader
 from simulation.traders.trend_following_trader import TrendFollowingTrader
 
+logger = logging.getLogger(__name__)
+
+MIN_TICK_RATE = 0.1  # Slowest and fastest target tick rates (ticks per second); None runs unthrottled
+MAX_TICK_RATE = 1000.0
 
 class MarketSimulation:
+    # Attributes saved in a checkpoint: everything needed to continue the run exactly
+    CHECKPOINT_STATE = (
+        'current_price', 'seed', 'rng', 'resolved_settings', 'scheduler', 'tick_grid', 'order_book',
+        'traders', 'trader_map', 'populations', 'population_map', 'tracked_trader_ids',
+        'price_history', 'volume_history', 'indicators', 'trader_rows', 'population_offsets', 'trader_count', 'ledger',
+        'analytics',
+    )
+
     def __init__(self, config=None, socketio=None):
         self.config = config
         self.socketio = socketio
+        # Held while stepping and while reading state to broadcast. It is never replaced, so a
+        # loop waiting on it across a `reset` still excludes everyone else.
+        self._lock = threading.Lock()
+        self.journal = None  # Opened once and kept across resets
+        self.shards = None  # Generation workers of the vectorized populations, if sharded
+        self._initialize_state()
+
+    def _initialize_state(self):
+        """Build a fresh market, trader population and run state from the config."""
+        config = self.config
         self.current_price = config.initial_price if config and config.initial_price else 50.00
+        self.seed = getattr(config, 'seed', None)
+        if self.seed is None:
+            # Draw the seed explicitly, so a run without one can still be reproduced from its journal
+            self.seed = random.SystemRandom().randrange(2 ** 32)
+        # Per-simulation RNG so runs are reproducible and independent of the module-global `random`
+        self.rng = random.Random(self.seed)
+        self.resolved_settings = {}  # Capital settings drawn from their configured ranges
         self.scheduler = EventScheduler()
-        self.order_book = OrderBook()
+        self.tick_grid = TickGrid(getattr(config, 'tick_size', DEFAULT_TICK_SIZE))
+        self.order_book = OrderBook(TradeTape(
+            getattr(config, 'trade_tape_memory_rows', 1_000_000),
+            getattr(config, 'trade_tape_dir', None)
+        ), self.tick_grid, recycle_orders=getattr(config, 'recycle_orders', False))
+        if getattr(config, 'journal_path', None):
+            if self.journal is None:
+                self.journal = OrderJournal(config.journal_path, self.seed, self.tick_grid.tick_size,
+                                            overwrite=getattr(config, 'journal_overwrite', False))
+            else:
+                # A reset carries on in the same file; replays start a fresh book here
+                self.journal.record_reset(self.order_book, self.seed)
+            self.order_book.journal = self.journal
         self.traders = []
         self.trader_map = {}
+        self.populations = []  # Array-backed trader populations (vectorized mode)
+        self.population_map = {}  # id prefix -> population
         self.tracked_trader_ids = set()  # Holds IDs of traders to be monitored
         self.price_history = deque([self.current_price], maxlen=1000)
         self.volume_history = deque([0], maxlen=1000)
+        # Indicators over the same tick price series, shared by all traders through `MarketView`
+        self.indicators = MarketIndicators(self.current_price)
+        self.order_book_levels = getattr(config, 'order_book_levels', 10)
+        # 'continuous' matches each order on arrival; 'call_auction' clears each step's
+        # orders in one batch (see `_run_auction`)
+        self.matching = getattr(config, 'matching', 'continuous')
+        if self.matching not in ('continuous', 'call_auction'):
+            raise ValueError(f"matching must be 'continuous' or 'call_auction', got {self.matching!r}")
+        allocation = getattr(config, 'auction_allocation', 'pro_rata')
+        if allocation not in ('pro_rata', 'time'):
+            raise ValueError(f"auction_allocation must be 'pro_rata' or 'time', got {allocation!r}")
+        self.auction_pro_rata = allocation == 'pro_rata'
+        self._auction_orders = []  # Orders collected for the current step's auction
+        self._reserved_rows = set()  # Rows of object traders holding auction reservations until settlement
         self.running = False
+        # Bumped by every step; payloads encoded for one version are served until the next
+        self.version = 0
+        self._payload_cache = {}  # payload name -> (version, JSON bytes)
+
+        # Run loop state: the producer steps at `tick_rate` (None = as fast as possible) and
+        # the broadcaster publishes the latest state at `broadcast_rate`
+        self.set_tick_rate(getattr(config, 'tick_rate', 10.0))
+        self.broadcast_rate = getattr(config, 'broadcast_rate', 10.0)
+        self.achieved_tick_rate = 0.0
+        self._run_id = None  # Token of the current run; loops of an older run exit when it changes
+        self.run_error = None  # Why the last run stopped on its own, if a step failed
+        self._pending_trades = deque(maxlen=MarketStream.MAX_TRADES_PER_DELTA)
 
         self._initialize_traders()
         self._set_initial_portfolio_values()
+        self._index_trader_rows()
+        self.ledger = PortfolioLedger(*self._gather_portfolios(), self._trader_row)
+        self._attach_ledger()
+        self._start_shards()
+        self.leaderboard = self._build_leaderboard() if getattr(config, 'leaderboard', False) else None
+        # Verify after every step that settlement conserved total cash and shares (slow)
+        self.debug_checks = getattr(config, 'debug_checks', False)
+        self._schedule_arrivals()
+        self.analytics = None
+        if getattr(config, 'risk_analytics', False):
+            self.analytics = RiskAnalytics(self._gather_initial_equity())
+        self.market_stream = MarketStream(self)
+        # None when disabled: instrumented code then skips timing altogether
+        self.metrics = SimulationMetrics() if getattr(config, 'collect_metrics', False) else None
 
     def _set_initial_portfolio_values(self):
         for trader in self.traders:
             trader.initial_portfolio_value = trader.cash + (trader.shares * self.current_price)
+        for population in self.populations:
+            population.set_initial_portfolio_values(self.current_price)
+
+    def _resolve_setting(self, name):
+        """
+        Return a numeric config setting, drawing it from the simulation RNG if it is
+        configured as a (low, high) range. Each setting is drawn once per simulation.
+        """
+        if name not in self.resolved_settings:
+            value = getattr(self.config, name)
+            if isinstance(value, (tuple, list)):
+                value = self.rng.randint(*value)
+            self.resolved_settings[name] = value
+        return self.resolved_settings[name]
 
     def _initialize_traders(self):
         self.traders = []
         self.trader_map = {}
+        self.populations = []
+        self.population_map = {}
 
         if self.config:
-            if self.config.random_traders > 0:
-                for i in range(self.config.random_traders):
-                    trader_id = f"rt_{i}"
-                    trader = RandomTrader(
-                        trader_id,
-                        self.config.random_trader_cash,
-                        random.randint(0, self.config.random_trader_shares),
-                        fair_value=self.current_price
-                    )
-                    self.traders.append(trader)
-                    self.trader_map[trader_id] = trader
+            if getattr(self.config, 'vectorized_traders', False):
+                self._initialize_populations()
+            else:
+                if self.config.random_traders > 0:
+                    for i in range(self.config.random_traders):
+                        trader_id = f"rt_{i}"
+                        trader = RandomTrader(
+                            trader_id,
+                            self._resolve_setting('random_trader_cash'),
+                            self.rng.randint(0, self._resolve_setting('random_trader_shares')),
+                            fair_value=self.current_price,
+                            rng=self.rng,
+                            private_odds=self.config.fair_value_private_odds,
+                            alpha_range=self.config.fair_value_alpha_range,
+                            history_depth=self.config.trader_history_depth,
+                            tick_grid=self.tick_grid
+                        )
+                        self.traders.append(trader)
+                        self.trader_map[trader_id] = trader
 
-            if self.config.mean_reverting_traders > 0:
-                for i in range(self.config.mean_reverting_traders):
-                    trader_id = f"mrt_{i}"
-                    trader = MeanRevertingTrader(
-                        trader_id,
-                        self.config.mean_reverting_trader_cash,
-                        self.config.mean_reverting_trader_shares,
-                        target_price=self.current_price
-                    )
-                    self.traders.append(trader)
-                    self.trader_map[trader_id] = trader
+                if self.config.mean_reverting_traders > 0:
+                    for i in range(self.config.mean_reverting_traders):
+                        trader_id = f"mrt_{i}"
+                        trader = MeanRevertingTrader(
+                            trader_id,
+                            self._resolve_setting('mean_reverting_trader_cash'),
+                            self._resolve_setting('mean_reverting_trader_shares'),
+                            target_price=self.current_price,
+                            rng=self.rng,
+                            history_depth=self.config.trader_history_depth,
+                            tick_grid=self.tick_grid
+                        )
+                        self.traders.append(trader)
+                        self.trader_map[trader_id] = trader
 
             if hasattr(self.config, 'trend_following_traders') and self.config.trend_following_traders > 0:
                 for i in range(self.config.trend_following_traders):
                     trader_id = f"tft_{i}"
                     trader = TrendFollowingTrader(
                         trader_id,
-                        self.config.trend_following_trader_cash,
-                        random.randint(0, self.config.trend_following_trader_shares)
+                        self._resolve_setting('trend_following_trader_cash'),
+                        self.rng.randint(0, self._resolve_setting('trend_following_trader_shares')),
+                        rng=self.rng,
+                        history_depth=self.config.trader_history_depth,
+                        tick_grid=self.tick_grid
                     )
                     self.traders.append(trader)
                     self.trader_map[trader_id] = trader
         else:
             for i in range(100):
-                trader = RandomTrader(f"rt_{i}", 50000, random.randint(0, 1000), fair_value=self.current_price)
+                trader = RandomTrader(f"rt_{i}", 50000, self.rng.randint(0, 1000), fair_value=self.current_price,
+                                      rng=self.rng, tick_grid=self.tick_grid)
                 self.traders.append(trader)
                 self.trader_map[f"rt_{i}"] = trader
 
         self._determine_tracked_traders()
+        for trader_id in self.tracked_trader_ids:
+            population, index = self._find_population_member(trader_id)
+            if population:
+                population.track(index)
+
+    def _schedule_arrivals(self):
+        """Schedule the first action of every object trader."""
+        for trader in self.traders:
+            self.scheduler.schedule_arrival(trader.activity, self.rng, 'order', trader)
+
+    def _index_trader_rows(self):
+        """
+        Number every trader with a row for the array-based analytics: object traders
+        first, in `self.traders` order, then each population's members in turn.
+        """
+        self.trader_rows = {trader.id: row for row, trader in enumerate(self.traders)}
+        self.population_offsets = {}
+        offset = len(self.traders)
+        for population in self.populations:
+            self.population_offsets[population.prefix] = offset
+            offset += population.size
+        self.trader_count = offset
+
+    def _trader_row(self, trader_id):
+        """Return the row number of a trader id, or -1 if it is unknown."""
+        row = self.trader_rows.get(trader_id)
+        if row is not None:
+            return row
+        population, index = self._find_population_member(trader_id)
+        if population:
+            return self.population_offsets[population.prefix] + index
+        return -1
+
+    def _gather_portfolios(self):
+        """Return the cash and shares of every trader as arrays ordered by row."""
+        count = len(self.traders)
+        cash = [np.fromiter((trader.cash for trader in self.traders), dtype=np.float64, count=count)]
+        shares = [np.fromiter((trader.shares for trader in self.traders), dtype=np.int64, count=count)]
+        for population in self.populations:
+            cash.append(population.cash)
+            shares.append(population.shares)
+        return np.concatenate(cash), np.concatenate(shares)
+
+    def _start_shards(self):
+        """Hand the populations' order decisions to `generation_shards` worker processes, if set."""
+        shards = getattr(self.config, 'generation_shards', None)
+        if shards and shards > 1 and self.populations:
+            self.shards = ShardPool(self.populations, self.ledger, self.population_offsets, shards)
+            self._attach_ledger()
+
+    def _stop_shards(self):
+        if self.shards:
+            self.shards.close()
+            self.shards = None
+            self._attach_ledger()
+
+    def _attach_ledger(self):
+        """
+        Make the ledger the store of the population portfolios, whose arrays become
+        views of its rows, and index the trade histories of tracked traders by row.
+        Object traders keep plain attributes for their decisions, which the step keeps
+        current with its fills (`_apply_pending_fills`) and `_settle_step` sets from the
+        ledger.
+        """
+        ledger = self.ledger
+        ledger.resolve_row = self._trader_row
+        for population in self.populations:
+            offset = self.population_offsets[population.prefix]
+            rows = slice(offset, offset + population.size)
+            population.cash = ledger.cash[rows]
+            population.shares = ledger.shares[rows]
+            population.total_volume_traded = ledger.volume[rows]
+
+        self._tracked_histories = {}  # trader row -> trade history of a tracked trader
+        for trader_id in self.tracked_trader_ids:
+            trader = self.trader_map.get(trader_id)
+            if trader:
+                history = trader.trade_history
+            else:
+                population, index = self._find_population_member(trader_id)
+                if not population:
+                    continue
+                history = population.trade_history[index]
+            self._tracked_histories[self._trader_row(trader_id)] = history
+
+    def _trader_groups(self):
+        """Return the trader rows of each trader type."""
+        rows_by_type = {}
+        for row, trader in enumerate(self.traders):
+            rows_by_type.setdefault(trader.__class__.__name__, []).append(row)
+        groups = {type_name: [np.array(rows, dtype=np.int64)] for type_name, rows in rows_by_type.items()}
+        for population in self.populations:
+            offset = self.population_offsets[population.prefix]
+            groups.setdefault(population.trader_type, []).append(np.arange(offset, offset + population.size))
+        return {type_name: np.concatenate(parts) for type_name, parts in groups.items()}
+
+    def _trader_at(self, row):
+        """Return `(trader id, trader type)` of a trader row."""
+        if row < len(self.traders):
+            trader = self.traders[row]
+            return trader.id, trader.__class__.__name__
+        for population in self.populations:
+            index = row - self.population_offsets[population.prefix]
+            if 0 <= index < population.size:
+                return population.trader_id(index), population.trader_type
+        raise IndexError(f"No trader at row {row}")
+
+    def _build_leaderboard(self):
+        return Leaderboard(self._trader_groups(), self._gather_initial_equity(), self.ledger.volume)
+
+    def _gather_initial_equity(self):
+        initial_equity = [np.fromiter((trader.initial_portfolio_value for trader in self.traders),
+                                      dtype=np.float64, count=len(self.traders))]
+        for population in self.populations:
+            initial_equity.append(population.initial_portfolio_value)
+        return np.concatenate(initial_equity)
+
+    def _initialize_populations(self):
+        """
+        Build array-backed populations for the random and mean-reverting traders.
+        Each population decides the orders of all its members in one vectorized pass.
+        """
+        rng = np.random.default_rng(self.seed)
+
+        if self.config.random_traders > 0:
+            size = self.config.random_traders
+            self._add_population(RandomTraderPopulation(
+                size,
+                self._resolve_setting('random_trader_cash'),
+                rng.integers(0, self._resolve_setting('random_trader_shares') + 1, size),
+                fair_value=self.current_price,
+                rng=rng,
+                private_odds=self.config.fair_value_private_odds,
+                alpha_range=self.config.fair_value_alpha_range,
+                history_depth=self.config.trader_history_depth,
+                tick_grid=self.tick_grid
+            ))
+
+        if self.config.mean_reverting_traders > 0:
+            self._add_population(MeanRevertingTraderPopulation(
+                self.config.mean_reverting_traders,
+                self._resolve_setting('mean_reverting_trader_cash'),
+                self._resolve_setting('mean_reverting_trader_shares'),
+                target_price=self.current_price,
+                rng=rng,
+                history_depth=self.config.trader_history_depth,
+                tick_grid=self.tick_grid
+            ))
+
+    def _add_population(self, population):
+        self.populations.append(population)
+        self.population_map[population.prefix] = population
+
+    def _find_population_member(self, trader_id):
+        """Return `(population, index)` for a population member id, or `(None, None)`."""
+        head, _, _ = str(trader_id).rpartition('_')
+        population = self.population_map.get(head + '_')
+        if population is None:
+            return None, None
+        index = population.index_of(trader_id)
+        if index is None:
+            return None, None
+        return population, index
+
+    def _get_trader_ids_of_type(self, type_name, limit):
+        """Return the ids of the first `limit` traders of the given type."""
+        for population in self.populations:
+            if population.trader_type == type_name:
+                return [population.trader_id(i) for i in range(min(limit, population.size))]
+        trader_ids = [trader.id for trader in self.traders if trader.__class__.__name__ == type_name]
+        return trader_ids[:limit]
+
+    def _trader_exists(self, trader_id):
+        return trader_id in self.trader_map or self._find_population_member(trader_id)[0] is not None
 
     def _determine_tracked_traders(self):
         """
@@ -106,72 +415,254 @@ class MarketSimulation:
 
         global_count = getattr(self.config, 'all_traders_tracking', 0) or 0
 
-        # Group traders by their class name for efficient lookup
-        traders_by_type = {}
-        for trader in self.traders:
-            type_name = trader.__class__.__name__
-            if type_name not in traders_by_type:
-                traders_by_type[type_name] = []
-            traders_by_type[type_name].append(trader)
-
         for type_name, type_config in type_map.items():
-            if type_name not in traders_by_type:
-                continue
-
             specific_count = getattr(self.config, type_config['count_key'], 0) or 0
             total_count = global_count + specific_count
 
             if total_count > 0:
                 # Priority 1: Track by count (global + specific). This overrides name-based tracking.
-                traders_of_this_type = traders_by_type[type_name]
-                for i in range(min(total_count, len(traders_of_this_type))):
-                    self.tracked_trader_ids.add(traders_of_this_type[i].id)
+                self.tracked_trader_ids.update(self._get_trader_ids_of_type(type_name, total_count))
             else:
                 # Priority 2: Track by specific IDs if count is not used for this type.
                 if hasattr(self.config, 'tracked_trader_ids_by_name'):
                     prefix = type_config['prefix']
                     for trader_id in self.config.tracked_trader_ids_by_name:
-                        if str(trader_id).startswith(prefix) and trader_id in self.trader_map:
+                        if str(trader_id).startswith(prefix) and self._trader_exists(trader_id):
                             self.tracked_trader_ids.add(trader_id)
 
     def step(self):
         total_volume = 0
         trades_this_step = []
+        metrics = self.metrics
+        if metrics:
+            step_started = perf_counter()
 
-        best_bid = self.order_book.get_best_bid()
-        best_ask = self.order_book.get_best_ask()
+        self.order_book.set_tick(self.scheduler.current_time)
+        # Every trader acting this tick sees the same view of the book and indicators
+        market = MarketView(self.current_price, self.order_book, self.indicators)
+        submit = self._submit_order if self.matching == 'continuous' else self._queue_order
 
-        for trader in self.traders:
-            order = trader.generate_order(self.current_price, best_bid, best_ask)
-            if order:
-                trades = self.order_book.add_order(order)
+        # Vectorized populations decide all of their members' orders at once, against the
+        # price at the start of the step, in worker processes if they are sharded
+        decisions = None
+        if self.shards:
+            if metrics:
+                started = perf_counter()
+            decisions = self.shards.decide(self.current_price, market.mid)
+            if metrics:
+                metrics.add('generate.shards', perf_counter() - started)
+        for index, population in enumerate(self.populations):
+            if metrics:
+                started = perf_counter()
+            if decisions is None:
+                orders = population.generate_orders(self.current_price, market)
+            else:
+                orders = population.build_orders(*decisions[index]) if decisions[index] is not None else []
+            if metrics:
+                metrics.add(f'generate.{population.trader_type}', perf_counter() - started)
+            for order in orders:
+                trades = submit(order, population)
                 for trade in trades:
-                    self.current_price = trade['price']
-                    total_volume += trade['quantity']
+                    total_volume += trade.quantity
                     trades_this_step.append(trade)
 
-                    buyer = self.trader_map.get(trade['buyer_id'])
-                    seller = self.trader_map.get(trade['seller_id'])
-
-                    if buyer:
-                        buyer.cash -= trade['price'] * trade['quantity']
-                        buyer.shares += trade['quantity']
-                        buyer.trade_history.append(trade)
-                        buyer.total_volume_traded += trade['quantity']
+        # Object traders act only when their next Poisson arrival falls within this tick,
+        # in arrival order. Each arrival schedules the trader's next one, which may fall
+        # within the same tick.
+        scheduler = self.scheduler
+        while (event := scheduler.pop_next_event()) is not None:
+            time, _, trader = event
+            scheduler.schedule_arrival(trader.activity, self.rng, 'order', trader, after=time)
+            if metrics:
+                started = perf_counter()
+            order = trader.generate_order(self.current_price, market)
+            if metrics:
+                metrics.add(f'generate.{trader.__class__.__name__}', perf_counter() - started)
+            if order:
+                trades = submit(order, trader)
+                for trade in trades:
+                    total_volume += trade.quantity
+                    trades_this_step.append(trade)
 
-                    if seller:
-                        seller.cash += trade['price'] * trade['quantity']
-                        seller.shares -= trade['quantity']
-                        seller.trade_history.append(trade)
-                        seller.total_volume_traded += trade['quantity']
+        if self._auction_orders:
+            for trade in self._run_auction():
+                total_volume += trade.quantity
+                trades_this_step.append(trade)
 
+        self._settle_step()
         self.price_history.append(self.current_price)
         self.volume_history.append(total_volume)
+        self.indicators.push(self.current_price)
+        if self.analytics:
+            if metrics:
+                started = perf_counter()
+            self.analytics.update(self.ledger, self.current_price, self.order_book.tape)
+            if metrics:
+                metrics.add('analytics', perf_counter() - started)
         self.scheduler.advance()
+        self.version += 1
+        if self.debug_checks:
+            self.ledger.check_conservation()
+        if metrics:
+            metrics.end_step(step_started, trades_this_step)
 
         return trades_this_step
 
-    def get_market_data(self):
+    def _submit_order(self, order, owner):
+        """
+        Send an order to the book on behalf of a trader or population and settle its fills.
+
+        Args:
+            order (Order): The new order.
+            owner: The `Trader` or `TraderPopulation` that generated the order.
+
+        Returns:
+            list: Trades executed by the order.
+        """
+        metrics = self.metrics
+        if metrics:
+            started = perf_counter()
+            metrics.counters['orders'] += 1
+        self._cancel_stale_orders(order, owner)
+
+        if metrics:
+            matched = perf_counter()
+            metrics.add('cancel', matched - started)
+        trades = self.order_book.add_order(order)
+        if metrics:
+            metrics.add('match', perf_counter() - matched)
+        if trades:
+            self.current_price = trades[-1].price
+            if self.traders:
+                self._apply_pending_fills(trades)
+
+        # An order that did not come to rest (filled, or a market order's remainder) is done
+        if self.order_book.recycle_orders and self.order_book.orders.get(order.id) is not order:
+            release_order(order)
+        return trades
+
+    def _apply_pending_fills(self, trades):
+        """
+        Apply fills to the object traders involved right away, so that their later
+        decisions in the step do not commit the same cash or shares again. Settlement
+        then sets their balances from the ledger.
+        """
+        trader_map = self.trader_map
+        for trade in trades:
+            notional = trade.price * trade.quantity
+            buyer = trader_map.get(trade.buyer_id)
+            if buyer is not None:
+                buyer.cash -= notional
+                buyer.shares += trade.quantity
+            seller = trader_map.get(trade.seller_id)
+            if seller is not None:
+                seller.cash += notional
+                seller.shares -= trade.quantity
+
+    def _queue_order(self, order, owner):
+        """
+        Collect an order for this step's call auction. Stale quotes are cancelled right away.
+
+        An object trader's order reserves the cash (at its limit price, or the last price
+        for a market order) or shares it may take until settlement, so that the trader's
+        later decisions in the step only commit what is left.
+        """
+        metrics = self.metrics
+        if metrics:
+            started = perf_counter()
+            metrics.counters['orders'] += 1
+        self._cancel_stale_orders(order, owner)
+        if metrics:
+            metrics.add('cancel', perf_counter() - started)
+        self._auction_orders.append(order)
+        if isinstance(owner, Trader):
+            if order.side == 'buy':
+                price = self.current_price if order.price is None else self.tick_grid.to_price(order.price)
+                owner.cash -= price * order.quantity
+            else:
+                owner.shares -= order.quantity
+            self._reserved_rows.add(self.trader_rows[owner.id])
+        return ()
+
+    def _run_auction(self):
+        """
+        Clear the orders collected during the step, together with the resting book, in
+        one call auction at the price that maximizes executed volume (see
+        `OrderBook.call_auction`).
+
+        Returns:
+            list: Trades executed by the auction.
+        """
+        orders, self._auction_orders = self._auction_orders, []
+        metrics = self.metrics
+        if metrics:
+            started = perf_counter()
+        trades = self.order_book.call_auction(orders, self.tick_grid.to_ticks(self.current_price),
+                                              self.auction_pro_rata)
+        if metrics:
+            metrics.add('match', perf_counter() - started)
+        if trades:
+            self.current_price = trades[-1].price
+
+        if self.order_book.recycle_orders:
+            resting = self.order_book.orders
+            for order in orders:
+                if resting.get(order.id) is not order:
+                    release_order(order)
+        return trades
+
+    def _cancel_stale_orders(self, order, owner):
+        """Let the owner of a new order pull its resting quotes, if `cancel_stale_orders` is on."""
+        if getattr(self.config, 'cancel_stale_orders', False):
+            open_orders = self.order_book.get_trader_orders(order.trader_id)
+            if open_orders:
+                for order_id in owner.get_orders_to_cancel(open_orders):
+                    cancelled = self.order_book.cancel_order(order_id)
+                    if cancelled and self.order_book.recycle_orders:
+                        release_order(cancelled)
+
+    def _settle_step(self):
+        """
+        Settle the step's trades in one netted pass over the ledger (see
+        `PortfolioLedger.settle`), then update the object traders that traded or hold
+        auction reservations, and the trade histories of tracked traders.
+        """
+        metrics = self.metrics
+        if metrics:
+            started = perf_counter()
+        ledger = self.ledger
+        start, stop, buyers, sellers = ledger.settle(self.order_book.tape)
+        # Release auction reservations, traded or not
+        for row in self._reserved_rows:
+            trader = self.traders[row]
+            trader.cash = float(ledger.cash[row])
+            trader.shares = int(ledger.shares[row])
+        self._reserved_rows.clear()
+        if stop == start:
+            return
+
+        rows = np.concatenate((buyers, sellers))
+        traded = np.unique(rows[rows >= 0])
+        for row in traded[:np.searchsorted(traded, len(self.traders))].tolist():
+            trader = self.traders[row]
+            trader.cash = float(ledger.cash[row])
+            trader.shares = int(ledger.shares[row])
+            trader.total_volume_traded = int(ledger.volume[row])
+
+        # Trade ids are tape rows; append them to tracked histories in execution order
+        if self._tracked_histories:
+            offsets = np.tile(np.arange(stop - start), 2)
+            hits = np.isin(rows, np.fromiter(self._tracked_histories, dtype=np.int64))
+            order = np.argsort(offsets[hits], kind='stable')
+            for row, offset in zip(rows[hits][order].tolist(), offsets[hits][order].tolist()):
+                self._tracked_histories[row].append(start + offset)
+        if self.leaderboard:
+            self.leaderboard.update_volume(traded, ledger.volume)
+        if metrics:
+            metrics.add('settle', perf_counter() - started)
+
+    def get_market_summary(self):
+        """Return the headline market figures, without histories or the order book."""
         change = 0
         change_percent = 0
         if len(self.price_history) > 1:
@@ -186,50 +677,470 @@ class MarketSimulation:
             'best_bid': self.order_book.get_best_bid(),
             'best_ask': self.order_book.get_best_ask(),
             'spread': self.order_book.get_spread(),
-            'price_history': list(self.price_history),
-            'order_book': self.order_book.get_order_book_data(),
-            'recent_trades': list(self.order_book.trades)[-10:]
         }
 
+    def get_market_data(self):
+        data = self.get_market_summary()
+        data['price_history'] = list(self.price_history)
+        data['order_book'] = self.order_book.get_order_book_data(self.order_book_levels)
+        data['recent_trades'] = self.order_book.get_recent_trades(10)
+        return data
+
+    def cached_payload(self, name, build, version=None):
+        """
+        Return a payload as JSON bytes, encoding it only once per state version.
+
+        Args:
+            name (str): Cache key of the payload.
+            build (callable): Returns the payload when it is not cached.
+            version: Version the cached payload must match. Defaults to `self.version`.
+
+        Returns:
+            bytes: The encoded payload.
+        """
+        if version is None:
+            version = self.version
+        cached = self._payload_cache.get(name)
+        if cached is None or cached[0] != version:
+            cached = self._payload_cache[name] = (version, payloads.encode(build()))
+        return cached[1]
+
+    def get_market_data_json(self):
+        return self.cached_payload('market_data', self.get_market_data)
+
+    def get_all_traders_data_json(self):
+        return self.cached_payload('traders_data', self.get_all_traders_data)
+
     def get_all_traders_data(self):
         trader_data = []
-        all_open_orders = self.order_book.bids + self.order_book.asks
         # Iterate over the pre-determined set of tracked trader IDs for efficiency
         for trader_id in sorted(list(self.tracked_trader_ids)):
-            trader = self.trader_map.get(trader_id)
-            if not trader:
-                continue
-
             trader_open_orders = [
-                {'type': o.side, 'price': o.price, 'quantity': o.quantity}
-                for o in all_open_orders if o.trader_id == trader.id
+                {'type': o.side, 'price': self.tick_grid.to_price(o.price), 'quantity': o.quantity}
+                for o in self.order_book.get_trader_orders(trader_id)
             ]
-            trader_data.append(trader.to_dict(self.current_price, trader_open_orders))
+
+            trader = self.trader_map.get(trader_id)
+            if trader:
+                data = trader.to_dict(self.current_price, trader_open_orders, self.order_book.tape)
+            else:
+                population, index = self._find_population_member(trader_id)
+                if not population:
+                    continue
+                data = population.to_dict(index, self.current_price, trader_open_orders, self.order_book.tape)
+
+            if self.analytics:
+                data.update(self.analytics.trader_metrics(self._trader_row(trader_id)))
+            trader_data.append(data)
         return trader_data
 
+    def get_population_summary(self):
+        """
+        Return the distribution of PnL and risk metrics across the whole population,
+        overall and per trader type. Empty if risk analytics are disabled.
+        """
+        if not self.analytics:
+            return {}
+
+        groups = {'all': slice(None)}
+        groups.update(self._trader_groups())
+        return {
+            'tick': self.scheduler.current_time,
+            'current_price': self.current_price,
+            'groups': self.analytics.summary(groups),
+        }
+
+    def query_traders(self, metric='pnl', trader_type='all', minimum=None, maximum=None, order='desc',
+                      offset=0, limit=50):
+        """
+        Rank the whole population by a metric and return one page of it (see `Leaderboard`).
+
+        Args:
+            metric (str): 'pnl', 'volume' or 'drawdown' (maximum drawdown, needs risk analytics).
+            trader_type (str): 'all' or a trader type, e.g. 'RandomTrader'.
+            minimum (float): Only include traders with a metric value of at least this.
+            maximum (float): Only include traders with a metric value of at most this.
+            order (str): 'desc' for the highest values first, 'asc' for the lowest.
+            offset (int): Number of ranked traders to skip.
+            limit (int): Maximum number of traders to return.
+
+        Returns:
+            dict: The query, `total` (traders within the value range) and `traders`, a
+            list of `{'trader_id', 'trader_type', 'pnl', 'volume', 'cash', 'shares'}`
+            dicts, with `max_drawdown` when risk analytics are enabled.
+
+        Raises:
+            ValueError: If the leaderboard is disabled or the query is invalid.
+        """
+        if not self.leaderboard:
+            raise ValueError("The leaderboard is disabled for this simulation")
+        if order not in ('desc', 'asc'):
+            raise ValueError(f"order must be 'desc' or 'asc', got {order!r}")
+        if metric == 'drawdown' and not self.analytics:
+            raise ValueError("Ranking by drawdown needs risk analytics")
+
+        ledger = self.ledger
+        initial_equity = self.leaderboard.initial_equity
+
+        def pnl():
+            return ledger.cash + ledger.shares * self.current_price - initial_equity
+
+        values = {'pnl': pnl, 'volume': lambda: ledger.volume,
+                  'drawdown': lambda: self.analytics.max_drawdown}.get(metric)
+        rows, total = self.leaderboard.query(metric, values, self.version, trader_type, minimum, maximum,
+                                             order == 'desc', offset, limit)
+
+        traders = []
+        for row in rows.tolist():
+            trader_id, type_name = self._trader_at(row)
+            cash = float(ledger.cash[row])
+            shares = int(ledger.shares[row])
+            data = {
+                'trader_id': trader_id,
+                'trader_type': type_name,
+                'pnl': cash + shares * self.current_price - float(initial_equity[row]),
+                'volume': int(ledger.volume[row]),
+                'cash': cash,
+                'shares': shares,
+            }
+            if self.analytics:
+                data['max_drawdown'] = float(self.analytics.max_drawdown[row])
+            traders.append(data)
+
+        return {
+            'metric': metric,
+            'trader_type': trader_type,
+            'order': order,
+            'offset': offset,
+            'total': total,
+            'traders': traders,
+        }
+
+    def get_trader_snapshot(self):
+        """
+        Return the cash and share holdings of every trader as columns.
+
+        Returns:
+            dict: `trader_id`, `cash` and `shares` arrays, population members included.
+        """
+        trader_ids = [trader.id for trader in self.traders]
+        for population in self.populations:
+            trader_ids.extend(population.trader_id(i) for i in range(population.size))
+        return {
+            'trader_id': np.array(trader_ids),
+            'cash': self.ledger.cash.copy(),
+            'shares': self.ledger.shares.copy(),
+        }
+
     def start(self):
         if not self.running and self.socketio:
             self.running = True
-            self.socketio.start_background_task(target=self._run_simulation)
+            self.run_error = None
+            self._run_id = object()
+            self.socketio.start_background_task(self._run_simulation, self._run_id)
+            self.socketio.start_background_task(self._run_broadcaster, self._run_id)
 
     def stop(self):
         self.running = False
 
     def reset(self):
         self.stop()
-        self.__init__(self.config, self.socketio)
+        tick_rate = self.tick_rate
+        # Wait for a step in progress to finish before replacing the state under it
+        with self._lock:
+            self.order_book.tape.close()
+            self._stop_shards()
+            self._initialize_state()
+        self.tick_rate = tick_rate
 
-    def _run_simulation(self):
-        while self.running:
-            trades = self.step()
-            market_data = self.get_market_data()
-            trader_updates = self.get_all_traders_data()
+    def close(self):
+        """Release the simulation's files and worker processes. It cannot run afterwards."""
+        self.stop()
+        with self._lock:
+            self._stop_shards()
+            self.order_book.tape.close()
+            if self.journal:
+                self.journal.close()
 
-            if self.socketio:
-                self.socketio.emit('market_update', market_data)
-                self.socketio.emit('traders_update', trader_updates)
+    def save_checkpoint(self):
+        """
+        Serialize the full simulation state (see `checkpoint`).
 
-                if trades:
-                    self.socketio.emit('new_trades', trades)
+        Returns:
+            bytes: The checkpoint, to be passed to `restore_checkpoint`.
+        """
+        return checkpoint.dumps({name: getattr(self, name) for name in self.CHECKPOINT_STATE})
 
-            self.socketio.sleep(0.1)
\ No newline at end of file
+    def restore_checkpoint(self, data):
+        """
+        Replace the simulation state with a checkpoint. A running simulation carries on
+        from the restored state; the market stream restarts, so clients resync.
+
+        Raises:
+            ValueError: If the data is not a valid checkpoint.
+        """
+        state = checkpoint.loads(data)
+        missing = set(self.CHECKPOINT_STATE) - set(state)
+        if missing:
+            raise ValueError(f"Checkpoint is missing state: {', '.join(sorted(missing))}")
+        self._check_checkpoint_state(state)
+
+        with self._lock:
+            self.order_book.tape.close()
+            self._stop_shards()
+            for name in self.CHECKPOINT_STATE:
+                setattr(self, name, state[name])
+            self._attach_ledger()
+            self._start_shards()
+            if self.journal:
+                # The restored book is journaled in full, so replays carry on from it
+                self.order_book.journal = self.journal
+                self.journal.record_reset(self.order_book, self.seed)
+            if self.leaderboard:
+                self.leaderboard = self._build_leaderboard()
+            # Restored orders keep their ids, so new ids must not collide with them
+            if self.order_book.orders:
+                reserve_order_ids(max(self.order_book.orders))
+            self._pending_trades.clear()
+            self._payload_cache.clear()
+            self.market_stream = MarketStream(self)
+
+    @staticmethod
+    def _check_checkpoint_state(state):
+        """
+        Check that the objects of a loaded checkpoint fit together, before any of them
+        replaces the running state.
+
+        Raises:
+            ValueError: On the first inconsistency found.
+        """
+        def require(condition, message):
+            if not condition:
+                raise ValueError(f"Inconsistent checkpoint: {message}")
+
+        def is_number(value, kind=(int, float)):
+            return isinstance(value, kind) and not isinstance(value, bool) and math.isfinite(value)
+
+        for name, kind in (('rng', random.Random), ('scheduler', EventScheduler), ('tick_grid', TickGrid),
+                           ('order_book', OrderBook), ('traders', list), ('trader_map', dict),
+                           ('populations', list), ('population_map', dict), ('tracked_trader_ids', set),
+                           ('price_history', deque), ('volume_history', deque), ('indicators', MarketIndicators),
+                           ('trader_rows', dict), ('population_offsets', dict), ('ledger', PortfolioLedger),
+                           ('resolved_settings', dict)):
+            require(isinstance(state[name], kind), f"{name} is not a {kind.__name__}")
+        require(state['analytics'] is None or isinstance(state['analytics'], RiskAnalytics),
+                "analytics is not a RiskAnalytics")
+        require(is_number(state['current_price']) and state['current_price'] > 0, "current_price is not a price")
+        require(state['seed'] is None or is_number(state['seed'], int), "seed is not an integer")
+
+        tick_grid = state['tick_grid']
+        require(is_number(tick_grid.tick_size) and tick_grid.tick_size > 0
+                and tick_grid.ticks_per_unit == 1 / tick_grid.tick_size, "tick_grid is not a valid grid")
+        indicators = state['indicators']
+        require(isinstance(indicators.prices, np.ndarray) and indicators.prices.shape[0] > 0
+                and indicators.prices.ndim == 1 and is_number(indicators.count, int) and indicators.count >= 0,
+                "indicators have no valid price history")
+
+        # Traders, populations and their ledger rows
+        traders, populations = state['traders'], state['populations']
+        require(all(isinstance(trader, Trader) and trader.rng is state['rng'] and trader.tick_grid is tick_grid
+                    for trader in traders), "traders are not traders of this simulation")
+        require(state['trader_map'] == {trader.id: trader for trader in traders}, "trader_map does not match traders")
+        require(state['trader_rows'] == {trader.id: row for row, trader in enumerate(traders)},
+                "trader_rows do not match traders")
+        require(all(isinstance(population, TraderPopulation) and population.tick_grid is tick_grid
+                    for population in populations), "populations are not populations of this simulation")
+        require(state['population_map'] == {population.prefix: population for population in populations},
+                "population_map does not match populations")
+        trader_count = len(traders)
+        offsets = {}
+        for population in populations:
+            size = population.size
+            require(is_number(size, int) and size > 0, f"{population.trader_type} has no members")
+            require(all(value.shape == (size,) for value in vars(population).values() if isinstance(value, np.ndarray)),
+                    f"{population.trader_type} arrays do not match its size")
+            offsets[population.prefix] = trader_count
+            trader_count += size
+        require(state['population_offsets'] == offsets, "population_offsets do not match populations")
+        require(state['trader_count'] == trader_count, "trader_count does not match the traders")
+
+        order_book = state['order_book']
+        tape = order_book.tape
+        require(order_book.tick_grid is tick_grid, "order book uses another tick grid")
+        ledger = state['ledger']
+        for name, dtype in (('cash', np.float64), ('shares', np.int64), ('volume', np.int64)):
+            column = getattr(ledger, name)
+            require(isinstance(column, np.ndarray) and column.dtype == dtype and column.shape == (trader_count,),
+                    f"ledger {name} does not have a row per trader")
+        tape_rows = ledger._tape_rows
+        require(isinstance(tape_rows, np.ndarray) and tape_rows.dtype == np.int64 and tape_rows.ndim == 1
+                and len(tape_rows) <= len(tape.trader_ids) and ((tape_rows >= -1) & (tape_rows < trader_count)).all(),
+                "ledger rows of the trade tape's traders are out of range")
+        require(is_number(ledger._tape_position, int) and 0 <= ledger._tape_position <= len(tape),
+                "ledger has settled trades beyond the trade tape")
+        analytics = state['analytics']
+        if analytics is not None:
+            require(all(isinstance(value, np.ndarray) and value.shape == (trader_count,)
+                        for value in vars(analytics).values() if not isinstance(value, int)),
+                    "analytics arrays do not have a row per trader")
+            require(0 <= analytics._tape_position <= len(tape), "analytics have read trades beyond the trade tape")
+
+        def is_known(trader_id):
+            if not isinstance(trader_id, str):
+                return False
+            if trader_id in state['trader_map']:
+                return True
+            head, _, _ = trader_id.rpartition('_')
+            population = state['population_map'].get(head + '_')
+            return population is not None and population.index_of(trader_id) is not None
+
+        require(all(map(is_known, order_book.orders_by_trader)), "order book holds orders of unknown traders")
+        require(all(map(is_known, state['tracked_trader_ids'])), "tracked traders are unknown")
+
+        # Every scheduled event is the next arrival of one of the object traders
+        scheduler = state['scheduler']
+        events = scheduler.events
+        object_traders = {id(trader) for trader in traders}
+        require(isinstance(events, list) and is_number(scheduler.current_time, int)
+                and all(isinstance(event, tuple) and len(event) == 4 and is_number(event[0])
+                        and is_number(event[1], int) and id(event[3]) in object_traders for event in events),
+                "scheduler events are not arrivals of known traders")
+        require(all(events[(index - 1) // 2][:2] <= events[index][:2] for index in range(1, len(events))),
+                "scheduler events are not in heap order")
+
+    def set_tick_rate(self, tick_rate):
+        """
+        Set the target number of ticks per second.
+
+        Args:
+            tick_rate (float or None): Target rate, between `MIN_TICK_RATE` and
+                `MAX_TICK_RATE`. None runs unthrottled (max-speed mode).
+
+        Raises:
+            ValueError: If the rate is not a finite number in range.
+        """
+        if tick_rate is not None and not (isinstance(tick_rate, (int, float)) and math.isfinite(tick_rate)
+                                          and MIN_TICK_RATE <= tick_rate <= MAX_TICK_RATE):
+            raise ValueError(f"tick_rate must be between {MIN_TICK_RATE} and {MAX_TICK_RATE} or None, "
+                             f"got {tick_rate!r}")
+        self.tick_rate = tick_rate
+
+    def get_run_status(self):
+        return {
+            'running': self.running,
+            'tick': self.scheduler.current_time,
+            'target_tick_rate': self.tick_rate,
+            'max_speed': self.tick_rate is None,
+            'achieved_tick_rate': round(self.achieved_tick_rate, 1),
+            'broadcast_rate': self.broadcast_rate,
+            'error': self.run_error,
+        }
+
+    def get_metrics(self):
+        """
+        Return the run loop metrics: per-phase timing histograms (seconds per tick) and
+        activity counters when `collect_metrics` is enabled, plus current gauges.
+        """
+        data = self.metrics.to_dict() if self.metrics else {}
+        data['enabled'] = self.metrics is not None
+        data['gauges'] = {
+            'tick': self.scheduler.current_time,
+            'achieved_tick_rate': round(self.achieved_tick_rate, 1),
+            'resting_orders': len(self.order_book.orders),
+            'bid_depth': sum(self.order_book.bid_ladder.depth),
+            'ask_depth': sum(self.order_book.ask_ladder.depth),
+            'pending_events': len(self.scheduler),
+        }
+        return data
+
+    def _is_current_run(self, run_id):
+        return self.running and run_id == self._run_id
+
+    def _run_simulation(self, run_id):
+        """
+        Producer loop: step the simulation at the target tick rate.
+
+        Ticks are paced against a deadline rather than a fixed sleep, so time spent in
+        `step()` counts toward the tick interval. A producer that falls behind resets its
+        deadline instead of bursting to catch up. In max-speed mode it only yields so the
+        broadcaster and request handlers can run.
+        """
+        deadline = window_start = time.perf_counter()
+        window_ticks = 0
+        while self._is_current_run(run_id):
+            metrics = self.metrics
+            if metrics:
+                started = perf_counter()
+            with self._lock:
+                if metrics:
+                    metrics.observe('lock_wait', perf_counter() - started)
+                # The run may have been stopped or reset while this loop waited for the lock
+                if not self._is_current_run(run_id):
+                    return
+                try:
+                    self._pending_trades.extend(self.step())
+                except Exception as e:
+                    # Stop the run visibly instead of leaving it marked running with no producer
+                    logger.exception("Simulation step failed; stopping the run")
+                    self.run_error = f"{type(e).__name__}: {e}"
+                    self.running = False
+                    return
+
+            now = time.perf_counter()
+            window_ticks += 1
+            if now - window_start >= 1.0:
+                self.achieved_tick_rate = window_ticks / (now - window_start)
+                window_start, window_ticks = now, 0
+
+            if self.tick_rate is None:
+                self.socketio.sleep(0)
+                continue
+            deadline = max(deadline + 1.0 / self.tick_rate, now)
+            self.socketio.sleep(deadline - now)
+
+    def _run_broadcaster(self, run_id):
+        """
+        Broadcast loop: publish the latest state at `broadcast_rate`, whatever the tick rate.
+
+        Every tick since the previous broadcast is coalesced into one delta (see
+        `MarketStream.next_delta`), so slow serialization or emission never holds the
+        simulation back. A final broadcast after the run stops flushes the last ticks.
+        """
+        broadcast_time = self.scheduler.current_time
+        while True:
+            running = self._is_current_run(run_id)
+            if running:
+                self.socketio.sleep(1.0 / self.broadcast_rate)
+            if run_id != self._run_id:
+                return
+
+            with self._lock:
+                if run_id != self._run_id:
+                    return
+                metrics = self.metrics
+                if self.scheduler.current_time == broadcast_time:
+                    market_delta = None
+                else:
+                    broadcast_time = self.scheduler.current_time
+                    if metrics:
+                        started = perf_counter()
+                    # Clients hold a snapshot and apply deltas (see MarketStream)
+                    market_delta = self.market_stream.next_delta(list(self._pending_trades))
+                    market_delta['tick_rate'] = round(self.achieved_tick_rate, 1)
+                    self._pending_trades.clear()
+                    if metrics:
+                        serialized = perf_counter()
+                        metrics.observe('market_data', serialized - started)
+                    trader_updates = payloads.EncodedJSON(self.get_all_traders_data_json())
+                    if metrics:
+                        metrics.observe('traders_data', perf_counter() - serialized)
+
+            if market_delta is not None:
+                if metrics:
+                    started = perf_counter()
+                self.socketio.emit('market_update', market_delta)
+                self.socketio.emit('traders_update', trader_updates)
+                if metrics:
+                    metrics.observe('emit', perf_counter() - started)
+            if not running:
+                return
\ No newline at end of file
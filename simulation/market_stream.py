@@ -0,0 +1,86 @@
+class MarketStream:
+    """
+    Snapshot + delta encoding of the market data pushed to websocket clients.
+
+    A client receives one full snapshot when it connects (or asks to resync), then a
+    delta per broadcast carrying only what changed: the price points added since the
+    previous delta, the order book rows that changed and the new trades. Every message
+    carries a sequence number; a client that sees a gap discards its state and
+    requests a fresh snapshot.
+
+    Deltas are computed once per broadcast and shared by all clients, so the cost no
+    longer grows with the number of connected clients.
+    """
+
+    MAX_TRADES_PER_DELTA = 20
+
+    def __init__(self, simulation):
+        self.simulation = simulation
+        self.sequence = 0
+        self._emitted_time = simulation.scheduler.current_time
+        self._book = simulation.order_book.get_order_book_data(simulation.order_book_levels)
+
+    def snapshot(self):
+        """Return the full market state at the current sequence number."""
+        data = self.simulation.get_market_data()
+        data['seq'] = self.sequence
+        data['history_length'] = self.simulation.price_history.maxlen
+        return data
+
+    def snapshot_json(self):
+        """Return `snapshot()` as JSON bytes, encoded once per state version and sequence number."""
+        simulation = self.simulation
+        return simulation.cached_payload('snapshot', self.snapshot, (simulation.version, self.sequence))
+
+    def next_delta(self, trades=()):
+        """
+        Advance the sequence and return the changes since the previous delta.
+
+        Args:
+            trades (list): Trades executed since the previous delta.
+
+        Returns:
+            dict: The delta message.
+        """
+        simulation = self.simulation
+        self.sequence += 1
+
+        # Price points appended since the last delta (capped by the history window)
+        history = simulation.price_history
+        new_points = min(simulation.scheduler.current_time - self._emitted_time, len(history))
+        self._emitted_time = simulation.scheduler.current_time
+
+        delta = simulation.get_market_summary()
+        delta['seq'] = self.sequence
+        delta['prices'] = [history[i] for i in range(-new_points, 0)]
+        delta['trades'] = [trade.to_dict() for trade in trades[-self.MAX_TRADES_PER_DELTA:]]
+
+        book = simulation.order_book.get_order_book_data(simulation.order_book_levels)
+        book_changes = {}
+        for side in ('bids', 'asks'):
+            changes = self._diff_rows(self._book[side], book[side])
+            if changes is not None:
+                book_changes[side] = changes
+        if book_changes:
+            delta['book'] = book_changes
+        self._book = book
+
+        return delta
+
+    @staticmethod
+    def _diff_rows(previous, current):
+        """
+        Diff one side of the book by row position.
+
+        Returns:
+            dict or None: `{'length': n, 'rows': [[index, price, quantity], ...]}` with the
+            rows that changed, or None if the side is unchanged.
+        """
+        rows = [
+            [i, row['price'], row['quantity']]
+            for i, row in enumerate(current)
+            if i >= len(previous) or previous[i] != row
+        ]
+        if not rows and len(previous) == len(current):
+            return None
+        return {'length': len(current), 'rows': rows}
@@ -0,0 +1,168 @@
+"""
+Market state shared by every trader during a tick.
+
+`MarketIndicators` follows the tick-by-tick price series (the prices recorded in
+the simulation's price history) and maintains rolling indicators over it. Each
+indicator is registered the first time a trader asks for it and from then on
+updated in O(1) per tick, so indicators nobody uses cost nothing and one that
+every trader uses is computed once per tick, not once per trader.
+
+`MarketView` is built once per tick from the order book and the indicators and is
+passed to every trader and population, instead of each one deriving the mid price
+and its own price statistics.
+"""
+import math
+
+import numpy as np
+
+from simulation.fair_value import get_mid_fair_value
+
+HISTORY_LENGTH = 1024  # Tick prices kept; bounds the longest indicator window
+
+
+class MarketIndicators:
+    """
+    Rolling indicators over the tick price series.
+
+    - `returns(horizon)`: simple return over the last `horizon` ticks
+    - `sma(window)`: simple moving average, from a running sum
+    - `ema(span)`: exponential moving average with alpha = 2 / (span + 1)
+    - `volatility(window)`: realized volatility, the standard deviation of the last
+      `window` per-tick log returns, from running sums of returns and squared returns
+
+    Indicators other than `returns` are registered on first use, seeded from the
+    stored history and then updated by `push`.
+    """
+
+    def __init__(self, initial_price, history_length=HISTORY_LENGTH):
+        self.prices = np.zeros(history_length)
+        self.count = 0  # Prices pushed so far
+        self._emas = {}  # span -> current value
+        self._sums = {}  # window -> running sum of the last `window` prices
+        self._return_sums = {}  # window -> [sum, sum of squares] of the last `window` log returns
+        self.push(initial_price)
+
+    def push(self, price):
+        """Record the price of a new tick and update every registered indicator."""
+        prices, length = self.prices, len(self.prices)
+        previous = self.price_at(0) if self.count else None
+        prices[self.count % length] = price
+        self.count += 1
+
+        for span in self._emas:
+            self._emas[span] += 2.0 / (span + 1) * (price - self._emas[span])
+        for window in self._sums:
+            self._sums[window] += price
+            if self.count > window:
+                self._sums[window] -= self.price_at(window)
+        if previous is not None:
+            log_return = self._log_return(price, previous)
+            for window, sums in self._return_sums.items():
+                sums[0] += log_return
+                sums[1] += log_return * log_return
+                if self.count - 1 > window:
+                    dropped = self._log_return(self.price_at(window), self.price_at(window + 1))
+                    sums[0] -= dropped
+                    sums[1] -= dropped * dropped
+
+    @staticmethod
+    def _log_return(price, previous):
+        return math.log(price / previous) if price > 0 and previous > 0 else 0.0
+
+    def price_at(self, ticks_ago):
+        """Return the price `ticks_ago` ticks before the latest one."""
+        return float(self.prices[(self.count - 1 - ticks_ago) % len(self.prices)])
+
+    def _available(self, window):
+        # A window's running sums drop the price just past it, which must still be stored
+        if not 0 < window < len(self.prices) - 1:
+            raise ValueError(f"Indicator window must be between 1 and {len(self.prices) - 2}, got {window}")
+        return min(window, self.count)
+
+    def returns(self, horizon):
+        """Return over the last `horizon` ticks, or None before `horizon` ticks have passed."""
+        self._available(horizon)
+        if self.count <= horizon:
+            return None
+        start = self.price_at(horizon)
+        return self.price_at(0) / start - 1 if start > 0 else None
+
+    def sma(self, window):
+        """Simple moving average of the last `window` prices (fewer at the start of a run)."""
+        available = self._available(window)
+        if window not in self._sums:
+            self._sums[window] = sum(self.price_at(i) for i in range(available))
+        return self._sums[window] / available
+
+    def ema(self, span):
+        """Exponential moving average with the given span, seeded from the stored history."""
+        available = self._available(span)
+        if span not in self._emas:
+            alpha = 2.0 / (span + 1)
+            value = self.price_at(available - 1)
+            for i in range(available - 2, -1, -1):
+                value += alpha * (self.price_at(i) - value)
+            self._emas[span] = value
+        return self._emas[span]
+
+    def volatility(self, window):
+        """Standard deviation of the last `window` per-tick log returns, or None with fewer than two."""
+        self._available(window)
+        returns = min(window, self.count - 1)
+        if window not in self._return_sums:
+            sums = [0.0, 0.0]
+            for i in range(returns):
+                log_return = self._log_return(self.price_at(i), self.price_at(i + 1))
+                sums[0] += log_return
+                sums[1] += log_return * log_return
+            self._return_sums[window] = sums
+        if returns < 2:
+            return None
+        total, squares = self._return_sums[window]
+        variance = (squares - total * total / returns) / (returns - 1)
+        return math.sqrt(max(variance, 0.0))
+
+
+class MarketView:
+    """
+    What traders see of the market during one tick: the top of the book at the start
+    of the tick and the shared indicators.
+
+    Attributes:
+        price (float): Last trade price at the start of the tick.
+        best_bid (float or None): Best bid at the start of the tick.
+        best_ask (float or None): Best ask at the start of the tick.
+        mid (float or None): Mid price, if both sides of the book are quoted.
+        spread (float or None): Best ask minus best bid, if both sides are quoted.
+        reference_price (float): The mid price if available, else the last trade price.
+    """
+
+    __slots__ = ('price', 'best_bid', 'best_ask', 'mid', 'spread', 'reference_price', 'indicators')
+
+    def __init__(self, price, order_book, indicators):
+        """
+        Args:
+            price (float): Last trade price.
+            order_book (OrderBook): Book to read the top of.
+            indicators (MarketIndicators): Indicators of the tick price series.
+        """
+        self.price = price
+        self.best_bid = order_book.get_best_bid()
+        self.best_ask = order_book.get_best_ask()
+        self.spread = order_book.get_spread()
+        quoted = self.spread is not None
+        self.mid = get_mid_fair_value(self.best_bid, self.best_ask) if quoted else None
+        self.reference_price = self.mid if quoted else price
+        self.indicators = indicators
+
+    def returns(self, horizon):
+        return self.indicators.returns(horizon)
+
+    def sma(self, window):
+        return self.indicators.sma(window)
+
+    def ema(self, span):
+        return self.indicators.ema(span)
+
+    def volatility(self, window):
+        return self.indicators.volatility(window)
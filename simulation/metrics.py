@@ -0,0 +1,138 @@
+"""
+Runtime metrics of a simulation: where each tick's time goes, and what it produced.
+
+`SimulationMetrics` keeps a rolling histogram per phase of the run loop (order
+generation per trader type, matching, settlement, analytics, serialization of the
+broadcast payloads and emission) and counters of orders, trades and volume. Phase
+times are accumulated over a step and recorded once per step, so a histogram sample
+is the time a phase took in one tick.
+
+Simulations built with `collect_metrics = False` have no `SimulationMetrics` at all;
+the instrumented code paths then skip timing entirely.
+"""
+from time import perf_counter
+
+import numpy as np
+
+HISTOGRAM_WINDOW = 1024  # Samples kept per phase for quantiles
+QUANTILES = (0.5, 0.9, 0.99)
+PROMETHEUS_PREFIX = 'market_sim'
+
+
+class RollingHistogram:
+    """Quantiles over the last `window` samples, plus lifetime count, sum and maximum."""
+
+    def __init__(self, window=HISTOGRAM_WINDOW):
+        self.samples = np.zeros(window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.samples[self.count % len(self.samples)] = value
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def to_dict(self):
+        window = self.samples[:min(self.count, len(self.samples))]
+        data = {'count': self.count, 'sum': self.total, 'max': self.max}
+        if window.size:
+            for quantile, value in zip(QUANTILES, np.quantile(window, QUANTILES)):
+                data[f'p{round(quantile * 100)}'] = float(value)
+            data['mean'] = float(window.mean())
+        return data
+
+
+class SimulationMetrics:
+    """Per-phase timing histograms and activity counters of one simulation."""
+
+    def __init__(self, window=HISTOGRAM_WINDOW):
+        self.window = window
+        self.phases = {}  # phase name -> RollingHistogram
+        self.counters = {'ticks': 0, 'orders': 0, 'trades': 0, 'volume': 0}
+        self._step_times = {}  # phase name -> seconds accumulated in the current step
+
+    def add(self, phase, seconds):
+        """Add time spent in a phase during the current step."""
+        self._step_times[phase] = self._step_times.get(phase, 0.0) + seconds
+
+    def observe(self, phase, seconds):
+        """Record one sample of a phase directly."""
+        histogram = self.phases.get(phase)
+        if histogram is None:
+            histogram = self.phases[phase] = RollingHistogram(self.window)
+        histogram.observe(seconds)
+
+    def end_step(self, started, trades):
+        """
+        Close the current step: record its accumulated phase times and its counts.
+
+        Args:
+            started (float): `perf_counter()` value taken when the step began.
+            trades (list): Trades executed during the step.
+        """
+        self.observe('step', perf_counter() - started)
+        for phase, seconds in self._step_times.items():
+            self.observe(phase, seconds)
+        self._step_times.clear()
+        self.counters['ticks'] += 1
+        self.counters['trades'] += len(trades)
+        self.counters['volume'] += sum(trade.quantity for trade in trades)
+
+    def to_dict(self):
+        return {
+            'phases': {phase: histogram.to_dict() for phase, histogram in list(self.phases.items())},
+            'counters': dict(self.counters),
+        }
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{value}"' for name, value in labels.items()) + '}'
+
+
+def to_prometheus(simulations):
+    """
+    Render the metrics of several simulations in the Prometheus text exposition format.
+
+    Args:
+        simulations (dict): Simulation id -> metrics dict, with the `phases` and
+            `counters` of `SimulationMetrics.to_dict` (absent when disabled) and a
+            `gauges` dict.
+
+    Returns:
+        str: The exposition text.
+    """
+    families = {}  # metric name -> (type, help, [sample lines])
+
+    def sample(name, metric_type, help_text, labels, value):
+        family = families.setdefault(name, (metric_type, help_text, []))
+        family[2].append(f'{name}{_labels(**labels)} {value}')
+
+    phase_metric = f'{PROMETHEUS_PREFIX}_phase_seconds'
+    for sim_id, metrics in simulations.items():
+        for phase, histogram in metrics.get('phases', {}).items():
+            labels = {'simulation': sim_id, 'phase': phase}
+            for quantile in QUANTILES:
+                key = f'p{round(quantile * 100)}'
+                if key in histogram:
+                    sample(phase_metric, 'summary', 'Time spent in a run loop phase per tick',
+                           dict(labels, quantile=quantile), histogram[key])
+            sample(f'{phase_metric}_sum', None, None, labels, histogram['sum'])
+            sample(f'{phase_metric}_count', None, None, labels, histogram['count'])
+        for name, value in metrics.get('counters', {}).items():
+            sample(f'{PROMETHEUS_PREFIX}_{name}_total', 'counter', f'Total {name} processed',
+                   {'simulation': sim_id}, value)
+        for name, value in metrics.get('gauges', {}).items():
+            if value is not None:
+                sample(f'{PROMETHEUS_PREFIX}_{name}', 'gauge', f'Current {name.replace("_", " ")}',
+                       {'simulation': sim_id}, value)
+
+    lines = []
+    for name, (metric_type, help_text, samples) in families.items():
+        if metric_type:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+        lines.extend(samples)
+    return '\n'.join(lines) + '\n'
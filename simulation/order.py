@@ -1,23 +1,71 @@
-from datetime import datetime
+import itertools
+
+from simulation.pricing import DEFAULT_TICK_GRID
+
+_order_ids = itertools.count(1)  # Process-wide source of order ids
+_free_orders = []  # Recycled orders, see `release_order`
+MAX_FREE_ORDERS = 100_000
 
 
 class Order:
-    def __init__(self, order_id, order_type, side, quantity, price=None, trader_id=None):
+    __slots__ = ('id', 'type', 'side', 'quantity', 'price', 'trader_id', 'timestamp')
+
+    def __init__(self, order_id, order_type, side, quantity, price=None, trader_id=None, timestamp=0):
         self.id = order_id
         self.type = order_type  # 'market' or 'limit'
         self.side = side  # 'buy' or 'sell'
         self.quantity = quantity
-        self.price = price
+        self.price = price  # Limit price in ticks; None for market orders
         self.trader_id = trader_id
-        self.timestamp = datetime.now()
+        self.timestamp = timestamp  # Simulation time; stamped by the order book on arrival
 
-    def to_dict(self):
+    def to_dict(self, tick_grid=DEFAULT_TICK_GRID):
         return {
             'id': self.id,
             'type': self.type,
             'side': self.side,
             'quantity': self.quantity,
-            'price': self.price,
+            'price': tick_grid.to_price(self.price) if self.price is not None else None,
             'trader_id': self.trader_id,
-            'timestamp': self.timestamp.isoformat()
+            'timestamp': self.timestamp
         }
+
+
+def next_order_id():
+    """Return a new order id, unique within the process."""
+    return next(_order_ids)
+
+
+def reserve_order_ids(last_id):
+    """Make sure `next_order_id` only returns ids above `last_id`, e.g. after a checkpoint restore."""
+    global _order_ids
+    _order_ids = itertools.count(max(next(_order_ids), last_id + 1))
+
+
+def acquire_order(order_id, order_type, side, quantity, price=None, trader_id=None):
+    """
+    Return an `Order`, reusing a released one when available.
+
+    Takes the same arguments as `Order`. Without any `release_order` calls this is
+    plain allocation.
+    """
+    if _free_orders:
+        order = _free_orders.pop()
+        order.id = order_id
+        order.type = order_type
+        order.side = side
+        order.quantity = quantity
+        order.price = price
+        order.trader_id = trader_id
+        order.timestamp = 0
+        return order
+    return Order(order_id, order_type, side, quantity, price, trader_id)
+
+
+def release_order(order):
+    """
+    Hand an order that left the book (fully filled, or an unfilled market remainder)
+    back for reuse by `acquire_order`. The caller must not keep any reference to it.
+    """
+    if len(_free_orders) < MAX_FREE_ORDERS:
+        _free_orders.append(order)
@@ -1,99 +1,609 @@
+import time
 from collections import deque
-from datetime import datetime
+from itertools import islice
+
+import numpy as np
+
+from simulation import auction
+from simulation.order import Order, release_order
+from simulation.pricing import DEFAULT_TICK_GRID
+from simulation.trade_tape import TradeTape
+
+LADDER_MARGIN = 1024  # Spare levels added on each side when a ladder grows
+MAX_LOADED_LEVELS = 4_000_000  # Widest price range, in ticks, a ladder loaded from a checkpoint may span
+
+
+class PriceLadder:
+    """
+    One side of the book as a dense array of price levels indexed by tick.
+
+    `levels[tick - base]` is the FIFO queue of orders resting at `tick` (None if the
+    level has never been used) and `depth[tick - base]` their total quantity, kept up
+    to date on every add, fill and cancel. A level is found by indexing, and the
+    aggregated (L2) view is read off `depth` without visiting individual orders. The
+    arrays grow to cover new prices. `count` is the number of resting orders.
+
+    `best` is the tick of the best non-empty level and `bound` the far end of the
+    occupied range. When the best level empties, the ladder scans from it toward
+    `bound` for the next non-empty level, which is a short walk in a dense book.
+    """
+
+    def __init__(self, is_bid):
+        self.is_bid = is_bid
+        self.step = -1 if is_bid else 1  # Direction from the best price toward worse prices
+        self.base = 0  # Tick of levels[0]
+        self.levels = []
+        self.depth = []
+        self.best = None
+        self.bound = None
+        self.count = 0
+
+    def level(self, tick):
+        """Return the queue of orders resting at a tick, or None."""
+        index = tick - self.base
+        if 0 <= index < len(self.levels):
+            return self.levels[index]
+        return None
+
+    def add(self, order):
+        """Append an order to the back of its level."""
+        tick = order.price
+        index = tick - self.base
+        if not 0 <= index < len(self.levels):
+            self._grow(tick)
+            index = tick - self.base
+
+        level = self.levels[index]
+        if level is None:
+            level = self.levels[index] = deque()
+        level.append(order)
+        self.depth[index] += order.quantity
+        self.count += 1
+
+        if self.best is None:
+            self.best = self.bound = tick
+        elif (tick - self.best) * self.step < 0:
+            self.best = tick
+        elif (tick - self.bound) * self.step > 0:
+            self.bound = tick
+
+    def load(self, orders):
+        """Fill an empty ladder with orders given in priority order, as saved in a checkpoint."""
+        if not orders:
+            return
+        if abs(orders[-1].price - orders[0].price) >= MAX_LOADED_LEVELS:
+            raise ValueError(f"Resting orders span more than {MAX_LOADED_LEVELS} price levels")
+        for tick in (orders[0].price, orders[-1].price):
+            if not 0 <= tick - self.base < len(self.levels):
+                self._grow(tick)
+
+        levels, depth, base = self.levels, self.depth, self.base
+        for order in orders:
+            index = order.price - base
+            level = levels[index]
+            if level is None:
+                level = levels[index] = deque()
+            level.append(order)
+            depth[index] += order.quantity
+        self.count = len(orders)
+        self.best = orders[0].price
+        self.bound = orders[-1].price
+
+    def remove(self, order):
+        """Remove a resting order from its level."""
+        index = order.price - self.base
+        level = self.levels[index]
+        level.remove(order)
+        self.depth[index] -= order.quantity
+        self.count -= 1
+        if not level and order.price == self.best:
+            self._advance()
+
+    def reduce(self, order, quantity):
+        """Account for `quantity` taken off a resting order (by a fill or an amendment)."""
+        self.depth[order.price - self.base] -= quantity
+
+    def pop_best(self):
+        """Remove the order at the front of the best level, once it has been filled."""
+        level = self.levels[self.best - self.base]
+        order = level.popleft()
+        self.count -= 1
+        if not level:
+            self._advance()
+        return order
+
+    def best_order(self):
+        return self.levels[self.best - self.base][0]
+
+    def _advance(self):
+        """Move `best` to the next non-empty level toward `bound`, or mark the side empty."""
+        levels, base, step = self.levels, self.base, self.step
+        tick, end = self.best, self.bound
+        while tick != end:
+            tick += step
+            if levels[tick - base]:
+                self.best = tick
+                return
+        self.best = self.bound = None
+
+    def _grow(self, tick):
+        size = len(self.levels)
+        if not size:
+            self.base = tick - LADDER_MARGIN
+            self.levels = [None] * (2 * LADDER_MARGIN)
+            self.depth = [0] * (2 * LADDER_MARGIN)
+        elif tick < self.base:
+            # At least double, so repeated growth stays amortized O(1) per level
+            extra = max(self.base - tick + LADDER_MARGIN, size)
+            self.levels[:0] = [None] * extra
+            self.depth[:0] = [0] * extra
+            self.base -= extra
+        else:
+            extra = max(tick - self.base - size + 1 + LADDER_MARGIN, size)
+            self.levels.extend([None] * extra)
+            self.depth.extend([0] * extra)
+
+    def ticks(self):
+        """Yield the ticks of the non-empty levels, best first."""
+        if self.best is None:
+            return
+        levels, base = self.levels, self.base
+        for tick in range(self.best, self.bound + self.step, self.step):
+            if levels[tick - base]:
+                yield tick
+
+    def orders(self):
+        """Yield resting orders in priority order (best price first, then time)."""
+        for tick in self.ticks():
+            yield from self.levels[tick - self.base]
+
+    def depth_levels(self, count):
+        """Return `(tick, total quantity, order count)` of the best `count` non-empty levels."""
+        levels = []
+        for tick in self.ticks():
+            index = tick - self.base
+            levels.append((tick, self.depth[index], len(self.levels[index])))
+            if len(levels) == count:
+                break
+        return levels
+
+    def level_arrays(self):
+        """Return the ticks and total quantities of the non-empty levels as arrays."""
+        if self.best is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        low, high = sorted((self.best, self.bound))
+        depth = np.array(self.depth[low - self.base:high - self.base + 1], dtype=np.int64)
+        occupied = np.flatnonzero(depth)
+        return occupied + low, depth[occupied]
+
+    def orders_page(self, offset, limit):
+        """
+        Return up to `limit` resting orders in priority order, after skipping `offset`.
+        Levels that lie entirely before the page are skipped by their size.
+        """
+        page = []
+        for tick in self.ticks():
+            level = self.levels[tick - self.base]
+            if offset >= len(level):
+                offset -= len(level)
+                continue
+            for order in islice(level, offset, None):
+                page.append(order)
+                if len(page) == limit:
+                    return page
+            offset = 0
+        return page
 
 
 class OrderBook:
-    def __init__(self):
-        self.bids = []  # Buy orders, sorted by price desc
-        self.asks = []  # Sell orders, sorted by price asc
-        self.trades = deque(maxlen=1000)  # Keep last 1000 trades
+    """
+    Price-level limit order book.
+
+    Order prices are integer ticks (see `TickGrid`). Each side is a `PriceLadder`:
+    a dense array of price levels, each holding a FIFO queue so that orders at the
+    same price keep time priority. Level lookup is O(1) and the best bid/ask are
+    tracked directly. Prices are converted back to floats only in the values the
+    book hands out: trades, best bid/ask, spread and the order book payload.
+    """
+
+    def __init__(self, tape=None, tick_grid=None, recycle_orders=False):
+        self.tick_grid = tick_grid if tick_grid is not None else DEFAULT_TICK_GRID
+        # Hand fully filled resting orders back to the order pool (see `release_order`)
+        self.recycle_orders = recycle_orders
+        self.bid_ladder = PriceLadder(is_bid=True)
+        self.ask_ladder = PriceLadder(is_bid=False)
+        self.orders = {}  # order id -> resting order
+        self.orders_by_trader = {}  # trader id -> {order id: resting order}
+        self.tape = tape if tape is not None else TradeTape()  # Every trade, stored column-wise
+        self.tick = 0
+        self.tick_timestamp = time.time()
+        self.journal = None  # OrderJournal recording everything sent to the book, if any
+
+    def __getstate__(self):
+        # Resting orders are saved column-wise, each side in priority order; pickling them
+        # as objects dominates checkpoint time for large books
+        resting = list(self.bid_ladder.orders()) + list(self.ask_ladder.orders())
+        return {
+            'tick_grid': self.tick_grid,
+            'recycle_orders': self.recycle_orders,
+            'tape': self.tape,
+            'tick': self.tick,
+            'orders': {
+                'id': np.fromiter((order.id for order in resting), dtype=np.int64, count=len(resting)),
+                'is_buy': np.fromiter((order.side == 'buy' for order in resting), dtype=bool, count=len(resting)),
+                'quantity': np.fromiter((order.quantity for order in resting), dtype=np.int64, count=len(resting)),
+                'price': np.fromiter((order.price for order in resting), dtype=np.int64, count=len(resting)),
+                'timestamp': np.fromiter((order.timestamp for order in resting), dtype=np.float64,
+                                         count=len(resting)),
+                'trader_id': [order.trader_id for order in resting],
+            },
+        }
+
+    def __setstate__(self, state):
+        self.__init__(state['tape'], state['tick_grid'], state['recycle_orders'])
+        self.tick = state['tick']
+
+        columns = state['orders']
+        ids, is_buy, quantity, price = columns['id'], columns['is_buy'], columns['quantity'], columns['price']
+        bid_count = int(is_buy.sum())
+        bids, asks = price[:bid_count], price[bid_count:]
+        if not (len(ids) == len(is_buy) == len(quantity) == len(price) == len(columns['timestamp'])
+                == len(columns['trader_id'])):
+            raise ValueError("Order book columns differ in length")
+        if not (is_buy[:bid_count].all() and np.unique(ids).size == len(ids) and (quantity > 0).all()
+                and (price > 0).all() and (np.diff(bids) <= 0).all() and (np.diff(asks) >= 0).all()):
+            raise ValueError("Order book orders are not a valid book in priority order")
+        if bid_count and len(asks) and bids[0] >= asks[0]:
+            raise ValueError("Order book is crossed")
+        resting = [
+            Order(order_id, 'limit', 'buy' if is_buy else 'sell', quantity, price, trader_id, timestamp)
+            for order_id, is_buy, quantity, price, timestamp, trader_id in zip(
+                columns['id'].tolist(), columns['is_buy'].tolist(), columns['quantity'].tolist(),
+                columns['price'].tolist(), columns['timestamp'].tolist(), columns['trader_id'])
+        ]
+        self.bid_ladder.load(resting[:bid_count])
+        self.ask_ladder.load(resting[bid_count:])
+
+        # Register in submission order, which is what `get_trader_orders` returns
+        resting.sort(key=lambda order: order.id)
+        for order in resting:
+            self.orders[order.id] = order
+            trader_orders = self.orders_by_trader.get(order.trader_id)
+            if trader_orders is None:
+                trader_orders = self.orders_by_trader[order.trader_id] = {}
+            trader_orders[order.id] = order
+
+    def set_tick(self, tick):
+        """Set the simulation tick stamped on trades; the wall clock is read once per tick."""
+        if self.journal:
+            self.journal.record_tick(tick)
+        self.tick = tick
+        self.tick_timestamp = time.time()
+
+    @property
+    def bids(self):
+        """Resting buy orders in priority order (best price first, then time)."""
+        return list(self.bid_ladder.orders())
+
+    @property
+    def asks(self):
+        """Resting sell orders in priority order (best price first, then time)."""
+        return list(self.ask_ladder.orders())
 
     def add_order(self, order):
+        if self.journal:
+            self.journal.record_order(order)
+        order.timestamp = self.tick
         if order.type == 'market':
             return self._execute_market_order(order)
         else:
             return self._add_limit_order(order)
 
     def _add_limit_order(self, order):
-        trades = []
-
         if order.side == 'buy':
-            # Try to match with existing asks
-            while order.quantity > 0 and self.asks and self.asks[0].price <= order.price:
-                trade = self._execute_trade(order, self.asks[0])
-                trades.append(trade)
-                if self.asks[0].quantity == 0:
-                    self.asks.pop(0)
-
-            # Add remaining quantity to order book
+            # Try to match with existing asks, then rest the remainder
+            trades = self._match(order, self.ask_ladder, order.price)
             if order.quantity > 0:
-                self.bids.append(order)
-                self.bids.sort(key=lambda x: x.price, reverse=True)
+                self._rest_order(order, self.bid_ladder)
         else:
-            # Try to match with existing bids
-            while order.quantity > 0 and self.bids and self.bids[0].price >= order.price:
-                trade = self._execute_trade(self.bids[0], order)
-                trades.append(trade)
-                if self.bids[0].quantity == 0:
-                    self.bids.pop(0)
-
-            # Add remaining quantity to order book
+            # Try to match with existing bids, then rest the remainder
+            trades = self._match(order, self.bid_ladder, order.price)
             if order.quantity > 0:
-                self.asks.append(order)
-                self.asks.sort(key=lambda x: x.price)
+                self._rest_order(order, self.ask_ladder)
 
         return trades
 
     def _execute_market_order(self, order):
+        if order.side == 'buy':
+            return self._match(order, self.ask_ladder)
+        return self._match(order, self.bid_ladder)
+
+    def _match(self, order, ladder, limit_price=None):
+        """Fill an incoming order against the opposite side's ladder, best price first."""
         trades = []
+        # Ticks on the wrong side of the limit compare positive
+        direction = ladder.step
+        while order.quantity > 0 and ladder.best is not None:
+            if limit_price is not None and (ladder.best - limit_price) * direction > 0:
+                break
+            resting = ladder.best_order()
+            if ladder.is_bid:
+                trade = self._execute_trade(resting, order)
+            else:
+                trade = self._execute_trade(order, resting)
+            trades.append(trade)
+            ladder.reduce(resting, trade.quantity)
+            if resting.quantity == 0:
+                self._unregister_order(ladder.pop_best())
+                if self.recycle_orders:
+                    release_order(resting)
+        return trades
+
+    def _rest_order(self, order, ladder):
+        ladder.add(order)
+
+        self.orders[order.id] = order
+        trader_orders = self.orders_by_trader.get(order.trader_id)
+        if trader_orders is None:
+            trader_orders = self.orders_by_trader[order.trader_id] = {}
+        trader_orders[order.id] = order
+
+    def _unregister_order(self, order):
+        del self.orders[order.id]
+        trader_orders = self.orders_by_trader[order.trader_id]
+        del trader_orders[order.id]
+        if not trader_orders:
+            del self.orders_by_trader[order.trader_id]
+
+    def cancel_order(self, order_id):
+        """
+        Remove a resting order from the book.
+
+        Args:
+            order_id: Id of the order to cancel.
+
+        Returns:
+            Order or None: The cancelled order, or None if no such order is resting.
+        """
+        order = self.orders.get(order_id)
+        if order is None:
+            return None
+        if self.journal:
+            self.journal.record_cancel(order_id)
+
+        self._remove_order(order)
+        return order
+
+    def _remove_order(self, order):
+        self._unregister_order(order)
+        ladder = self.bid_ladder if order.side == 'buy' else self.ask_ladder
+        ladder.remove(order)
+
+    def cancel_trader_orders(self, trader_id):
+        """Cancel every resting order of a trader and return the cancelled orders."""
+        return [self.cancel_order(order_id) for order_id in list(self.orders_by_trader.get(trader_id, ()))]
+
+    def modify_order(self, order_id, quantity=None, price=None):
+        """
+        Amend the quantity and/or price of a resting order.
+
+        Reducing the quantity at an unchanged price keeps the order's time priority.
+        A price change or a quantity increase re-submits the order at the back of its
+        new level, where it may immediately match against the opposite side.
+
+        Args:
+            order_id: Id of the order to amend.
+            quantity (int): New remaining quantity. A value <= 0 cancels the order.
+            price (int): New limit price, in ticks.
+
+        Returns:
+            list or None: Trades caused by the amendment, or None if no such order is resting.
+        """
+        order = self.orders.get(order_id)
+        if order is None:
+            return None
+        if self.journal:
+            self.journal.record_modify(order_id, quantity, price)
+
+        new_quantity = order.quantity if quantity is None else quantity
+        new_price = order.price if price is None else price
+
+        if new_quantity <= 0:
+            self._remove_order(order)
+            return []
+
+        if new_price == order.price and new_quantity <= order.quantity:
+            ladder = self.bid_ladder if order.side == 'buy' else self.ask_ladder
+            ladder.reduce(order, order.quantity - new_quantity)
+            order.quantity = new_quantity
+            return []
+
+        self._remove_order(order)
+        order.quantity = new_quantity
+        order.price = new_price
+        return self._add_limit_order(order)
+
+    def call_auction(self, orders, reference, pro_rata=True):
+        """
+        Clear a batch of new orders together with the resting book at a single price
+        (see `auction`).
+
+        Every trade executes at the price that maximizes executed volume. Resting orders
+        keep priority over new orders at the same price. Unfilled remainders of new
+        limit orders rest in the book, and unfilled market orders lapse. The book is
+        left uncrossed.
+
+        Args:
+            orders (list): New orders, in arrival order.
+            reference (int): Tie-break price in ticks, normally the last trade price.
+            pro_rata (bool): Allocate the marginal price level pro rata to order size
+                rather than by time priority.
 
-        if order.side == 'buy' and self.asks:
-            while order.quantity > 0 and self.asks:
-                trade = self._execute_trade(order, self.asks[0])
-                trades.append(trade)
-                if self.asks[0].quantity == 0:
-                    self.asks.pop(0)
-        elif order.side == 'sell' and self.bids:
-            while order.quantity > 0 and self.bids:
-                trade = self._execute_trade(self.bids[0], order)
-                trades.append(trade)
-                if self.bids[0].quantity == 0:
-                    self.bids.pop(0)
+        Returns:
+            list: Trades executed by the auction.
+        """
+        if self.journal:
+            self.journal.record_auction(orders, reference, pro_rata)
+        for order in orders:
+            order.timestamp = self.tick
+        new_buys = [order for order in orders if order.side == 'buy']
+        new_sells = [order for order in orders if order.side == 'sell']
+        new_buy_prices = self._price_array(new_buys)
+        new_sell_prices = self._price_array(new_sells)
+        new_buy_quantities = self._quantity_array(new_buys)
+        new_sell_quantities = self._quantity_array(new_sells)
 
+        # The resting book enters the supply and demand curves as aggregated levels
+        bid_ticks, bid_depth = self.bid_ladder.level_arrays()
+        ask_ticks, ask_depth = self.ask_ladder.level_arrays()
+        price, volume = auction.clearing_price(
+            np.concatenate((bid_ticks, new_buy_prices)), np.concatenate((bid_depth, new_buy_quantities)),
+            np.concatenate((ask_ticks, new_sell_prices)), np.concatenate((ask_depth, new_sell_quantities)),
+            reference)
+
+        trades = []
+        if price is not None:
+            # Only orders that cross the clearing price are eligible; resting ones come first
+            resting_buys = self._crossing_orders(self.bid_ladder, price)
+            resting_sells = self._crossing_orders(self.ask_ladder, price)
+            buy_crosses = new_buy_prices >= price
+            sell_crosses = new_sell_prices <= price
+            buys = resting_buys + [order for order, crosses in zip(new_buys, buy_crosses) if crosses]
+            sells = resting_sells + [order for order, crosses in zip(new_sells, sell_crosses) if crosses]
+            buy_fills = auction.allocate(-self._price_array(buys), self._quantity_array(buys), volume, pro_rata)
+            sell_fills = auction.allocate(self._price_array(sells), self._quantity_array(sells), volume, pro_rata)
+
+            trade_price = self.tick_grid.to_price(price)
+            for buy, sell, quantity in zip(*(column.tolist() for column in auction.pair_fills(buy_fills, sell_fills))):
+                trades.append(self.tape.append(self.tick, trade_price, quantity, buys[buy].trader_id,
+                                               sells[sell].trader_id, self.tick_timestamp))
+
+            self._apply_auction_fills(buys, buy_fills.tolist(), len(resting_buys), self.bid_ladder)
+            self._apply_auction_fills(sells, sell_fills.tolist(), len(resting_sells), self.ask_ladder)
+
+        for order in orders:
+            if order.type == 'limit' and order.quantity > 0:
+                self._rest_order(order, self.bid_ladder if order.side == 'buy' else self.ask_ladder)
         return trades
 
+    @staticmethod
+    def _price_array(orders):
+        """Return order prices in ticks, with market orders priced as in `auction`."""
+        market_prices = {'buy': auction.MARKET_BUY_PRICE, 'sell': auction.MARKET_SELL_PRICE}
+        prices = [market_prices[order.side] if order.price is None else order.price for order in orders]
+        return np.array(prices, dtype=np.int64)
+
+    @staticmethod
+    def _quantity_array(orders):
+        return np.fromiter((order.quantity for order in orders), dtype=np.int64, count=len(orders))
+
+    def _apply_auction_fills(self, orders, fills, resting_count, ladder):
+        """Take auction fills off orders; the first `resting_count` rest in `ladder`."""
+        for i, (order, fill) in enumerate(zip(orders, fills)):
+            if not fill:
+                continue
+            if i < resting_count:
+                ladder.reduce(order, fill)
+            order.quantity -= fill
+            if i < resting_count and order.quantity == 0:
+                ladder.remove(order)
+                self._unregister_order(order)
+                if self.recycle_orders:
+                    release_order(order)
+
+    @staticmethod
+    def _crossing_orders(ladder, price):
+        """Return the resting orders of a ladder priced at or through `price`, in priority order."""
+        crossing = []
+        for tick in ladder.ticks():
+            if (tick - price) * ladder.step > 0:
+                break
+            crossing.extend(ladder.levels[tick - ladder.base])
+        return crossing
+
+    def get_trader_orders(self, trader_id):
+        """Return the resting orders of a trader in submission order."""
+        return list(self.orders_by_trader.get(trader_id, {}).values())
+
     def _execute_trade(self, buy_order, sell_order):
         quantity = min(buy_order.quantity, sell_order.quantity)
-        price = sell_order.price or buy_order.price
-
-        trade = {
-            'id': len(self.trades) + 1,
-            'price': round(price, 2),
-            'quantity': quantity,
-            'buyer_id': buy_order.trader_id,
-            'seller_id': sell_order.trader_id,
-            'timestamp': datetime.now().isoformat()
-        }
+        # Market orders carry no price and trade at the resting order's price
+        price = sell_order.price if sell_order.price is not None else buy_order.price
 
         buy_order.quantity -= quantity
         sell_order.quantity -= quantity
-        self.trades.append(trade)
 
-        return trade
+        return self.tape.append(self.tick, self.tick_grid.to_price(price), quantity, buy_order.trader_id,
+                                sell_order.trader_id, self.tick_timestamp)
+
+    def get_recent_trades(self, count=10):
+        """Return the last `count` trades as dicts, oldest first."""
+        return self.tape.recent(count)
 
     def get_best_bid(self):
-        return self.bids[0].price if self.bids else None
+        best = self.bid_ladder.best
+        return self.tick_grid.to_price(best) if best is not None else None
 
     def get_best_ask(self):
-        return self.asks[0].price if self.asks else None
+        best = self.ask_ladder.best
+        return self.tick_grid.to_price(best) if best is not None else None
 
     def get_spread(self):
-        bid = self.get_best_bid()
-        ask = self.get_best_ask()
-        return round(ask - bid, 2) if (bid and ask) else None
+        bid = self.bid_ladder.best
+        ask = self.ask_ladder.best
+        return self.tick_grid.to_price(ask - bid) if (bid is not None and ask is not None) else None
+
+    def get_depth(self, levels=10):
+        """
+        Return the aggregated (L2) view of the best `levels` price levels of each side,
+        with the cumulative quantity up to each level for depth charts.
+
+        Returns:
+            dict: `bids` and `asks` lists of `{'price', 'quantity', 'orders', 'cumulative'}`,
+            best price first, and the total resting order count of each side.
+        """
+        to_price = self.tick_grid.to_price
+        depth = {}
+        for side, ladder in (('bids', self.bid_ladder), ('asks', self.ask_ladder)):
+            rows = []
+            cumulative = 0
+            for tick, quantity, orders in ladder.depth_levels(levels):
+                cumulative += quantity
+                rows.append({'price': to_price(tick), 'quantity': quantity, 'orders': orders,
+                             'cumulative': cumulative})
+            depth[side] = rows
+        depth['bid_orders'] = self.bid_ladder.count
+        depth['ask_orders'] = self.ask_ladder.count
+        return depth
+
+    def get_orders(self, side, offset=0, limit=50):
+        """
+        Return a page of the full order-level (L3) view of one side, in priority order.
 
-    def get_order_book_data(self):
+        Args:
+            side (str): 'bids' or 'asks'.
+            offset (int): Number of orders to skip from the best price.
+            limit (int): Maximum number of orders to return.
+
+        Returns:
+            dict: `orders` as dicts, and `total`, the side's resting order count.
+        """
+        if side not in ('bids', 'asks'):
+            raise ValueError(f"side must be 'bids' or 'asks', got {side!r}")
+        ladder = self.bid_ladder if side == 'bids' else self.ask_ladder
         return {
-            'bids': [{'price': order.price, 'quantity': order.quantity} for order in self.bids[:10]],
-            'asks': [{'price': order.price, 'quantity': order.quantity} for order in self.asks[:10]]
-        }
\ No newline at end of file
+            'side': side,
+            'offset': offset,
+            'total': ladder.count,
+            'orders': [order.to_dict(self.tick_grid) for order in ladder.orders_page(offset, limit)],
+        }
+
+    def get_order_book_data(self, levels=10):
+        """Return the best `levels` price levels of each side as `{'price', 'quantity'}` rows."""
+        to_price = self.tick_grid.to_price
+        return {
+            'bids': [{'price': to_price(tick), 'quantity': quantity}
+                     for tick, quantity, _ in self.bid_ladder.depth_levels(levels)],
+            'asks': [{'price': to_price(tick), 'quantity': quantity}
+                     for tick, quantity, _ in self.ask_ladder.depth_levels(levels)],
+        }
@@ -0,0 +1,39 @@
+"""
+JSON payloads encoded once and served as-is.
+
+Market and trader payloads are encoded to JSON bytes once per simulation state
+version (see `MarketSimulation.get_market_data_json`). REST handlers return the
+bytes directly. Socket handlers wrap them in `EncodedJSON`, which the `dumps`
+below splices into the Socket.IO packet instead of encoding the data again for
+every recipient. Pass this module as the Flask-SocketIO `json` option to enable it.
+"""
+import json
+
+SEPARATORS = (',', ':')
+
+
+class EncodedJSON:
+    """An event argument that is already encoded as JSON."""
+
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data  # UTF-8 encoded JSON bytes
+
+
+def encode(payload):
+    """Encode a payload to compact JSON bytes."""
+    return json.dumps(payload, separators=SEPARATORS).encode()
+
+
+def dumps(obj, **kwargs):
+    # Socket.IO encodes an event as the list [event name, *args]
+    if isinstance(obj, list) and any(isinstance(item, EncodedJSON) for item in obj):
+        return '[' + ','.join(
+            item.data.decode() if isinstance(item, EncodedJSON) else json.dumps(item, **kwargs)
+            for item in obj
+        ) + ']'
+    return json.dumps(obj, **kwargs)
+
+
+loads = json.loads
@@ -0,0 +1,47 @@
+import math
+
+import numpy as np
+
+DEFAULT_TICK_SIZE = 0.01
+
+
+class TickGrid:
+    """
+    Conversion between prices and integer ticks.
+
+    Inside the simulation every order price is an integer number of ticks of
+    `tick_size`, so the order book compares and indexes prices exactly. Traders
+    reason in floats and snap their prices to the grid when they build an order,
+    and prices are converted back to floats only where they leave the engine
+    (trades, API and JSON payloads).
+    """
+
+    def __init__(self, tick_size=DEFAULT_TICK_SIZE):
+        if tick_size <= 0:
+            raise ValueError(f"tick_size must be positive, got {tick_size}")
+        self.tick_size = tick_size
+        self.ticks_per_unit = 1 / tick_size
+        # Dividing by an integral ticks-per-unit gives the correctly rounded decimal price
+        # (12345 / 100 == 123.45), where multiplying by the tick size may not
+        rounded = round(self.ticks_per_unit)
+        self._divisor = rounded if math.isclose(self.ticks_per_unit, rounded) else None
+
+    def to_ticks(self, price):
+        """Snap a price to the nearest tick."""
+        return int(round(price * self.ticks_per_unit))
+
+    def to_price(self, ticks):
+        if self._divisor is not None:
+            return ticks / self._divisor
+        return ticks * self.tick_size
+
+    def to_ticks_array(self, prices):
+        return np.rint(np.asarray(prices) * self.ticks_per_unit).astype(np.int64)
+
+    def to_price_array(self, ticks):
+        if self._divisor is not None:
+            return np.asarray(ticks) / self._divisor
+        return np.asarray(ticks) * self.tick_size
+
+
+DEFAULT_TICK_GRID = TickGrid()
@@ -0,0 +1,211 @@
+"""
+Headless batch runner.
+
+Runs a `MarketSimulation` at full speed, with no Socket.IO server and no sleeping
+between ticks, and writes the price/volume series, the trade tape and optional
+trader snapshots to compressed columnar files.
+
+Examples:
+    python -m simulation.run --steps 10000 --seed 42 --output runs/baseline
+    python -m simulation.run --steps 2000 --set vectorized_traders=True --set random_traders=100000 --format parquet
+"""
+import argparse
+import ast
+import csv
+import gzip
+import json
+import os
+import time
+
+import numpy as np
+
+from simulation.market_simulation import MarketSimulation
+from simulation.simulation_config import SimulationConfig
+
+DEFAULT_SEED = 42
+FORMATS = ('npz', 'csv', 'parquet')
+
+
+def parse_overrides(items):
+    """
+    Parse `key=value` strings into a dict of SimulationConfig overrides.
+    Values are read as Python literals when possible, otherwise kept as strings.
+    """
+    overrides = {}
+    for item in items or []:
+        key, sep, raw_value = item.partition('=')
+        if not sep:
+            raise ValueError(f"Expected key=value, got: {item}")
+        try:
+            value = ast.literal_eval(raw_value)
+        except (ValueError, SyntaxError):
+            value = raw_value
+        overrides[key.strip()] = value
+    return overrides
+
+
+def config_to_dict(config):
+    """Return the effective settings of a SimulationConfig as a JSON-friendly dict."""
+    return {
+        key: getattr(config, key)
+        for key in dir(config)
+        if not key.startswith('_') and not callable(getattr(config, key))
+    }
+
+
+class RunRecorder:
+    """Accumulates per-step output of a run as columns."""
+
+    def __init__(self, snapshot_every=0):
+        self.snapshot_every = snapshot_every
+        self.prices = {'step': [], 'price': [], 'volume': []}
+        self.snapshots = []
+
+    def record_step(self, step, simulation):
+        self.prices['step'].append(step)
+        self.prices['price'].append(simulation.current_price)
+        self.prices['volume'].append(simulation.volume_history[-1])
+
+        if self.snapshot_every and step % self.snapshot_every == 0:
+            snapshot = simulation.get_trader_snapshot()
+            snapshot['step'] = np.full(len(snapshot['trader_id']), step, dtype=np.int64)
+            self.snapshots.append(snapshot)
+
+    def tables(self, trade_tape):
+        # The trade tape already holds every trade column-wise; only the trader ids need decoding
+        trades = trade_tape.slice()
+        trader_ids = np.array(trade_tape.trader_ids, dtype=str)
+        tables = {
+            'prices': {
+                'step': np.array(self.prices['step'], dtype=np.int64),
+                'price': np.array(self.prices['price'], dtype=np.float64),
+                'volume': np.array(self.prices['volume'], dtype=np.int64),
+            },
+            'trades': {
+                'id': trades['id'],
+                'step': trades['tick'] + 1,
+                'price': trades['price'],
+                'quantity': trades['quantity'],
+                'buyer_id': trader_ids[trades['buyer']],
+                'seller_id': trader_ids[trades['seller']],
+            },
+        }
+        if self.snapshots:
+            tables['traders'] = {
+                key: np.concatenate([snapshot[key] for snapshot in self.snapshots])
+                for key in ('step', 'trader_id', 'cash', 'shares')
+            }
+        return tables
+
+
+def run_simulation(config, steps, snapshot_every=0, progress_every=0):
+    """
+    Run a simulation for a fixed number of steps as fast as possible.
+
+    Args:
+        config (SimulationConfig): Simulation settings, including the seed.
+        steps (int): Number of steps to run.
+        snapshot_every (int): Record every trader's holdings every N steps (0 disables).
+        progress_every (int): Print progress every N steps (0 disables).
+
+    Returns:
+        tuple: (MarketSimulation, RunRecorder, elapsed seconds spent in the step loop)
+    """
+    simulation = MarketSimulation(config)
+    recorder = RunRecorder(snapshot_every)
+
+    started = time.perf_counter()
+    for step in range(1, steps + 1):
+        simulation.step()
+        recorder.record_step(step, simulation)
+        if progress_every and step % progress_every == 0:
+            elapsed = time.perf_counter() - started
+            print(f"step {step}/{steps}  price={simulation.current_price:.2f}  {step / elapsed:.1f} steps/s")
+    elapsed = time.perf_counter() - started
+    if simulation.journal:
+        simulation.journal.close()
+
+    return simulation, recorder, elapsed
+
+
+def _write_npz(path, columns):
+    np.savez_compressed(path + '.npz', **columns)
+    return path + '.npz'
+
+
+def _write_csv(path, columns):
+    names = list(columns)
+    with gzip.open(path + '.csv.gz', 'wt', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(names)
+        writer.writerows(zip(*(columns[name].tolist() for name in names)))
+    return path + '.csv.gz'
+
+
+def _write_parquet(path, columns):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet output requires pyarrow: pip install pyarrow") from None
+
+    pq.write_table(pa.table(columns), path + '.parquet', compression='zstd')
+    return path + '.parquet'
+
+
+WRITERS = {'npz': _write_npz, 'csv': _write_csv, 'parquet': _write_parquet}
+
+
+def write_tables(tables, output_dir, file_format='npz'):
+    """Write each table to `<output_dir>/<table>.<ext>` and return the written paths."""
+    os.makedirs(output_dir, exist_ok=True)
+    writer = WRITERS[file_format]
+    return [writer(os.path.join(output_dir, name), columns) for name, columns in tables.items()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the market simulation headless at maximum speed.")
+    parser.add_argument('--steps', type=int, default=1000, help="Number of simulation steps to run.")
+    parser.add_argument('--seed', type=int, default=None,
+                        help=f"RNG seed (defaults to the config seed, or {DEFAULT_SEED} if unset).")
+    parser.add_argument('--output', default=None, help="Output directory (default: runs/seed<seed>).")
+    parser.add_argument('--format', choices=FORMATS, default='npz', help="Columnar output format.")
+    parser.add_argument('--snapshot-every', type=int, default=0,
+                        help="Record every trader's cash and shares every N steps (0 disables).")
+    parser.add_argument('--progress-every', type=int, default=0, help="Print progress every N steps.")
+    parser.add_argument('--set', dest='overrides', action='append', metavar='KEY=VALUE',
+                        help="Override a SimulationConfig setting. May be repeated.")
+    args = parser.parse_args(argv)
+
+    config = SimulationConfig(**parse_overrides(args.overrides))
+    if args.seed is not None:
+        config.seed = args.seed
+    elif config.seed is None:
+        config.seed = DEFAULT_SEED
+
+    output_dir = args.output or os.path.join('runs', f"seed{config.seed}")
+
+    simulation, recorder, elapsed = run_simulation(config, args.steps, args.snapshot_every, args.progress_every)
+    paths = write_tables(recorder.tables(simulation.order_book.tape), output_dir, args.format)
+
+    summary = {
+        'steps': args.steps,
+        'seed': config.seed,
+        'elapsed_seconds': elapsed,
+        'steps_per_second': args.steps / elapsed if elapsed > 0 else None,
+        'trades': len(simulation.order_book.tape),
+        'final_price': recorder.prices['price'][-1] if recorder.prices['price'] else None,
+        'config': config_to_dict(config),
+        'resolved_settings': simulation.resolved_settings,
+    }
+    with open(os.path.join(output_dir, 'summary.json'), 'w') as f:
+        json.dump(summary, f, indent=2, default=str)
+
+    print(f"Ran {args.steps} steps in {elapsed:.2f}s ({summary['steps_per_second']:.1f} steps/s), "
+          f"{summary['trades']} trades")
+    for path in paths:
+        print(f"  wrote {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+"""
+Order generation for vectorized populations, split across worker processes.
+
+With `SimulationConfig.generation_shards` set, the members of each population are
+split into contiguous shards, one per worker process. Member state lives in
+`multiprocessing.shared_memory` blocks: the ledger's cash and shares, which
+settlement keeps writing in the simulation process, and the populations' own
+per-member arrays (fair values, ...), which each worker updates for its members
+as it decides.
+
+Every step the simulation sends the workers a snapshot of the market (last price
+and mid) and one seed per population drawn from the population's generator. Each
+worker runs the population's vectorized decision pass over its members and
+returns the orders as arrays of member index, side, type, quantity and price. The
+simulation merges them in shard order, which keeps a run reproducible for a given
+seed and shard count, and builds the `Order` objects for the book itself.
+
+Only the decision pass runs in parallel; building orders, matching and settlement
+stay in the simulation process.
+"""
+import multiprocessing
+import traceback
+import weakref
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Population attributes that never go to a worker: the generator stays with the
+# simulation, and trade histories are only kept for tracked members
+_LOCAL_ATTRIBUTES = {'rng', 'tracked', 'trade_history', 'cash', 'shares', 'total_volume_traded'}
+
+
+class _SharedBlock(shared_memory.SharedMemory):
+    # Closing a block unmaps it under any array still using it, so it is only closed
+    # explicitly, once its arrays are released; a dropped block keeps its mapping
+    # until the last of them is gone
+    def __del__(self):
+        pass
+
+
+def _share(array, blocks):
+    """Copy an array into a new shared memory block and return the shared copy and its spec."""
+    block = _SharedBlock(create=True, size=max(array.nbytes, 1))
+    blocks.append(block)
+    shared = np.ndarray(array.shape, array.dtype, buffer=block.buf)
+    shared[...] = array
+    return shared, (block.name, array.dtype.str, len(array))
+
+
+def _attach(spec, blocks, start, stop):
+    """Return rows `[start, stop)` of the shared array described by `spec`."""
+    name, dtype, length = spec
+    block = _SharedBlock(name)
+    blocks.append(block)
+    return np.ndarray((length,), dtype, buffer=block.buf)[start:stop]
+
+
+def _shard_population(population_spec, ledger_specs, start, stop, blocks):
+    """Rebuild the members `[start, stop)` of a population over the shared arrays."""
+    cls, attributes, arrays, offset = population_spec
+    shard = cls.__new__(cls)
+    shard.__dict__.update(attributes)
+    shard.size = stop - start
+    for name, spec in arrays.items():
+        setattr(shard, name, _attach(spec, blocks, start, stop))
+    shard.cash = _attach(ledger_specs['cash'], blocks, offset + start, offset + stop)
+    shard.shares = _attach(ledger_specs['shares'], blocks, offset + start, offset + stop)
+    return shard
+
+
+def _worker_main(connection, population_specs, ledger_specs, ranges):
+    blocks = []
+    shards = [_shard_population(spec, ledger_specs, start, stop, blocks)
+              for spec, (start, stop) in zip(population_specs, ranges)]
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        current_price, mid, seeds = message
+        try:
+            decisions = []
+            for shard, (start, _), seed in zip(shards, ranges, seeds):
+                decision = None
+                if shard.size:
+                    shard.rng = np.random.default_rng(seed)
+                    decision = shard.decide_orders(current_price, mid)
+                if decision is not None:
+                    decision = (decision[0] + start,) + tuple(decision[1:])
+                decisions.append(decision)
+            connection.send(('ok', decisions))
+        except Exception:
+            connection.send(('error', traceback.format_exc()))
+
+
+def _stop(processes, connections, blocks):
+    for connection in connections:
+        try:
+            connection.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        connection.close()
+    for process in processes:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+    for block in blocks:
+        try:
+            block.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class ShardPool:
+    """Worker processes that decide the orders of contiguous shards of each population."""
+
+    def __init__(self, populations, ledger, population_offsets, shards):
+        """
+        Move the ledger's cash and shares and the populations' per-member arrays into
+        shared memory, and start one worker per shard.
+
+        Args:
+            populations (list): The simulation's `TraderPopulation`s. Their arrays are
+                replaced by shared copies; `cash` and `shares` must be re-attached to
+                the ledger afterwards (see `MarketSimulation._attach_ledger`).
+            ledger (PortfolioLedger): Ledger whose `cash` and `shares` the populations view.
+            population_offsets (dict): Population prefix -> ledger row of its first member.
+            shards (int): Number of worker processes.
+
+        Raises:
+            RuntimeError: If called from a daemonic process, which cannot start workers.
+        """
+        if multiprocessing.current_process().daemon:
+            raise RuntimeError("generation_shards needs a process that may start workers; "
+                               "simulations hosted by the web app cannot use it")
+        self.populations = populations
+        self.shards = shards
+        self._blocks = []
+        self._shared = []  # (owner, attribute) of every array moved into shared memory
+
+        ledger_specs = {}
+        for name in ('cash', 'shares'):
+            shared, ledger_specs[name] = _share(getattr(ledger, name), self._blocks)
+            setattr(ledger, name, shared)
+            self._shared.append((ledger, name))
+
+        population_specs = []
+        bounds = []
+        for population in populations:
+            arrays = {}
+            attributes = {}
+            for name, value in vars(population).items():
+                if name in _LOCAL_ATTRIBUTES:
+                    continue
+                if isinstance(value, np.ndarray) and value.shape == (population.size,):
+                    shared, arrays[name] = _share(value, self._blocks)
+                    setattr(population, name, shared)
+                    self._shared.append((population, name))
+                elif not isinstance(value, np.ndarray):
+                    attributes[name] = value
+            population_specs.append((type(population), attributes, arrays,
+                                     population_offsets[population.prefix]))
+            bounds.append(np.linspace(0, population.size, shards + 1).astype(np.int64))
+
+        context = multiprocessing.get_context('spawn')
+        self._processes = []
+        self._connections = []
+        for shard in range(shards):
+            ranges = [(int(edges[shard]), int(edges[shard + 1])) for edges in bounds]
+            connection, worker_connection = context.Pipe()
+            process = context.Process(target=_worker_main, name=f"generation-shard-{shard}", daemon=True,
+                                      args=(worker_connection, population_specs, ledger_specs, ranges))
+            process.start()
+            worker_connection.close()
+            self._processes.append(process)
+            self._connections.append(connection)
+        self._finalizer = weakref.finalize(self, _stop, self._processes, self._connections, self._blocks)
+
+    def decide(self, current_price, mid):
+        """
+        Have every shard decide its members' orders for this step.
+
+        Args:
+            current_price (float): Last trade price.
+            mid (float): Order book mid price, or None.
+
+        Returns:
+            list: For each population, `(member indices, is_buy, is_market, quantities,
+            prices)` arrays in member order, or None if no member places an order.
+
+        Raises:
+            RuntimeError: If a worker failed or is gone.
+        """
+        seeds = [population.rng.integers(0, 2 ** 63) for population in self.populations]
+        try:
+            for connection in self._connections:
+                connection.send((current_price, mid, seeds))
+            replies = [connection.recv() for connection in self._connections]
+        except (EOFError, OSError) as e:
+            raise RuntimeError(f"Generation shard worker is gone: {e}")
+        for status, result in replies:
+            if status != 'ok':
+                raise RuntimeError(f"Generation shard failed:\n{result}")
+
+        decisions = []
+        for index in range(len(self.populations)):
+            parts = [result[index] for _, result in replies if result[index] is not None]
+            if not parts:
+                decisions.append(None)
+            else:
+                decisions.append(tuple(np.concatenate(columns) for columns in zip(*parts)))
+        return decisions
+
+    def close(self):
+        """
+        Stop the workers and release the shared memory. The shared arrays are copied
+        back into private memory first; population `cash` and `shares` must then be
+        re-attached to the ledger.
+        """
+        if not self._finalizer.alive:
+            return
+        for owner, name in self._shared:
+            setattr(owner, name, np.array(getattr(owner, name)))
+        self._shared = []
+        self._finalizer()
+        for block in self._blocks:
+            block.close()
@@ -1,27 +1,126 @@
-import random
-
-
 class SimulationConfig:
+    """
+    Simulation settings. The class attributes are the defaults; keyword arguments
+    override them for a single instance, e.g. `SimulationConfig(random_traders=10000, seed=7)`.
+    """
+
     # Market composition designed for dynamic behavior
     random_traders = 1500  # Noise traders - provide liquidity and volatility
     mean_reverting_traders = 500  # Stabilizing force - fewer but well-capitalized
     trend_following_traders = 0  # New trader type for more complex dynamics
 
-    # Asymmetric capital allocation creates realistic market dynamics
-    random_trader_cash = random.randint(10000, 100000)  # Moderate cash - forces resource constraints
-    random_trader_shares = random.randint(450, 650)  # Moderate inventory - creates natural turnover
+    # Asymmetric capital allocation creates realistic market dynamics.
+    # Each capital setting is either a fixed value or a (low, high) range; ranges are
+    # drawn once per simulation from its seeded RNG, so a given seed always yields the same market.
+    random_trader_cash = (10000, 100000)  # Moderate cash - forces resource constraints
+    random_trader_shares = (450, 650)  # Moderate inventory - creates natural turnover
 
     # Mean reverters as "market makers" with deeper pockets
-    mean_reverting_trader_cash = random.randint(30000, 300000)  # 3x more cash - can absorb volatility
-    mean_reverting_trader_shares = random.randint(1350, 1950)  # 3x more shares - provide stability
+    mean_reverting_trader_cash = (30000, 300000)  # 3x more cash - can absorb volatility
+    mean_reverting_trader_shares = (1350, 1950)  # 3x more shares - provide stability
 
     # Trend followers with moderate capital
-    trend_following_trader_cash = random.randint(20000, 80000)
-    trend_following_trader_shares = random.randint(300, 500)
+    trend_following_trader_cash = (20000, 80000)
+    trend_following_trader_shares = (300, 500)
 
     # Higher starting price creates room for interesting price discovery
     initial_price = 100.0
 
+    # Minimum price increment. Order prices are held internally as integer multiples of it.
+    tick_size = 0.01
+
+    # Fair value strategy mix for random traders: the odds that a trader tracks a private,
+    # exponentially smoothed fair value (learning rate drawn from the alpha range) instead
+    # of the order book mid. 1.0 gives an all-private population, 0.0 an all-mid one.
+    fair_value_private_odds = 0.5
+    fair_value_alpha_range = (0.1, 0.5)
+
+    # Number of recent trades each trader keeps in its fixed-size history.
+    # Memory per trader is bounded by this, however long the simulation runs.
+    trader_history_depth = 100
+
+    # Trades kept in memory by the trade tape before older rows are spilled to
+    # memory-mapped files in `trade_tape_dir` (None uses a temporary directory,
+    # removed when the simulation is reset or garbage collected).
+    trade_tape_memory_rows = 1_000_000
+    trade_tape_dir = None
+
+    # Price levels per side in the order book pushed to clients. Each row aggregates
+    # every order resting at that price. Deeper views are served by the depth API.
+    order_book_levels = 10
+
+    # Order matching mechanism. 'continuous' matches every order as it arrives.
+    # 'call_auction' collects the orders of each step and clears them, together with the
+    # resting book, at the single price that maximizes executed volume. At the marginal
+    # price level fills are shared 'pro_rata' to order size or by 'time' priority
+    # (`auction_allocation`). Unfilled limit orders rest for the next auction.
+    matching = 'continuous'
+    auction_allocation = 'pro_rata'
+
+    # Let traders pull their stale resting quotes before placing a new order.
+    # Without this, old quotes pile up in the order book for the whole run. Off by default,
+    # which keeps the market dynamics, and the results of a given seed, of earlier versions.
+    cancel_stale_orders = False
+
+    # --- Performance ---
+    # Target simulation ticks per second when running in the web app. None runs as fast
+    # as possible. Clients receive updates at `broadcast_rate` per second, with the
+    # ticks in between coalesced, independently of the tick rate.
+    tick_rate = 10.0
+    broadcast_rate = 10.0
+
+    # Store random and mean-reverting traders as NumPy arrays and decide their orders
+    # in one vectorized pass per step. Needed for populations of 100k+ traders.
+    # In this mode every member sees the price at the start of the step.
+    vectorized_traders = False
+
+    # Split each vectorized population into this many shards, each deciding the orders of
+    # its members in a worker process over state in shared memory (see `simulation.sharding`).
+    # None or 1 decides in the simulation process. A run is reproducible for a given seed
+    # and shard count, but differs from an unsharded one. Only the decision pass runs in
+    # parallel: building orders, matching and cancelling stay serial, and take most of a
+    # step at 500k traders, so steps speed up far less than the shard count. Not available
+    # to simulations hosted by the web app, whose worker processes cannot start their own.
+    generation_shards = None
+
+    # Reuse Order objects once they leave the book (filled, cancelled or an unfilled
+    # market remainder) instead of allocating a new one for every order. Off by default:
+    # a recycled order is reused for a later one, so code that keeps a reference to an
+    # order after submitting it would see it change.
+    recycle_orders = False
+
+    # Track equity, Sharpe ratio, max drawdown and turnover for every trader, updated
+    # once per tick in a single vectorized pass. Off by default; the web app turns it on.
+    risk_analytics = False
+
+    # Rank every trader by PnL, traded volume and maximum drawdown, overall and per trader
+    # type, for the trader query API. Volume rankings are updated as trades settle; PnL and
+    # drawdown, which move with every price change, are fully re-sorted (O(n log n)) on the
+    # first query after each tick. Off by default; the web app turns it on.
+    leaderboard = False
+
+    # Time each phase of the run loop (order generation per trader type, matching,
+    # settlement, serialization, emission) and count orders and trades, served at
+    # /api/metrics. When off, the run loop does no timing at all. Off by default, so
+    # scripts and benchmarks measure the simulation alone; the web app turns it on.
+    collect_metrics = False
+
+    # Check after every step that settlement conserved total cash and shares, raising
+    # AssertionError if not. Costs a pass over every portfolio per step; for debugging.
+    debug_checks = False
+
+    # Record every tick boundary, order and cancellation sent to the order book in a binary
+    # journal at this path (None disables). `python -m simulation.journal <path>` replays it
+    # into a fresh order book with no trader logic, reproducing every trade of the run.
+    # An existing file is only replaced with `journal_overwrite`. A reset carries on in the
+    # same journal, which replays it as a fresh book. Not settable by web clients.
+    journal_path = None
+    journal_overwrite = False
+
+    # Seed for the simulation's random number generators. None draws a fresh seed per run, which
+    # the simulation keeps as `MarketSimulation.seed` and records in its journal.
+    seed = None
+
     # --- Trader Tracking Configuration ---
     # Defines which traders' detailed data will be sent to the frontend.
     # This helps reduce the amount of data sent over websockets for performance.
@@ -46,4 +145,10 @@ class SimulationConfig:
         # Example of active name-based tracking:
         #   trend_following_trader_tracking = 0
         #   tracked_trader_ids_by_name = ['tft_50']
-    ]
\ No newline at end of file
+    ]
+
+    def __init__(self, **overrides):
+        for key, value in overrides.items():
+            if not hasattr(self, key):
+                raise AttributeError(f"Unknown simulation setting: {key}")
+            setattr(self, key, value)
@@ -0,0 +1,223 @@
+"""
+Monte Carlo parameter sweeps.
+
+Runs every combination of a grid of SimulationConfig overrides for a number of
+seeded replicates, fanned out over a process pool. Each finished run is appended
+to a JSON-lines results file as soon as it completes, so an interrupted sweep
+can be resumed by re-running the same command: runs already in the file are skipped.
+
+Every run gets its own seed, derived from the sweep seed and the replicate number,
+and its simulation draws from its own RNGs rather than the module-global `random`.
+Grid points share seeds per replicate (common random numbers), which keeps
+comparisons between grid points tight.
+
+Examples:
+    python -m simulation.sweep --param "fair_value_private_odds=[0.0, 0.5, 1.0]" --seeds 20 --steps 2000
+    python -m simulation.sweep --grid grids/capital.json --seeds 50 --output sweeps/capital.jsonl
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from simulation.market_simulation import MarketSimulation
+from simulation.run import parse_overrides
+from simulation.simulation_config import SimulationConfig
+
+SUMMARY_METRICS = ('final_price', 'volatility', 'mean_spread', 'total_volume', 'trades', 'pricing_error')
+
+
+def expand_grid(grid):
+    """
+    Expand a grid of overrides into a list of override dicts.
+
+    Args:
+        grid (dict): Setting name -> list of values to try.
+
+    Returns:
+        list: One dict per combination, in a stable order.
+    """
+    keys = sorted(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+
+
+def replicate_seed(base_seed, replicate):
+    """Derive an independent, reproducible seed for one replicate of the sweep."""
+    return int(np.random.SeedSequence([base_seed, replicate]).generate_state(1)[0])
+
+
+def run_key(overrides, replicate, seed, steps):
+    """Stable identifier of a run, used to skip completed runs when resuming."""
+    # The seed is part of the key: a sweep with another base seed must not reuse these runs
+    payload = json.dumps({'overrides': overrides, 'replicate': replicate, 'seed': seed, 'steps': steps},
+                         sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def plan_runs(grid, seeds, steps, base_seed=0):
+    runs = []
+    for overrides in expand_grid(grid):
+        for replicate in range(seeds):
+            seed = replicate_seed(base_seed, replicate)
+            runs.append({
+                'run_id': run_key(overrides, replicate, seed, steps),
+                'overrides': overrides,
+                'replicate': replicate,
+                'seed': seed,
+                'steps': steps,
+            })
+    return runs
+
+
+def execute_run(run):
+    """
+    Run one simulation and reduce it to summary statistics. Runs in a worker process.
+
+    Returns:
+        dict: The run description plus its summary statistics.
+    """
+    config = SimulationConfig(**run['overrides'])
+    config.seed = run['seed']
+
+    started = time.perf_counter()
+    simulation = MarketSimulation(config)
+    initial_price = simulation.current_price
+
+    prices = np.empty(run['steps'] + 1)
+    prices[0] = initial_price
+    spreads = []
+    total_volume = 0
+    trade_count = 0
+    for step in range(1, run['steps'] + 1):
+        trades = simulation.step()
+        trade_count += len(trades)
+        total_volume += simulation.volume_history[-1]
+        prices[step] = simulation.current_price
+        spread = simulation.order_book.get_spread()
+        if spread is not None:
+            spreads.append(spread)
+
+    log_returns = np.diff(np.log(prices))
+    return {
+        **run,
+        'final_price': float(prices[-1]),
+        'volatility': float(log_returns.std()),
+        'mean_spread': float(np.mean(spreads)) if spreads else None,
+        'total_volume': int(total_volume),
+        'trades': trade_count,
+        # Price efficiency: mean absolute log deviation from the fundamental (initial) value
+        'pricing_error': float(np.abs(np.log(prices / initial_price)).mean()),
+        'resolved_settings': simulation.resolved_settings,
+        'elapsed_seconds': time.perf_counter() - started,
+    }
+
+
+def load_completed(path):
+    """Return the results already recorded in a results file, keyed by run id."""
+    completed = {}
+    if not os.path.exists(path):
+        return completed
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Partially written line from an interrupted sweep
+            completed[result['run_id']] = result
+    return completed
+
+
+def run_sweep(grid, seeds, steps, output, base_seed=0, workers=None):
+    """
+    Run (or resume) a sweep, streaming each result to `output` as it finishes.
+
+    Returns:
+        list: Results of every run in the sweep, including previously completed ones.
+    """
+    runs = plan_runs(grid, seeds, steps, base_seed)
+    completed = load_completed(output)
+    pending = [run for run in runs if run['run_id'] not in completed]
+    print(f"{len(runs)} runs in sweep, {len(runs) - len(pending)} already done, {len(pending)} to run")
+
+    output_dir = os.path.dirname(output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor, open(output, 'a') as f:
+            futures = [executor.submit(execute_run, run) for run in pending]
+            for done, future in enumerate(as_completed(futures), start=1):
+                result = future.result()
+                f.write(json.dumps(result, default=str) + '\n')
+                f.flush()
+                completed[result['run_id']] = result
+                print(f"[{done}/{len(pending)}] {result['overrides']} replicate={result['replicate']}  "
+                      f"volatility={result['volatility']:.5f}  volume={result['total_volume']}  "
+                      f"({result['elapsed_seconds']:.1f}s)")
+
+    return [completed[run['run_id']] for run in runs]
+
+
+def summarize(results):
+    """Aggregate results across replicates: mean and standard error per grid point."""
+    groups = {}
+    for result in results:
+        groups.setdefault(json.dumps(result['overrides'], sort_keys=True), []).append(result)
+
+    summary = []
+    for overrides, group in groups.items():
+        row = {'overrides': json.loads(overrides), 'runs': len(group)}
+        for metric in SUMMARY_METRICS:
+            values = np.array([r[metric] for r in group if r[metric] is not None], dtype=np.float64)
+            if values.size:
+                row[metric] = float(values.mean())
+                row[f"{metric}_stderr"] = float(values.std(ddof=1) / math.sqrt(values.size)) if values.size > 1 else 0.0
+        summary.append(row)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a Monte Carlo sweep over SimulationConfig overrides.")
+    parser.add_argument('--grid', help="JSON file mapping setting names to lists of values.")
+    parser.add_argument('--param', action='append', metavar='KEY=[V1, V2, ...]',
+                        help="Grid axis given inline. May be repeated and combined with --grid.")
+    parser.add_argument('--seeds', type=int, default=10, help="Replicates per grid point.")
+    parser.add_argument('--steps', type=int, default=1000, help="Steps per run.")
+    parser.add_argument('--base-seed', type=int, default=0, help="Seed from which all run seeds are derived.")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores).")
+    parser.add_argument('--output', default=os.path.join('runs', 'sweep.jsonl'),
+                        help="JSON-lines results file; existing results are resumed.")
+    args = parser.parse_args(argv)
+
+    grid = {}
+    if args.grid:
+        with open(args.grid) as f:
+            grid.update(json.load(f))
+    grid.update(parse_overrides(args.param))
+    for key, values in grid.items():
+        if not isinstance(values, (list, tuple)):
+            parser.error(f"Grid axis {key} must be a list of values")
+        if not values:
+            parser.error(f"Grid axis {key} has no values")
+        try:
+            SimulationConfig(**{key: values[0]})  # Fail fast on unknown settings
+        except AttributeError as e:
+            parser.error(str(e))
+
+    results = run_sweep(grid, args.seeds, args.steps, args.output, args.base_seed, args.workers)
+    for row in summarize(results):
+        metrics = '  '.join(f"{metric}={row[metric]:.5g}" for metric in SUMMARY_METRICS if metric in row)
+        print(f"{row['overrides']} (n={row['runs']})  {metrics}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+import os
+import shutil
+import tempfile
+import weakref
+from datetime import datetime
+from typing import NamedTuple
+
+import numpy as np
+
+# Column name -> dtype of every trade stored on the tape
+COLUMNS = (
+    ('id', np.int64),
+    ('tick', np.int64),
+    ('price', np.float64),
+    ('quantity', np.int64),
+    ('buyer', np.int32),  # Index into `TradeTape.trader_ids`
+    ('seller', np.int32),
+    ('timestamp', np.float64),  # Wall-clock seconds since the epoch
+)
+
+MAX_MEMORY_ROWS = 10_000_000  # Largest in-memory buffer a restored tape may ask for
+
+
+class Trade(NamedTuple):
+    """A trade as returned by the order book. The tape holds the columnar copy."""
+    id: int
+    tick: int
+    price: float
+    quantity: int
+    buyer_id: str
+    seller_id: str
+    timestamp: float
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'tick': self.tick,
+            'price': self.price,
+            'quantity': self.quantity,
+            'buyer_id': self.buyer_id,
+            'seller_id': self.seller_id,
+            'timestamp': datetime.fromtimestamp(self.timestamp).isoformat(),
+        }
+
+
+def _remove_spill_dir(files, path):
+    for f in files.values():
+        f.close()
+    shutil.rmtree(path, ignore_errors=True)
+
+
+class TradeTape:
+    """
+    Append-only columnar record of every trade in a run.
+
+    Trades are written into fixed-size in-memory NumPy buffers, one per column. When
+    the buffers fill up they are appended to per-column files on disk, which are read
+    back through `np.memmap`. The full history of a long run therefore stays queryable
+    while memory use is bounded by `memory_rows`.
+
+    Trade ids are row numbers, so they are unique for the life of the tape and a trade
+    can be looked up by id in O(1). Buyer and seller ids are interned into small
+    integer indices (see `trader_ids`).
+    """
+
+    def __init__(self, memory_rows=1_000_000, spill_dir=None):
+        self.memory_rows = memory_rows
+        self.trader_ids = []  # trader index -> trader id
+        self._trader_index = {}  # trader id -> trader index
+
+        self._buffer = {name: np.empty(memory_rows, dtype=dtype) for name, dtype in COLUMNS}
+        self._buffered = 0
+        self._spilled = 0  # Rows already written to disk
+        self._spill_dir = spill_dir
+        self._files = {}
+        self._maps = {}  # Memory maps of the spilled rows, rebuilt after each spill
+        self._finalizer = None
+
+    def __len__(self):
+        return self._spilled + self._buffered
+
+    def __getstate__(self):
+        # Only the recorded rows are saved, copied out of the buffers and memory maps
+        return {
+            'memory_rows': self.memory_rows,
+            'trader_ids': list(self.trader_ids),
+            'rows': {name: np.array(self.column(name)) for name, _ in COLUMNS},
+        }
+
+    def __setstate__(self, state):
+        # A restored tape always spills to its own temporary directory, so it never
+        # writes into the files of the tape it was saved from
+        memory_rows = state['memory_rows']
+        if not isinstance(memory_rows, int) or not 0 < memory_rows <= MAX_MEMORY_ROWS:
+            raise ValueError(f"Trade tape memory_rows must be between 1 and {MAX_MEMORY_ROWS}, got {memory_rows!r}")
+        rows = state['rows']
+        total = len(rows['id'])
+        if any(len(rows[name]) != total for name, _ in COLUMNS):
+            raise ValueError("Trade tape columns differ in length")
+        trader_count = len(state['trader_ids'])
+        for name in ('buyer', 'seller'):
+            if total and not 0 <= rows[name].min() <= rows[name].max() < trader_count:
+                raise ValueError(f"Trade tape {name} column references unknown traders")
+
+        self.__init__(memory_rows)
+        self.trader_ids = list(state['trader_ids'])
+        self._trader_index = {trader_id: index for index, trader_id in enumerate(self.trader_ids)}
+
+        start = 0
+        while start < total:
+            if self._buffered == self.memory_rows:
+                self._spill()
+            count = min(total - start, self.memory_rows - self._buffered)
+            for name, _ in COLUMNS:
+                self._buffer[name][self._buffered:self._buffered + count] = rows[name][start:start + count]
+            self._buffered += count
+            start += count
+
+    def intern(self, trader_id):
+        """Return the integer index of a trader id, assigning a new one on first sight."""
+        index = self._trader_index.get(trader_id)
+        if index is None:
+            index = self._trader_index[trader_id] = len(self.trader_ids)
+            self.trader_ids.append(trader_id)
+        return index
+
+    def append(self, tick, price, quantity, buyer_id, seller_id, timestamp):
+        """
+        Record a trade.
+
+        Returns:
+            Trade: The recorded trade, with its tape id.
+        """
+        if self._buffered == self.memory_rows:
+            self._spill()
+
+        trade_id = self._spilled + self._buffered
+        row = self._buffered
+        buffer = self._buffer
+        buffer['id'][row] = trade_id
+        buffer['tick'][row] = tick
+        buffer['price'][row] = price
+        buffer['quantity'][row] = quantity
+        buffer['buyer'][row] = self.intern(buyer_id)
+        buffer['seller'][row] = self.intern(seller_id)
+        buffer['timestamp'][row] = timestamp
+        self._buffered += 1
+
+        return Trade(trade_id, tick, price, quantity, buyer_id, seller_id, timestamp)
+
+    def _spill(self):
+        """Append the in-memory rows to the column files and empty the buffers."""
+        if not self._files:
+            owns_dir = self._spill_dir is None
+            if owns_dir:
+                self._spill_dir = tempfile.mkdtemp(prefix='trade_tape_')
+            os.makedirs(self._spill_dir, exist_ok=True)
+            self._files = {name: open(self._column_path(name), 'wb') for name, _ in COLUMNS}
+            if owns_dir:
+                self._finalizer = weakref.finalize(self, _remove_spill_dir, self._files, self._spill_dir)
+
+        for name, _ in COLUMNS:
+            self._files[name].write(self._buffer[name][:self._buffered].tobytes())
+            self._files[name].flush()
+        self._spilled += self._buffered
+        self._buffered = 0
+        self._maps = {}
+
+    def _column_path(self, name):
+        return os.path.join(self._spill_dir, f"{name}.bin")
+
+    def _spilled_column(self, name):
+        column = self._maps.get(name)
+        if column is None:
+            dtype = dict(COLUMNS)[name]
+            column = self._maps[name] = np.memmap(self._column_path(name), dtype=dtype, mode='r',
+                                                  shape=(self._spilled,))
+        return column
+
+    def column(self, name, start=0, stop=None):
+        """
+        Return rows `[start, stop)` of one column.
+
+        The result is a view (of the memory map or of the in-memory buffer) unless the
+        range straddles the two, in which case the two parts are concatenated.
+        """
+        start, stop, _ = slice(start, stop).indices(len(self))
+        stop = max(start, stop)
+        if start >= self._spilled:
+            return self._buffer[name][start - self._spilled:stop - self._spilled]
+        if stop <= self._spilled:
+            return self._spilled_column(name)[start:stop]
+        return np.concatenate((self._spilled_column(name)[start:],
+                               self._buffer[name][:stop - self._spilled]))
+
+    def slice(self, start=0, stop=None):
+        """Return rows `[start, stop)` of every column as a dict of arrays."""
+        return {name: self.column(name, start, stop) for name, _ in COLUMNS}
+
+    def records(self, trade_ids):
+        """Return the trades with the given ids as JSON-ready dicts."""
+        trades = []
+        for trade_id in trade_ids:
+            row = {name: self.column(name, trade_id, trade_id + 1)[0] for name, _ in COLUMNS}
+            trades.append(Trade(
+                int(row['id']), int(row['tick']), float(row['price']), int(row['quantity']),
+                self.trader_ids[row['buyer']], self.trader_ids[row['seller']], float(row['timestamp'])
+            ).to_dict())
+        return trades
+
+    def recent(self, count):
+        """Return the last `count` trades as JSON-ready dicts, oldest first."""
+        end = len(self)
+        return self.records(range(max(0, end - count), end))
+
+    def close(self):
+        """Close the spill files, deleting them if the tape created its own directory."""
+        if self._finalizer is not None:
+            self._finalizer()
+        else:
+            for f in self._files.values():
+                f.close()
+        self._files = {}
+        self._maps = {}
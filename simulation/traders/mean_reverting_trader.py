@@ -1,29 +1,30 @@
-import random
-
-from simulation.fair_value import get_mid_fair_value, get_private_fair_value
-from simulation.order import Order
-from simulation.traders.trader import Trader
+from simulation.fair_value import get_private_fair_value
+from simulation.order import acquire_order
+from simulation.traders.trader import TRADE_HISTORY_VIEW, Trader
 
 class MeanRevertingTrader(Trader):
-    def __init__(self, trader_id, cash, shares, target_price):
-        super().__init__(trader_id, cash, shares)
+    __slots__ = ('alpha', 'private_fair_value', 'target_price', 'reversion_strength')
+
+    activity = 0.05  # Lower order frequency
+
+    def __init__(self, trader_id, cash, shares, target_price, rng=None, history_depth=TRADE_HISTORY_VIEW,
+                 tick_grid=None):
+        super().__init__(trader_id, cash, shares, rng, history_depth, tick_grid)
 
         # Strategic traders always use private fair value with individual learning rates
-        self.alpha = random.uniform(0.05, 0.3)  # Mean reverters tend to be more conservative learners
-        self.private_fair_value = target_price + random.gauss(0, 1)  # Smaller initial variation
+        self.alpha = self.rng.uniform(0.05, 0.3)  # Mean reverters tend to be more conservative learners
+        self.private_fair_value = target_price + self.rng.gauss(0, 1)  # Smaller initial variation
         self.target_price = target_price  # Keep original target for mean reversion logic
 
         # Mean reversion specific parameters
-        self.reversion_strength = random.uniform(0.015, 0.03)  # How far from target triggers action
+        self.reversion_strength = self.rng.uniform(0.015, 0.03)  # How far from target triggers action
 
-    def get_current_fair_value(self, current_price, best_bid=None, best_ask=None):
+    def get_current_fair_value(self, current_price, market):
         """
         Update and return the trader's private fair value estimate.
         """
         # Use mid-price if available, otherwise current price
-        observed_price = current_price
-        if best_bid is not None and best_ask is not None:
-            observed_price = get_mid_fair_value(best_bid, best_ask)
+        observed_price = market.mid if market.mid is not None else current_price
 
         # Update private fair value using exponential smoothing
         self.private_fair_value = get_private_fair_value(
@@ -33,51 +34,55 @@ class MeanRevertingTrader(Trader):
         )
         return self.private_fair_value
 
-    def generate_order(self, current_price, best_bid=None, best_ask=None):
-        if random.random() < 0.05:  # Lower order frequency
-
-            # Update fair value based on market observations
-            fair_value = self.get_current_fair_value(current_price, best_bid, best_ask)
-
-            # Mean reversion logic: compare current price to target, but use updated fair value for execution
-            upper_threshold = self.target_price * (1 + self.reversion_strength)
-            lower_threshold = self.target_price * (1 - self.reversion_strength)
-
-            # Strong bias toward mean reversion based on target price
-            if current_price > upper_threshold:
-                side = 'sell'  # Push price down toward target
-            elif current_price < lower_threshold:
-                side = 'buy'  # Push price up toward target
-            else:
-                return None  # No strong opinion, don't trade
-
-            quantity = random.randint(1, 20)
-
-            # Check resources
-            if side == 'buy' and self.cash < current_price * quantity:
-                return None
-            if side == 'sell' and self.shares < quantity:
-                return None
-
-            # Price orders based on fair value estimate, not just current price
-            if side == 'buy':
-                # Willing to pay up to fair value, but be slightly aggressive
-                max_price = min(fair_value * 1.002, current_price * 1.001)
-                price = round(max_price, 2)
-            else:  # sell
-                # Willing to sell down to fair value, but be slightly aggressive
-                min_price = max(fair_value * 0.998, current_price * 0.999)
-                price = round(min_price, 2)
-
-            # Ensure price is positive
-            price = max(0.01, price)
-
-            return Order(
-                order_id=self.get_next_order_id(),
-                order_type='limit',
-                side=side,
-                quantity=quantity,
-                price=price,
-                trader_id=self.id
-            )
-        return None
\ No newline at end of file
+    def get_orders_to_cancel(self, open_orders):
+        """
+        Pull all resting quotes: they were priced off an older fair value estimate
+        and the new order replaces them.
+        """
+        return [order.id for order in open_orders]
+
+    def generate_order(self, current_price, market):
+        # Update fair value based on market observations
+        fair_value = self.get_current_fair_value(current_price, market)
+
+        # Mean reversion logic: compare current price to target, but use updated fair value for execution
+        upper_threshold = self.target_price * (1 + self.reversion_strength)
+        lower_threshold = self.target_price * (1 - self.reversion_strength)
+
+        # Strong bias toward mean reversion based on target price
+        if current_price > upper_threshold:
+            side = 'sell'  # Push price down toward target
+        elif current_price < lower_threshold:
+            side = 'buy'  # Push price up toward target
+        else:
+            return None  # No strong opinion, don't trade
+
+        quantity = self.rng.randint(1, 20)
+
+        # Check resources
+        if side == 'buy' and self.cash < current_price * quantity:
+            return None
+        if side == 'sell' and self.shares < quantity:
+            return None
+
+        # Price orders based on fair value estimate, not just current price
+        if side == 'buy':
+            # Willing to pay up to fair value, but be slightly aggressive
+            max_price = min(fair_value * 1.002, current_price * 1.001)
+            price = self.tick_grid.to_ticks(max_price)
+        else:  # sell
+            # Willing to sell down to fair value, but be slightly aggressive
+            min_price = max(fair_value * 0.998, current_price * 0.999)
+            price = self.tick_grid.to_ticks(min_price)
+
+        # Ensure price is at least one tick
+        price = max(1, price)
+
+        return acquire_order(
+            order_id=self.get_next_order_id(),
+            order_type='limit',
+            side=side,
+            quantity=quantity,
+            price=price,
+            trader_id=self.id
+        )
@@ -0,0 +1,279 @@
+from collections import deque
+
+import numpy as np
+
+from simulation.order import acquire_order, next_order_id
+from simulation.pricing import DEFAULT_TICK_GRID
+from simulation.traders.trader import TRADE_HISTORY_VIEW, recent_trades
+
+
+class TraderPopulation:
+    """
+    Array-backed state for every trader of one type.
+
+    Instead of one Python object per trader, each attribute (cash, shares, fair value
+    parameters, ...) is stored as a NumPy array indexed by the trader's number, and
+    orders for the whole population are decided with one batch of random draws per
+    step. Only the orders that actually result are materialized as `Order` objects.
+
+    Member ids follow the same `<prefix><index>` scheme as the per-object traders,
+    so the order book, settlement and tracking code see no difference.
+    """
+
+    trader_type = 'Trader'
+    prefix = ''
+    activity = 1.0  # Expected actions per member per tick
+
+    def __init__(self, size, cash, shares, rng, history_depth=TRADE_HISTORY_VIEW, tick_grid=None):
+        self.size = size
+        self.rng = rng
+        self.history_depth = history_depth
+        self.tick_grid = tick_grid if tick_grid is not None else DEFAULT_TICK_GRID
+
+        self.cash = np.full(size, cash, dtype=np.float64)
+        self.shares = np.asarray(shares, dtype=np.int64).copy()
+        self.order_count = np.zeros(size, dtype=np.int64)
+
+        self.initial_cash = self.cash.copy()
+        self.initial_shares = self.shares.copy()
+        self.initial_portfolio_value = np.zeros(size, dtype=np.float64)
+        self.total_volume_traded = np.zeros(size, dtype=np.int64)
+
+        # Trade history is only kept for tracked members to keep memory flat for large populations
+        self.tracked = set()
+        self.trade_history = {}
+
+    def trader_id(self, index):
+        return f"{self.prefix}{index}"
+
+    def index_of(self, trader_id):
+        """Return the member index for a trader id, or None if the id is not part of this population."""
+        if not trader_id.startswith(self.prefix):
+            return None
+        suffix = trader_id[len(self.prefix):]
+        if not suffix.isdigit() or int(suffix) >= self.size:
+            return None
+        return int(suffix)
+
+    def track(self, index):
+        self.tracked.add(index)
+        self.trade_history.setdefault(index, deque(maxlen=self.history_depth))
+
+    def set_initial_portfolio_values(self, current_price):
+        self.initial_portfolio_value = self.cash + self.shares * current_price
+
+    def generate_orders(self, current_price, market):
+        """
+        Decide the orders of the members that act this tick.
+
+        Args:
+            current_price (float): Last trade price.
+            market (MarketView): Top of the book and shared indicators for this tick.
+
+        Returns:
+            list: The new orders.
+        """
+        decision = self.decide_orders(current_price, market.mid)
+        return self.build_orders(*decision) if decision is not None else []
+
+    def decide_orders(self, current_price, mid):
+        """
+        Decide the orders of the members that act this tick, as arrays.
+
+        Args:
+            current_price (float): Last trade price.
+            mid (float): Order book mid price, or None.
+
+        Returns:
+            tuple: `(member indices, is_buy, is_market, quantities, prices)` in member
+            order, or None if no member places an order.
+        """
+        return None
+
+    def get_orders_to_cancel(self, open_orders):
+        # Population members re-quote around a fresh fair value, like their per-object counterparts
+        return [order.id for order in open_orders]
+
+    def to_dict(self, index, current_price, open_orders, trade_tape):
+        cash = float(self.cash[index])
+        shares = int(self.shares[index])
+        initial_portfolio_value = float(self.initial_portfolio_value[index])
+
+        portfolio_value = cash + (shares * current_price)
+        pnl = portfolio_value - initial_portfolio_value
+        pnl_percent = (pnl / initial_portfolio_value * 100) if initial_portfolio_value > 0 else 0
+
+        return {
+            'id': self.trader_id(index),
+            'cash': cash,
+            'shares': shares,
+            'portfolio_value': portfolio_value,
+            'pnl': pnl,
+            'pnl_percent': pnl_percent,
+            'total_volume_traded': int(self.total_volume_traded[index]),
+            'trade_history': recent_trades(self.trade_history.get(index, ()), trade_tape),
+            'open_orders': open_orders,
+        }
+
+    def _draw_active(self):
+        """
+        Return the sorted indices of the members acting this tick.
+
+        Each member acts as a Poisson process with rate `activity` per tick. Their
+        superposition is a Poisson process of rate `size * activity` whose arrivals pick
+        a member uniformly, so only the arrivals are drawn and the cost scales with the
+        number of active members. A member drawn twice acts once.
+        """
+        arrivals = self.rng.poisson(self.size * self.activity)
+        return np.unique(self.rng.integers(0, self.size, arrivals))
+
+    def _random_integers(self, low, high):
+        """Vectorized equivalent of `random.randint(low, high)` (inclusive) for array bounds."""
+        return low + (self.rng.random(len(low)) * (high - low + 1)).astype(np.int64)
+
+    def build_orders(self, indices, is_buy, is_market, quantities, prices):
+        """Materialize decided orders (see `decide_orders`) as `Order` objects."""
+        self.order_count[indices] += 1
+
+        orders = []
+        for index, buy, market, quantity, price in zip(indices.tolist(), is_buy.tolist(), is_market.tolist(),
+                                                       quantities.tolist(), prices.tolist()):
+            trader_id = f"{self.prefix}{index}"
+            orders.append(acquire_order(
+                order_id=next_order_id(),
+                order_type='market' if market else 'limit',
+                side='buy' if buy else 'sell',
+                quantity=quantity,
+                price=None if market else price,
+                trader_id=trader_id
+            ))
+        return orders
+
+
+class RandomTraderPopulation(TraderPopulation):
+    """Vectorized counterpart of `RandomTrader`."""
+
+    trader_type = 'RandomTrader'
+    prefix = 'rt_'
+    activity = 0.1
+
+    def __init__(self, size, cash, shares, fair_value, rng, private_odds=0.5, alpha_range=(0.1, 0.5),
+                 history_depth=TRADE_HISTORY_VIEW, tick_grid=None):
+        super().__init__(size, cash, shares, rng, history_depth, tick_grid)
+
+        # Same draws as `fair_value_strategy`, made for the whole population at once
+        self.is_private = rng.random(size) < private_odds
+        self.alpha = np.where(self.is_private, rng.uniform(*alpha_range, size), 0.0)
+        self.private_fair_value = np.where(self.is_private, fair_value + rng.normal(0, 2, size), fair_value)
+        self.aggressiveness = rng.uniform(0.1, 0.3, size)
+
+    def decide_orders(self, current_price, mid):
+        rng = self.rng
+        active = self._draw_active()
+        if not active.size:
+            return None
+
+        # Update private fair values of active members; mid members use the observed price directly
+        observed_price = mid if mid is not None else current_price
+        is_private = self.is_private[active]
+        private_members = active[is_private]
+        self.private_fair_value[private_members] += self.alpha[private_members] * (
+            observed_price - self.private_fair_value[private_members])
+        fair_value = np.where(is_private, self.private_fair_value[active], observed_price)
+
+        # Bias toward buying when cheap, selling when expensive
+        value_ratio = current_price / fair_value
+        buy_odds = np.where(value_ratio < 0.95, 0.7, np.where(value_ratio > 1.05, 0.3, 0.5))
+        is_buy = rng.random(active.size) < buy_odds
+        is_market = rng.random(active.size) < 0.2
+
+        # Drop members without the resources to place any order
+        max_quantity = np.where(is_buy, np.floor(self.cash[active] / current_price).astype(np.int64),
+                                self.shares[active])
+        keep = max_quantity >= 1
+        active, fair_value, is_buy, is_market, max_quantity = (
+            active[keep], fair_value[keep], is_buy[keep], is_market[keep], max_quantity[keep])
+        if not active.size:
+            return None
+
+        quantity = self._draw_quantities(max_quantity)
+        price = self._draw_limit_prices(current_price, fair_value, self.aggressiveness[active], is_buy)
+
+        return active, is_buy, is_market, quantity, price
+
+    def _draw_quantities(self, max_quantity):
+        """Mostly small orders, occasionally larger ones, bounded by each member's resources."""
+        count = max_quantity.size
+        small_draw, medium_draw, large_draw = self.rng.random((3, count))
+        cap_90 = (max_quantity * 0.9).astype(np.int64)
+        cap_60 = (max_quantity * 0.6).astype(np.int64)
+        cap_50 = (max_quantity * 0.5).astype(np.int64)
+        cap_30 = (max_quantity * 0.3).astype(np.int64)
+
+        single = max_quantity == 1
+        small = ~single & (small_draw < 0.8)
+        medium = ~single & ~small & (medium_draw < 0.5) & (cap_60 > 50)
+        large = ~single & ~small & ~medium & (large_draw < 0.1) & (cap_30 > 200)
+        fallback = ~single & ~small & ~medium & ~large
+
+        ones = np.ones(count, dtype=np.int64)
+        quantity = ones.copy()
+        quantity = np.where(small, self._random_integers(ones, np.minimum(50, cap_90)), quantity)
+        quantity = np.where(medium, self._random_integers(ones * 50, np.minimum(200, cap_60)), quantity)
+        quantity = np.where(large, self._random_integers(ones * 200, np.minimum(500, cap_30)), quantity)
+        quantity = np.where(fallback, self._random_integers(ones, np.maximum(cap_50, 1)), quantity)
+        return quantity
+
+    def _draw_limit_prices(self, current_price, fair_value, aggressiveness, is_buy):
+        # Buy orders bid below the current price, sell orders ask above it, both leaning toward fair value
+        low = np.where(is_buy, current_price * (1 - aggressiveness),
+                       np.maximum(current_price * 1.001, fair_value * (1 - aggressiveness)))
+        high = np.where(is_buy, np.minimum(current_price * 0.999, fair_value * (1 + aggressiveness)),
+                        current_price * (1 + aggressiveness))
+        price = self.tick_grid.to_ticks_array(low + (high - low) * self.rng.random(is_buy.size))
+        return np.maximum(1, price)
+
+
+class MeanRevertingTraderPopulation(TraderPopulation):
+    """Vectorized counterpart of `MeanRevertingTrader`."""
+
+    trader_type = 'MeanRevertingTrader'
+    prefix = 'mrt_'
+    activity = 0.05
+
+    def __init__(self, size, cash, shares, target_price, rng, history_depth=TRADE_HISTORY_VIEW, tick_grid=None):
+        super().__init__(size, cash, np.full(size, shares), rng, history_depth, tick_grid)
+
+        self.alpha = rng.uniform(0.05, 0.3, size)
+        self.private_fair_value = target_price + rng.normal(0, 1, size)
+        self.target_price = target_price
+        self.reversion_strength = rng.uniform(0.015, 0.03, size)
+
+    def decide_orders(self, current_price, mid):
+        rng = self.rng
+        active = self._draw_active()
+        if not active.size:
+            return None
+
+        observed_price = mid if mid is not None else current_price
+        self.private_fair_value[active] += self.alpha[active] * (observed_price - self.private_fair_value[active])
+        quantity = rng.integers(1, 21, active.size)
+
+        # Only trade when the price has moved far enough from the target
+        reversion_strength = self.reversion_strength[active]
+        is_sell = current_price > self.target_price * (1 + reversion_strength)
+        is_buy = current_price < self.target_price * (1 - reversion_strength)
+        affordable = np.where(is_buy, self.cash[active] >= current_price * quantity,
+                              self.shares[active] >= quantity)
+        keep = (is_buy | is_sell) & affordable
+        active, is_buy, quantity = active[keep], is_buy[keep], quantity[keep]
+        if not active.size:
+            return None
+
+        # Price orders off the fair value estimate, slightly aggressively
+        fair_value = self.private_fair_value[active]
+        price = np.where(is_buy, np.minimum(fair_value * 1.002, current_price * 1.001),
+                         np.maximum(fair_value * 0.998, current_price * 0.999))
+        price = np.maximum(1, self.tick_grid.to_ticks_array(price))
+
+        return active, is_buy, np.zeros(active.size, dtype=bool), quantity, price
@@ -1,48 +1,47 @@
-import random
+from simulation.fair_value import fair_value_strategy, get_private_fair_value
+from simulation.order import acquire_order
+from simulation.traders.trader import TRADE_HISTORY_VIEW, Trader
 
-from simulation.fair_value import fair_value_strategy, get_mid_fair_value, get_private_fair_value
-from simulation.order import Order
-from simulation.traders.trader import Trader
 
-
-# TODO - Sharpe ratio, max drawdown, moving exponential fair value, mid fair value
+# TODO - Moving exponential fair value, mid fair value
 # TODO - Vary fair value alpha and aggressiveness randomly
 class RandomTrader(Trader):
-    def __init__(self, trader_id, cash, shares, fair_value):
-        super().__init__(trader_id, cash, shares)
+    __slots__ = ('fair_value_strategy', 'private_fair_value', 'aggressiveness')
+
+    activity = 0.1
+
+    def __init__(self, trader_id, cash, shares, fair_value, rng=None, private_odds=0.5, alpha_range=(0.1, 0.5),
+                 history_depth=TRADE_HISTORY_VIEW, tick_grid=None):
+        super().__init__(trader_id, cash, shares, rng, history_depth, tick_grid)
 
         # Assign fair value strategy at initialization
-        self.fair_value_strategy = fair_value_strategy()
+        self.fair_value_strategy = fair_value_strategy(private_odds, alpha_range, rng=self.rng)
 
         # Initialize fair value based on strategy
         if self.fair_value_strategy['type'] == 'private':
             # Each trader has their own perception of fair value with some variation
-            self.private_fair_value = fair_value + random.gauss(0, 2)  # Fair value ± $2
+            self.private_fair_value = fair_value + self.rng.gauss(0, 2)  # Fair value ± $2
         else:
             # For mid fair value strategy, we'll calculate it dynamically
             self.private_fair_value = fair_value
 
-        self.aggressiveness = random.uniform(0.1, 0.3)  # How far from fair value they'll trade
+        self.aggressiveness = self.rng.uniform(0.1, 0.3)  # How far from fair value they'll trade
 
-    def get_current_fair_value(self, current_price, best_bid=None, best_ask=None):
+    def get_current_fair_value(self, current_price, market):
         """
         Get the trader's current fair value estimate based on their strategy.
 
         Args:
             current_price (float): Current market price
-            best_bid (float): Best bid price from order book
-            best_ask (float): Best ask price from order book
+            market (MarketView): Market view of this tick
 
         Returns:
             float: The trader's current fair value estimate
         """
+        # Observe the mid price, or the current price if one side of the book is empty
+        observed_price = market.mid if market.mid is not None else current_price
         if self.fair_value_strategy['type'] == 'private':
             # Update private fair value using exponential smoothing
-            # Use current_price as observed price if no mid-price available
-            observed_price = current_price
-            if best_bid is not None and best_ask is not None:
-                observed_price = get_mid_fair_value(best_bid, best_ask)
-
             self.private_fair_value = get_private_fair_value(
                 self.private_fair_value,
                 observed_price,
@@ -50,93 +49,93 @@ class RandomTrader(Trader):
             )
             return self.private_fair_value
         else:
-            # Use mid fair value if available, otherwise fall back to current price
-            if best_bid is not None and best_ask is not None:
-                return get_mid_fair_value(best_bid, best_ask)
-            else:
-                return current_price
+            return observed_price
 
-    def generate_order(self, current_price, best_bid=None, best_ask=None):
+    def get_orders_to_cancel(self, open_orders):
+        """
+        Pull all resting quotes: they were priced off an older fair value estimate
+        and the new order replaces them.
         """
-        Generate an order based on the trader's fair value strategy.
+        return [order.id for order in open_orders]
+
+    def generate_order(self, current_price, market):
+        """
+        Generate an order based on the trader's fair value strategy. Called each time
+        the trader is due to act, on average `activity` times per tick.
 
         Args:
             current_price (float): Current market price
-            best_bid (float): Best bid price from order book
-            best_ask (float): Best ask price from order book
+            market (MarketView): Market view of this tick
 
         Returns:
             Order or None: Generated order or None if no order placed
         """
-        if random.random() < 0.1:  # 10% chance to place order
+        # Get fair value based on strategy
+        fair_value = self.get_current_fair_value(current_price, market)
+
+        # Determine if trader thinks stock is cheap or expensive
+        value_ratio = current_price / fair_value
 
-            # Get fair value based on strategy
-            fair_value = self.get_current_fair_value(current_price, best_bid, best_ask)
+        # Bias toward buying when cheap, selling when expensive
+        if value_ratio < 0.95:  # Stock seems undervalued
+            side_weights = [0.7, 0.3]  # 70% chance buy, 30% sell
+        elif value_ratio > 1.05:  # Stock seems overvalued
+            side_weights = [0.3, 0.7]  # 30% chance buy, 70% sell
+        else:
+            side_weights = [0.5, 0.5]  # Equal probability
 
-            # Determine if trader thinks stock is cheap or expensive
-            value_ratio = current_price / fair_value
+        side = self.rng.choices(['buy', 'sell'], weights=side_weights)[0]
 
-            # Bias toward buying when cheap, selling when expensive
-            if value_ratio < 0.95:  # Stock seems undervalued
-                side_weights = [0.7, 0.3]  # 70% chance buy, 30% sell
-            elif value_ratio > 1.05:  # Stock seems overvalued
-                side_weights = [0.3, 0.7]  # 30% chance buy, 70% sell
-            else:
-                side_weights = [0.5, 0.5]  # Equal probability
+        # Mix of limit and market orders
+        order_type = self.rng.choices(['limit', 'market'], weights=[0.8, 0.2])[0]
 
-            side = random.choices(['buy', 'sell'], weights=side_weights)[0]
+        max_quantity = 0
+        # Determine max quantity based on resources
+        if side == 'buy':
+            max_quantity = int(self.cash // current_price)
+        elif side == 'sell':
+            max_quantity = self.shares
 
-            # Mix of limit and market orders
-            order_type = random.choices(['limit', 'market'], weights=[0.8, 0.2])[0]
+        if max_quantity < 1:
+            return None
 
-            max_quantity = 0
-            # Determine max quantity based on resources
+        # Most of the time, use smaller order sizes but occasionally larger ones for variety
+        # Change max quantity based on trader's resources
+        if max_quantity == 1:
+            quantity = 1
+        else:
+            if self.rng.random() < 0.8:
+                quantity = self.rng.randint(1, min(50, int(max_quantity * 0.9)))
+            elif self.rng.random() < 0.5 and int(max_quantity * 0.6) > 50:
+                quantity = self.rng.randint(50, min(200, int(max_quantity * 0.6)))
+            elif self.rng.random() < 0.1 and int(max_quantity * 0.3) > 200:
+                quantity = self.rng.randint(200, min(500, int(max_quantity * 0.3)))
+            elif int(max_quantity * 0.5) >= 1:
+                quantity = self.rng.randint(1, int(max_quantity * 0.5))
+
+        # No need to check resources again, as quantity is always valid
+
+        price = None
+        if order_type == 'limit':
             if side == 'buy':
-                max_quantity = int(self.cash // current_price)
-            elif side == 'sell':
-                max_quantity = self.shares
-
-            if max_quantity < 1:
-                return None
-
-            # Most of the time, use smaller order sizes but occasionally larger ones for variety
-            # Change max quantity based on trader's resources
-            if max_quantity == 1:
-                quantity = 1
-            else:
-                if random.random() < 0.8:
-                    quantity = random.randint(1, min(50, int(max_quantity * 0.9)))
-                elif random.random() < 0.5 and int(max_quantity * 0.6) > 50:
-                    quantity = random.randint(50, min(200, int(max_quantity * 0.6)))
-                elif random.random() < 0.1 and int(max_quantity * 0.3) > 200:
-                    quantity = random.randint(200, min(500, int(max_quantity * 0.3)))
-                elif int(max_quantity * 0.5) >= 1:
-                    quantity = random.randint(1, int(max_quantity * 0.5))
-
-            # No need to check resources again, as quantity is always valid
-
-            price = None
-            if order_type == 'limit':
-                if side == 'buy':
-                    # Buy orders: bid below current price, closer to fair value
-                    max_price = min(current_price * 0.999, fair_value * (1 + self.aggressiveness))
-                    min_price = current_price * (1 - self.aggressiveness)
-                    price = round(random.uniform(min_price, max_price), 2)
-                else:  # sell
-                    # Sell orders: ask above current price, closer to fair value
-                    min_price = max(current_price * 1.001, fair_value * (1 - self.aggressiveness))
-                    max_price = current_price * (1 + self.aggressiveness)
-                    price = round(random.uniform(min_price, max_price), 2)
-
-                # Ensure price is positive
-                price = max(0.01, price)
-
-            return Order(
-                order_id=self.get_next_order_id(),
-                order_type=order_type,
-                side=side,
-                quantity=quantity,
-                price=price,
-                trader_id=self.id
-            )
-        return None
\ No newline at end of file
+                # Buy orders: bid below current price, closer to fair value
+                max_price = min(current_price * 0.999, fair_value * (1 + self.aggressiveness))
+                min_price = current_price * (1 - self.aggressiveness)
+                price = self.tick_grid.to_ticks(self.rng.uniform(min_price, max_price))
+            else:  # sell
+                # Sell orders: ask above current price, closer to fair value
+                min_price = max(current_price * 1.001, fair_value * (1 - self.aggressiveness))
+                max_price = current_price * (1 + self.aggressiveness)
+                price = self.tick_grid.to_ticks(self.rng.uniform(min_price, max_price))
+
+            # Ensure price is at least one tick
+            price = max(1, price)
+
+        return acquire_order(
+            order_id=self.get_next_order_id(),
+            order_type=order_type,
+            side=side,
+            quantity=quantity,
+            price=price,
+            trader_id=self.id
+        )
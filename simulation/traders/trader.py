@@ -3,9 +3,35 @@
 
 # TODO - Add following trader types: Whale Trader, Momentum Trader, High-Frequency Trader
 
+import random
+from collections import deque
+from itertools import islice
+
+from simulation.order import next_order_id
+from simulation.pricing import DEFAULT_TICK_GRID
+
+TRADE_HISTORY_VIEW = 100  # Most recent trades included in `to_dict` payloads
+
+
+def recent_trades(history, trade_tape, count=TRADE_HISTORY_VIEW):
+    """Rebuild the trade dicts of the last `count` trade ids of a history from the trade tape."""
+    start = max(0, len(history) - count)
+    return trade_tape.records(islice(history, start, None))
+
+
 class Trader:
-    def __init__(self, trader_id, cash, shares=0):
+    __slots__ = ('id', 'rng', 'cash', 'shares', 'order_count', 'initial_cash', 'initial_shares',
+                 'initial_portfolio_value', 'trade_history', 'total_volume_traded', 'tick_grid')
+
+    # Expected number of times per tick the trader acts. Arrivals are a Poisson process:
+    # the simulation draws exponential gaps between them and calls `generate_order` on each.
+    activity = 1.0
+
+    def __init__(self, trader_id, cash, shares=0, rng=None, history_depth=TRADE_HISTORY_VIEW, tick_grid=None):
         self.id = trader_id
+        # Source of randomness for the trader's decisions. Defaults to the module-global
+        # generator; pass a seeded `random.Random` for reproducible runs.
+        self.rng = rng if rng is not None else random
         self.cash = cash
         self.shares = shares
         self.order_count = 0
@@ -13,17 +39,44 @@ class Trader:
         self.initial_cash = cash
         self.initial_shares = shares
         self.initial_portfolio_value = 0
-        self.trade_history = []
+        # Fixed-capacity ring of trade ids (rows of the trade tape) so memory stays flat.
+        # Cash, shares, volume and, for tracked traders, this history are updated by the
+        # simulation's ledger at the end of each step.
+        self.trade_history = deque(maxlen=history_depth)
         self.total_volume_traded = 0
+        # Order prices are integer ticks of this grid
+        self.tick_grid = tick_grid if tick_grid is not None else DEFAULT_TICK_GRID
+
+    def generate_order(self, current_price, market):
+        """
+        Decide the trader's next order.
+
+        Args:
+            current_price (float): Last trade price.
+            market (MarketView): Top of the book and shared indicators for this tick.
 
-    def generate_order(self, current_price):
+        Returns:
+            Order or None: The new order, or None to stay out of the market.
+        """
         return None
 
+    def get_orders_to_cancel(self, open_orders):
+        """
+        Choose which of the trader's resting orders to pull before a new order is placed.
+
+        Args:
+            open_orders (list): The trader's resting orders, oldest first.
+
+        Returns:
+            list: Ids of the orders to cancel.
+        """
+        return []
+
     def get_next_order_id(self):
         self.order_count += 1
-        return f"{self.id}_{self.order_count}"
+        return next_order_id()
 
-    def to_dict(self, current_price, open_orders):
+    def to_dict(self, current_price, open_orders, trade_tape):
         portfolio_value = self.cash + (self.shares * current_price)
         pnl = portfolio_value - self.initial_portfolio_value
         pnl_percent = (pnl / self.initial_portfolio_value * 100) if self.initial_portfolio_value > 0 else 0
@@ -36,6 +89,6 @@ class Trader:
             'pnl': pnl,
             'pnl_percent': pnl_percent,
             'total_volume_traded': self.total_volume_traded,
-            'trade_history': self.trade_history[-100:],  # Send last 100 trades to keep payload small
+            'trade_history': recent_trades(self.trade_history, trade_tape),  # Send last 100 trades to keep payload small
             'open_orders': open_orders,
         }
\ No newline at end of file
@@ -1,28 +1,27 @@
-import random
-
-from simulation.order import Order
-from simulation.traders.trader import Trader
+from simulation.order import acquire_order
+from simulation.traders.trader import TRADE_HISTORY_VIEW, Trader
 
 
 class TrendFollowingTrader(Trader):
-    def __init__(self, trader_id, initial_cash, initial_shares, trend_threshold=0.02):
-        super().__init__(trader_id, initial_cash, initial_shares)
-        self.trend_threshold = trend_threshold
-        self.previous_price = None
+    __slots__ = ('trend_threshold', 'lookback')
 
-    def generate_order(self, current_price):
-        if self.previous_price is None:
-            self.previous_price = current_price
-            return None  # No previous price to compare
+    def __init__(self, trader_id, initial_cash, initial_shares, trend_threshold=0.02, rng=None,
+                 history_depth=TRADE_HISTORY_VIEW, tick_grid=None, lookback=1):
+        super().__init__(trader_id, initial_cash, initial_shares, rng, history_depth, tick_grid)
+        self.trend_threshold = trend_threshold
+        self.lookback = lookback  # Ticks over which the trend is measured
 
-        price_change = (current_price - self.previous_price) / self.previous_price
+    def generate_order(self, current_price, market):
+        # The price change over the lookback comes from the shared indicators
+        price_change = market.returns(self.lookback)
+        if price_change is None:
+            return None  # Not enough price history yet
 
         if abs(price_change) < self.trend_threshold:
-            self.previous_price = current_price
             return None  # No significant trend detected
 
         side = 'buy' if price_change > 0 else 'sell'
-        quantity = min(random.randint(1, 20), self.shares if side == 'sell' else self.cash // current_price)
+        quantity = min(self.rng.randint(1, 20), self.shares if side == 'sell' else self.cash // current_price)
 
         # Check resources
         if side == 'buy' and self.cash < current_price * quantity:
@@ -31,16 +30,13 @@ class TrendFollowingTrader(Trader):
             return None
 
         # Aggressive pricing to ensure execution
-        price = round(current_price * (1.001 if side == 'buy' else 0.999), 2)
+        price = max(1, self.tick_grid.to_ticks(current_price * (1.001 if side == 'buy' else 0.999)))
 
-        order = Order(
+        return acquire_order(
             order_id=self.get_next_order_id(),
             order_type='limit',
             side=side,
             quantity=quantity,
             price=price,
             trader_id=self.id
-        )
-
-        self.previous_price = current_price
-        return order
\ No newline at end of file
+        )
\ No newline at end of file
@@ -1,2 +1,6 @@
 from flask_socketio import SocketIO
-socketio = SocketIO(cors_allowed_origins="*")
+
+from simulation import payloads
+
+# `payloads` passes pre-encoded market and trader payloads through without re-encoding them
+socketio = SocketIO(cors_allowed_origins="*", json=payloads)
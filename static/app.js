@@ -4,11 +4,55 @@ class FlaskStockSimulation {
         this.chart = null;
         this.isRunning = false;
 
+        // Market stream state: the server sends a snapshot, then sequenced deltas
+        this.seq = null;
+        this.priceHistory = [];
+        this.historyLength = 1000;
+        this.orderBook = { bids: [], asks: [] };
+
+        // Each page drives its own simulation, identified by the ?sim= query parameter
+        this.simId = new URLSearchParams(window.location.search).get('sim');
+        this.ready = this.ensureSimulation();
+
         this.initializeChart();
         this.setupSocketListeners();
         this.setupEventListeners();
     }
 
+    async ensureSimulation() {
+        if (this.simId) {
+            const res = await fetch(this.apiUrl('tick_rate'));
+            if (res.ok) {
+                this.linkSimulation();
+                return;
+            }
+        }
+        const res = await fetch('/api/simulations', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: '{}'
+        });
+        const body = await res.json();
+        if (!res.ok) throw new Error(body.error);
+        this.simId = body.id;
+        window.history.replaceState(null, '', `?sim=${this.simId}`);
+        this.linkSimulation();
+    }
+
+    linkSimulation() {
+        document.querySelector('.trader-link-button').href = `/traders?sim=${this.simId}`;
+    }
+
+    apiUrl(path) {
+        return `/api/simulations/${this.simId}/${path}`;
+    }
+
+    joinSimulation() {
+        this.ready
+            .then(() => this.socket.emit('join_simulation', { sim_id: this.simId }))
+            .catch(err => console.error(err));
+    }
+
     initializeChart() {
         const ctx = document.getElementById('priceChart').getContext('2d');
 
@@ -103,26 +147,93 @@ class FlaskStockSimulation {
         this.socket.on('connect', () => {
             console.log('Connected to server');
             document.getElementById('connectionStatus').classList.add('connected');
-            // The server will now automatically send the latest data upon connection,
-            // so the UI will populate itself correctly without extra client-side logic.
+            // Joining the simulation's room makes the server send a snapshot, then deltas
+            this.joinSimulation();
         });
         this.socket.on('disconnect', () => {
             console.log('Disconnected');
             document.getElementById('connectionStatus').classList.remove('connected');
+            this.seq = null; // A new snapshot is sent on reconnect
+        });
+        this.socket.on('market_snapshot', snapshot => this.applySnapshot(snapshot));
+        this.socket.on('market_update', delta => this.applyDelta(delta));
+        this.socket.on('simulation_closed', () => {
+            // Evicted or shut down: start a fresh simulation for this page
+            console.warn(`Simulation ${this.simId} was closed. Starting a new one.`);
+            this.simId = null;
+            this.seq = null;
+            this.ready = this.ensureSimulation();
+            this.joinSimulation();
+        });
+    }
+
+    applySnapshot(snapshot) {
+        this.seq = snapshot.seq;
+        this.historyLength = snapshot.history_length || this.historyLength;
+        this.priceHistory = snapshot.price_history.slice();
+        this.orderBook = {
+            bids: snapshot.order_book.bids.slice(),
+            asks: snapshot.order_book.asks.slice()
+        };
+        this.updateMarketData(snapshot);
+    }
+
+    applyDelta(delta) {
+        if (this.seq === null) return; // Waiting for a snapshot
+        if (delta.seq !== this.seq + 1) {
+            // Missed an update: drop our state and ask the server for a fresh snapshot
+            console.warn(`Market stream gap: expected ${this.seq + 1}, got ${delta.seq}. Resyncing.`);
+            this.seq = null;
+            this.socket.emit('market_resync');
+            return;
+        }
+        this.seq = delta.seq;
+
+        this.priceHistory.push(...delta.prices);
+        if (this.priceHistory.length > this.historyLength) {
+            this.priceHistory.splice(0, this.priceHistory.length - this.historyLength);
+        }
+
+        if (delta.book) {
+            ['bids', 'asks'].forEach(side => {
+                const changes = delta.book[side];
+                if (!changes) return;
+                const rows = this.orderBook[side];
+                rows.length = Math.min(rows.length, changes.length);
+                changes.rows.forEach(([index, price, quantity]) => {
+                    rows[index] = { price, quantity };
+                });
+            });
+        }
+
+        this.updateMarketData({
+            ...delta,
+            price_history: this.priceHistory,
+            order_book: this.orderBook
         });
-        this.socket.on('market_update', data => this.updateMarketData(data));
-        this.socket.on('new_trades', trades => this.updateRecentTrades(trades));
+        if (delta.trades.length) this.updateRecentTrades(delta.trades);
     }
 
     setupEventListeners() {
         document.getElementById('startBtn').addEventListener('click', () => this.startSimulation());
         document.getElementById('stopBtn').addEventListener('click', () => this.stopSimulation());
         document.getElementById('resetBtn').addEventListener('click', () => this.resetSimulation());
+        document.getElementById('tickRateSelect').addEventListener('change', e => this.setTickRate(e.target.value));
+    }
+
+    async setTickRate(value) {
+        try {
+            await fetch(this.apiUrl('tick_rate'), {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ tick_rate: value })
+            });
+        } catch (err) { console.error(err); }
     }
 
     async startSimulation() {
         try {
-            const res = await fetch('/api/start', { method: 'POST' });
+            const res = await fetch(this.apiUrl('start'), { method: 'POST' });
             if (res.ok) {
                 this.isRunning = true;
                 document.getElementById('startBtn').disabled = true;
@@ -133,7 +244,7 @@ class FlaskStockSimulation {
 
     async stopSimulation() {
         try {
-            const res = await fetch('/api/stop', { method: 'POST' });
+            const res = await fetch(this.apiUrl('stop'), { method: 'POST' });
             if (res.ok) {
                 this.isRunning = false;
                 document.getElementById('startBtn').disabled = false;
@@ -144,7 +255,7 @@ class FlaskStockSimulation {
 
     async resetSimulation() {
         try {
-            const res = await fetch('/api/reset', { method: 'POST' });
+            const res = await fetch(this.apiUrl('reset'), { method: 'POST' });
             if (res.ok) {
                 this.isRunning = false;
                 document.getElementById('startBtn').disabled = false;
@@ -171,6 +282,9 @@ class FlaskStockSimulation {
         document.getElementById('bestBid').textContent = data.best_bid ? `$${data.best_bid.toFixed(2)}` : '-';
         document.getElementById('bestAsk').textContent = data.best_ask ? `$${data.best_ask.toFixed(2)}` : '-';
         document.getElementById('spread').textContent = data.spread ? `$${data.spread.toFixed(2)}` : '-';
+        if (data.tick_rate !== undefined) {
+            document.getElementById('tickRate').textContent = `${data.tick_rate.toFixed(1)} ticks/s`;
+        }
 
         if (data.price_history) {
             this.chart.data.labels = data.price_history.map((_,i) => i);
@@ -183,11 +297,11 @@ class FlaskStockSimulation {
     updateOrderBook({ asks, bids }) {
         const tbody = document.getElementById('orderBookBody');
         tbody.innerHTML = '';
-        asks.slice(0,10).reverse().forEach(({ price, quantity }) => {
+        asks.slice().reverse().forEach(({ price, quantity }) => {
             const row = tbody.insertRow();
             row.innerHTML = `<td>-</td><td>-</td><td class="ask">$${price.toFixed(2)}</td><td class="ask">${quantity}</td>`;
         });
-        bids.slice(0,10).forEach(({ price, quantity }) => {
+        bids.forEach(({ price, quantity }) => {
             const row = tbody.insertRow();
             row.innerHTML = `<td class="bid">${quantity}</td><td class="bid">$${price.toFixed(2)}</td><td>-</td><td>-</td>`;
         });
@@ -1,6 +1,7 @@
 class TradersDashboard {
     constructor() {
         this.socket = io();
+        this.simId = new URLSearchParams(window.location.search).get('sim');
         this.allTraders = [];
         this.selectedTraderId = null;
         this.currentPrice = 0;
@@ -23,6 +24,9 @@ class TradersDashboard {
             detailPnl: document.getElementById('detailPnl'),
             detailCash: document.getElementById('detailCash'),
             detailShares: document.getElementById('detailShares'),
+            detailSharpe: document.getElementById('detailSharpe'),
+            detailMaxDrawdown: document.getElementById('detailMaxDrawdown'),
+            detailTurnover: document.getElementById('detailTurnover'),
             openOrdersTableBody: document.querySelector('#openOrdersTable tbody'),
             tradeHistoryTableBody: document.querySelector('#tradeHistoryTable tbody'),
             chartModePortfolioBtn: document.getElementById('chartModePortfolio'),
@@ -97,9 +101,15 @@ class TradersDashboard {
     }
 
     setupSocketListeners() {
-        this.socket.on('connect', () => this.elements.connectionStatus.classList.add('connected'));
+        this.socket.on('connect', () => {
+            this.elements.connectionStatus.classList.add('connected');
+            if (this.simId) this.socket.emit('join_simulation', { sim_id: this.simId });
+        });
         this.socket.on('disconnect', () => this.elements.connectionStatus.classList.remove('connected'));
         this.socket.on('traders_update', (data) => this.handleUpdate(data));
+        this.socket.on('market_snapshot', (data) => {
+            this.currentPrice = data.current_price;
+        });
         this.socket.on('market_update', (data) => {
             this.currentPrice = data.current_price;
         });
@@ -107,7 +117,8 @@ class TradersDashboard {
 
     async fetchInitialData() {
         try {
-            const response = await fetch('/api/traders');
+            if (!this.simId) throw new Error('No simulation selected: open this page from the dashboard');
+            const response = await fetch(`/api/simulations/${this.simId}/traders`);
             if (!response.ok) throw new Error('Failed to fetch initial trader data');
             const data = await response.json();
             this.handleUpdate(data);
@@ -222,6 +233,10 @@ class TradersDashboard {
         this.elements.detailPnl.innerHTML = `<span class="${pnlClass}">${pnlSign}$${trader.pnl.toFixed(2)} (${trader.pnl_percent.toFixed(2)}%)</span>`;
         this.elements.detailCash.textContent = `$${trader.cash.toFixed(2)}`;
         this.elements.detailShares.textContent = trader.shares;
+        const hasRisk = trader.sharpe_ratio !== undefined;
+        this.elements.detailSharpe.textContent = hasRisk ? trader.sharpe_ratio.toFixed(3) : '-';
+        this.elements.detailMaxDrawdown.textContent = hasRisk ? `${(trader.max_drawdown * 100).toFixed(2)}%` : '-';
+        this.elements.detailTurnover.textContent = hasRisk ? `${trader.turnover.toFixed(2)}x` : '-';
         let openOrdersHtml = trader.open_orders.map(o => `<tr><td class="${o.type === 'buy' ? 'buy-side' : 'sell-side'}">${o.type.toUpperCase()}</td><td>$${o.price.toFixed(2)}</td><td>${o.quantity}</td></tr>`).join('');
         this.elements.openOrdersTableBody.innerHTML = openOrdersHtml || '<tr><td colspan="3">No open orders.</td></tr>';
         let tradeHistoryHtml = trader.trade_history.slice().reverse().map(t => {
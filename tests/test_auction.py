@@ -0,0 +1,76 @@
+import numpy as np
+
+from simulation import auction
+from simulation.order import Order
+from simulation.order_book import OrderBook
+
+
+def prices(*values):
+    return np.array(values, dtype=np.int64)
+
+
+def test_clearing_price_maximizes_volume():
+    price, volume = auction.clearing_price(prices(102, 101), prices(10, 5), prices(100, 101), prices(8, 10), 100)
+    assert (price, volume) == (101, 15)
+
+
+def test_clearing_price_ties_break_toward_reference():
+    args = prices(101), prices(5), prices(100), prices(5)
+    assert auction.clearing_price(*args, reference=100)[0] == 100
+    assert auction.clearing_price(*args, reference=101)[0] == 101
+
+
+def test_clearing_price_without_cross():
+    assert auction.clearing_price(prices(99), prices(5), prices(100), prices(5), 100) == (None, 0)
+
+
+def test_allocate_pro_rata_at_marginal_level():
+    fills = auction.allocate(prices(0, 0, 0), prices(10, 20, 30), 31)
+    assert fills.tolist() == [6, 10, 15]
+
+
+def test_allocate_by_time_priority():
+    fills = auction.allocate(prices(0, 0, 0), prices(10, 20, 30), 31, pro_rata=False)
+    assert fills.tolist() == [10, 20, 1]
+
+
+def test_allocate_fills_better_prices_first():
+    fills = auction.allocate(prices(1, 0, 1), prices(10, 5, 10), 10)
+    assert fills.tolist() == [3, 5, 2]
+
+
+def test_pair_fills():
+    buys, sells, quantities = auction.pair_fills(prices(3, 0, 2), prices(4, 1))
+    assert buys.tolist() == [0, 2, 2]
+    assert sells.tolist() == [0, 0, 1]
+    assert quantities.tolist() == [3, 1, 1]
+
+
+def auction_book(pro_rata):
+    book = OrderBook()
+    book.add_order(Order(1, 'limit', 'buy', 4, 10100, 'resting'))
+    new = [Order(2, 'limit', 'buy', 4, 10100, 'new'), Order(3, 'limit', 'sell', 6, 10000, 'seller')]
+    return book, book.call_auction(new, reference=10100, pro_rata=pro_rata)
+
+
+def test_book_auction_pro_rata():
+    book, trades = auction_book(pro_rata=True)
+    assert {trade.price for trade in trades} == {101.0}
+    assert [(trade.buyer_id, trade.quantity) for trade in trades] == [('resting', 3), ('new', 3)]
+    assert [(order.id, order.quantity) for order in book.bids] == [(1, 1), (2, 1)]
+    assert book.asks == []
+
+
+def test_book_auction_time_priority_favours_resting_orders():
+    book, trades = auction_book(pro_rata=False)
+    assert [(trade.buyer_id, trade.quantity) for trade in trades] == [('resting', 4), ('new', 2)]
+    assert [(order.id, order.quantity) for order in book.bids] == [(2, 2)]
+    assert 1 not in book.orders
+
+
+def test_book_auction_lapses_unfilled_market_orders():
+    book = OrderBook()
+    trades = book.call_auction([Order(1, 'market', 'buy', 10, None, 'm'), Order(2, 'limit', 'sell', 3, 10000, 's')],
+                               reference=10000)
+    assert [(trade.price, trade.quantity) for trade in trades] == [(100.0, 3)]
+    assert book.bids == [] and book.asks == [] and book.orders == {}
@@ -0,0 +1,101 @@
+import pickle
+import zlib
+
+import numpy as np
+import pytest
+
+from simulation import checkpoint
+from simulation.market_simulation import MarketSimulation
+from simulation.simulation_config import SimulationConfig
+
+
+def simulation(seed=3, steps=20, **overrides):
+    config = SimulationConfig(seed=seed, random_traders=120, mean_reverting_traders=30, trend_following_traders=4,
+                              **overrides)
+    sim = MarketSimulation(config)
+    for _ in range(steps):
+        sim.step()
+    return sim
+
+
+def fingerprint(sim):
+    # Order ids are drawn process-wide, so resting orders are compared by content
+    tape = sim.order_book.tape
+    return (sim.current_price, len(tape), tape.column('price').tolist(), sim.ledger.cash.tolist(),
+            sim.ledger.shares.tolist(), [(order.side, order.price, order.quantity, order.trader_id)
+                                         for order in sim.order_book.bids + sim.order_book.asks])
+
+
+@pytest.mark.parametrize('overrides', [
+    {},
+    {'vectorized_traders': True, 'risk_analytics': True, 'leaderboard': True},
+    {'matching': 'call_auction', 'cancel_stale_orders': True},
+])
+def test_restored_simulation_continues_identically(overrides):
+    original = simulation(**overrides)
+    data = original.save_checkpoint()
+    for _ in range(15):
+        original.step()
+
+    restored = simulation(seed=99, steps=5, **overrides)
+    restored.restore_checkpoint(data)
+    for _ in range(15):
+        restored.step()
+    assert fingerprint(restored) == fingerprint(original)
+    original.close()
+    restored.close()
+
+
+@pytest.fixture
+def sim():
+    sim = simulation()
+    yield sim
+    sim.close()
+
+
+def payload(state):
+    return checkpoint.MAGIC + bytes([checkpoint.VERSION]) + zlib.compress(pickle.dumps(state))
+
+
+@pytest.mark.parametrize('data', [
+    b'',
+    b'not a checkpoint',
+    checkpoint.MAGIC + bytes([checkpoint.VERSION + 1]) + zlib.compress(b''),
+    checkpoint.MAGIC + bytes([checkpoint.VERSION]) + b'garbage',
+    payload(['not', 'a', 'dict']),
+])
+def test_malformed_checkpoints_are_rejected(data):
+    with pytest.raises(ValueError):
+        checkpoint.loads(data)
+
+
+def test_disallowed_globals_are_rejected():
+    with pytest.raises(ValueError, match='disallowed global'):
+        checkpoint.loads(payload({'hook': print}))
+
+
+def test_truncated_checkpoint_is_rejected(sim):
+    data = sim.save_checkpoint()
+    with pytest.raises(ValueError):
+        sim.restore_checkpoint(data[:len(data) // 2])
+
+
+def tampered(sim, change):
+    state = checkpoint.loads(sim.save_checkpoint())
+    change(state)
+    return checkpoint.dumps(state)
+
+
+@pytest.mark.parametrize('change', [
+    lambda state: setattr(state['ledger'], 'injected', 1),
+    lambda state: setattr(state['ledger'], 'cash', state['ledger'].cash[:-1]),
+    lambda state: setattr(state['indicators'], 'prices', np.array([1, 'a'], dtype=object)),
+    lambda state: state.__setitem__('current_price', float('nan')),
+    lambda state: state.pop('ledger'),
+])
+def test_inconsistent_state_is_rejected_and_simulation_kept(sim, change):
+    before = fingerprint(sim)
+    with pytest.raises(ValueError):
+        sim.restore_checkpoint(tampered(sim, change))
+    assert fingerprint(sim) == before
+    sim.step()
@@ -0,0 +1,75 @@
+import pytest
+
+from simulation.journal import JournalReplay
+from simulation.market_simulation import MarketSimulation
+from simulation.simulation_config import SimulationConfig
+
+
+def journaled(path, **overrides):
+    config = SimulationConfig(random_traders=120, mean_reverting_traders=30, trend_following_traders=4,
+                              journal_path=str(path), **overrides)
+    return MarketSimulation(config)
+
+
+def book_state(book):
+    tape = book.tape
+    return ([(order.id, order.side, order.price, order.quantity, order.trader_id) for order in book.bids + book.asks],
+            {name: tape.column(name).tolist() for name in ('tick', 'price', 'quantity')},
+            [tape.trader_ids[i] for i in tape.column('buyer')], [tape.trader_ids[i] for i in tape.column('seller')])
+
+
+@pytest.mark.parametrize('overrides', [
+    {'seed': 5},
+    {'seed': 5, 'vectorized_traders': True, 'cancel_stale_orders': True},
+    {'seed': 5, 'matching': 'call_auction'},
+])
+def test_replay_reproduces_book_and_trades(tmp_path, overrides):
+    sim = journaled(tmp_path / 'run.journal', **overrides)
+    for _ in range(30):
+        sim.step()
+    sim.close()
+
+    replay = JournalReplay(str(tmp_path / 'run.journal'))
+    assert replay.run()
+    assert replay.seed == 5
+    assert book_state(replay.book) == book_state(sim.order_book)
+    replay.close()
+
+
+def test_replay_stops_at_tick(tmp_path):
+    sim = journaled(tmp_path / 'run.journal', seed=5)
+    for _ in range(20):
+        sim.step()
+    sim.close()
+
+    replay = JournalReplay(str(tmp_path / 'run.journal'))
+    assert not replay.run(until=9)
+    assert replay.tick == 9
+    assert set(replay.book.tape.column('tick').tolist()) <= set(range(10))
+    assert replay.run()
+    assert len(replay.book.tape) == len(sim.order_book.tape)
+    replay.close()
+
+
+def test_drawn_seeds_are_recorded(tmp_path):
+    sim = journaled(tmp_path / 'run.journal')
+    first_seed = sim.seed
+    assert first_seed is not None
+    sim.step()
+    sim.reset()
+    sim.step()
+    sim.close()
+
+    replay = JournalReplay(str(tmp_path / 'run.journal'))
+    assert replay.seed == first_seed
+    replay.run()
+    assert replay.seed == sim.seed
+    replay.close()
+
+
+def test_existing_journal_is_not_overwritten(tmp_path):
+    path = tmp_path / 'run.journal'
+    path.write_bytes(b'keep')
+    with pytest.raises(FileExistsError):
+        journaled(path, seed=1)
+    assert path.read_bytes() == b'keep'
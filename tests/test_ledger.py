@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+
+from simulation.ledger import PortfolioLedger
+from simulation.trade_tape import TradeTape
+
+ROWS = {'a': 0, 'b': 1, 'c': 2}
+
+
+def ledger():
+    return PortfolioLedger([1000.0, 1000.0, 1000.0], [10, 10, 10], lambda trader_id: ROWS.get(trader_id, -1))
+
+
+def test_settle_nets_trades_per_trader():
+    book = ledger()
+    tape = TradeTape(memory_rows=8)
+    tape.append(0, 10.0, 2, 'a', 'b', 0.0)
+    tape.append(0, 11.0, 1, 'b', 'a', 0.0)
+    tape.append(0, 12.0, 3, 'c', 'a', 0.0)
+    start, stop, buyers, sellers = book.settle(tape)
+    assert (start, stop) == (0, 3)
+    assert buyers.tolist() == [0, 1, 2] and sellers.tolist() == [1, 0, 0]
+    assert book.cash.tolist() == [1000.0 - 20 + 11 + 36, 1000.0 + 20 - 11, 1000.0 - 36]
+    assert book.shares.tolist() == [10 + 2 - 1 - 3, 10 - 2 + 1, 10 + 3]
+    assert book.volume.tolist() == [6, 3, 3]
+    book.check_conservation()
+    tape.close()
+
+
+def test_settle_only_applies_new_trades():
+    book = ledger()
+    tape = TradeTape(memory_rows=2)
+    tape.append(0, 10.0, 1, 'a', 'b', 0.0)
+    book.settle(tape)
+    assert book.settle(tape)[:2] == (1, 1)
+    for _ in range(3):
+        tape.append(1, 10.0, 1, 'a', 'b', 0.0)
+    start, stop, _, _ = book.settle(tape)
+    assert (start, stop) == (1, 4)
+    assert book.shares.tolist() == [14, 6, 10]
+    tape.close()
+
+
+def test_unknown_traders_are_left_out():
+    book = ledger()
+    tape = TradeTape(memory_rows=4)
+    tape.append(0, 10.0, 1, 'a', 'outside', 0.0)
+    _, _, buyers, sellers = book.settle(tape)
+    assert buyers.tolist() == [0] and sellers.tolist() == [-1]
+    assert book.cash[0] == 990.0 and book.shares[0] == 11
+    assert book.tape_rows(tape).tolist() == [0, -1]
+    tape.close()
+
+
+def test_check_conservation_detects_drift():
+    book = ledger()
+    book.shares[0] += 1
+    with pytest.raises(AssertionError):
+        book.check_conservation()
+    book.shares[0] -= 1
+    book.cash[1] += 1.0
+    with pytest.raises(AssertionError):
+        book.check_conservation()
+
+
+def test_cash_is_copied():
+    cash = np.array([5.0])
+    book = PortfolioLedger(cash, [1], lambda trader_id: 0)
+    book.cash[0] = 0.0
+    assert cash[0] == 5.0
+
+
+def object_trader_simulation(matching):
+    from simulation.market_simulation import MarketSimulation
+    from simulation.simulation_config import SimulationConfig
+    return MarketSimulation(SimulationConfig(seed=11, random_traders=100, mean_reverting_traders=20,
+                                             trend_following_traders=40, matching=matching))
+
+
+def assert_traders_match_ledger(sim):
+    for row, trader in enumerate(sim.traders):
+        assert trader.cash == sim.ledger.cash[row]
+        assert trader.shares == sim.ledger.shares[row]
+
+
+@pytest.mark.parametrize('matching', ['continuous', 'call_auction'])
+def test_object_traders_match_ledger_after_each_step(matching):
+    sim = object_trader_simulation(matching)
+    for _ in range(40):
+        sim.step()
+        assert_traders_match_ledger(sim)
+    sim.ledger.check_conservation()
+    sim.close()
+
+
+def test_auction_orders_do_not_commit_shares_twice():
+    sim = object_trader_simulation('call_auction')
+    queued = []
+    run_auction = sim._run_auction
+
+    def capture():
+        queued.extend(sim._auction_orders)
+        return run_auction()
+
+    sim._run_auction = capture
+    for _ in range(40):
+        held = {trader.id: trader.shares for trader in sim.traders}
+        queued.clear()
+        sim.step()
+        sold = {}
+        for order in queued:
+            if order.side == 'sell' and order.trader_id in held:
+                sold[order.trader_id] = sold.get(order.trader_id, 0) + order.quantity
+        assert all(quantity <= held[trader_id] for trader_id, quantity in sold.items())
+    sim.close()
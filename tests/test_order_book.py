@@ -0,0 +1,114 @@
+from simulation.order import Order
+from simulation.order_book import OrderBook
+
+
+def limit(order_id, side, quantity, price, trader_id=None):
+    return Order(order_id, 'limit', side, quantity, price, trader_id or f"t{order_id}")
+
+
+def market(order_id, side, quantity, trader_id=None):
+    return Order(order_id, 'market', side, quantity, None, trader_id or f"t{order_id}")
+
+
+def test_limit_orders_rest_without_crossing():
+    book = OrderBook()
+    assert book.add_order(limit(1, 'buy', 10, 9900)) == []
+    assert book.add_order(limit(2, 'sell', 5, 10100)) == []
+    assert book.get_best_bid() == 99.0
+    assert book.get_best_ask() == 101.0
+    assert book.get_spread() == 2.0
+    assert [order.id for order in book.bids] == [1]
+    assert [order.id for order in book.asks] == [2]
+
+
+def test_match_trades_best_price_first_at_resting_price():
+    book = OrderBook()
+    book.add_order(limit(1, 'sell', 5, 10200))
+    book.add_order(limit(2, 'sell', 5, 10100))
+    trades = book.add_order(limit(3, 'buy', 8, 10300))
+    assert [(trade.price, trade.quantity, trade.seller_id) for trade in trades] == [(101.0, 5, 't2'), (102.0, 3, 't1')]
+    assert all(trade.buyer_id == 't3' for trade in trades)
+    assert [(order.id, order.quantity) for order in book.asks] == [(1, 2)]
+    assert book.bids == []
+
+
+def test_same_price_keeps_time_priority():
+    book = OrderBook()
+    for order_id in (1, 2, 3):
+        book.add_order(limit(order_id, 'buy', 4, 10000))
+    trades = book.add_order(market(4, 'sell', 6))
+    assert [(trade.buyer_id, trade.quantity) for trade in trades] == [('t1', 4), ('t2', 2)]
+    assert [(order.id, order.quantity) for order in book.bids] == [(2, 2), (3, 4)]
+
+
+def test_limit_remainder_rests_after_partial_fill():
+    book = OrderBook()
+    book.add_order(limit(1, 'sell', 3, 10000))
+    trades = book.add_order(limit(2, 'buy', 10, 10000))
+    assert sum(trade.quantity for trade in trades) == 3
+    assert [(order.id, order.quantity) for order in book.bids] == [(2, 7)]
+    assert book.asks == []
+
+
+def test_limit_order_stops_at_its_price():
+    book = OrderBook()
+    book.add_order(limit(1, 'sell', 5, 10000))
+    book.add_order(limit(2, 'sell', 5, 10001))
+    trades = book.add_order(limit(3, 'buy', 10, 10000))
+    assert [trade.quantity for trade in trades] == [5]
+    assert book.get_best_bid() == 100.0
+    assert book.get_best_ask() == 100.01
+
+
+def test_unfilled_market_order_lapses():
+    book = OrderBook()
+    book.add_order(limit(1, 'buy', 2, 10000))
+    trades = book.add_order(market(2, 'sell', 5))
+    assert [trade.quantity for trade in trades] == [2]
+    assert book.bids == [] and book.asks == []
+    assert book.orders == {}
+
+
+def test_best_price_advances_over_empty_levels():
+    book = OrderBook()
+    for order_id, price in enumerate((10000, 9990, 9950), start=1):
+        book.add_order(limit(order_id, 'buy', 1, price))
+    book.cancel_order(1)
+    assert book.get_best_bid() == 99.9
+    book.add_order(market(4, 'sell', 1))
+    assert book.get_best_bid() == 99.5
+    book.add_order(market(5, 'sell', 1))
+    assert book.get_best_bid() is None
+
+
+def test_cancel_and_trader_index():
+    book = OrderBook()
+    book.add_order(limit(1, 'buy', 5, 9900, 'a'))
+    book.add_order(limit(2, 'sell', 5, 10100, 'a'))
+    book.add_order(limit(3, 'buy', 5, 9800, 'b'))
+    assert [order.id for order in book.get_trader_orders('a')] == [1, 2]
+    assert book.cancel_order(99) is None
+    assert [order.id for order in book.cancel_trader_orders('a')] == [1, 2]
+    assert book.get_trader_orders('a') == []
+    assert [order.id for order in book.bids] == [3]
+    assert book.asks == []
+
+
+def test_modify_keeps_priority_only_for_reductions():
+    book = OrderBook()
+    book.add_order(limit(1, 'buy', 5, 10000))
+    book.add_order(limit(2, 'buy', 5, 10000))
+    assert book.modify_order(1, quantity=3) == []
+    assert [order.id for order in book.bids] == [1, 2]
+    book.modify_order(1, quantity=6)
+    assert [order.id for order in book.bids] == [2, 1]
+    assert book.get_depth(levels=1)['bids'][0]['quantity'] == 11
+
+
+def test_modify_to_crossing_price_matches():
+    book = OrderBook()
+    book.add_order(limit(1, 'sell', 5, 10100))
+    book.add_order(limit(2, 'buy', 5, 10000))
+    trades = book.modify_order(2, price=10100)
+    assert [(trade.price, trade.quantity) for trade in trades] == [(101.0, 5)]
+    assert book.orders == {}
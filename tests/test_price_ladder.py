@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from simulation.order import Order
+from simulation.order_book import LADDER_MARGIN, PriceLadder
+from simulation.pricing import TickGrid
+
+
+def resting(order_id, quantity, price, side='buy'):
+    return Order(order_id, 'limit', side, quantity, price, f"t{order_id}")
+
+
+def test_tick_grid_round_trips_decimal_prices():
+    grid = TickGrid(0.01)
+    assert grid.to_ticks(123.45) == 12345
+    assert grid.to_ticks(100.004) == 10000
+    assert grid.to_price(12345) == 123.45
+    assert grid.to_ticks_array([1.0, 2.5]).tolist() == [100, 250]
+    assert grid.to_price_array(np.array([100, 250])).tolist() == [1.0, 2.5]
+
+
+def test_tick_grid_rejects_non_positive_tick_size():
+    with pytest.raises(ValueError):
+        TickGrid(0)
+
+
+def test_ladder_tracks_best_and_depth():
+    ladder = PriceLadder(is_bid=True)
+    ladder.add(resting(1, 5, 100))
+    ladder.add(resting(2, 3, 102))
+    ladder.add(resting(3, 4, 100))
+    assert ladder.best == 102
+    assert ladder.bound == 100
+    assert ladder.count == 3
+    assert ladder.depth_levels(5) == [(102, 3, 1), (100, 9, 2)]
+    ticks, depth = ladder.level_arrays()
+    assert ticks.tolist() == [100, 102] and depth.tolist() == [9, 3]
+
+
+def test_ask_ladder_orders_low_to_high():
+    ladder = PriceLadder(is_bid=False)
+    for order_id, price in ((1, 105), (2, 101), (3, 103)):
+        ladder.add(resting(order_id, 1, price, 'sell'))
+    assert [order.id for order in ladder.orders()] == [2, 3, 1]
+    assert list(ladder.ticks()) == [101, 103, 105]
+
+
+def test_ladder_grows_across_far_prices():
+    ladder = PriceLadder(is_bid=False)
+    ladder.add(resting(1, 1, 10_000, 'sell'))
+    ladder.add(resting(2, 1, 10_000 + 5 * LADDER_MARGIN, 'sell'))
+    ladder.add(resting(3, 1, 10_000 - 5 * LADDER_MARGIN, 'sell'))
+    assert list(ladder.ticks()) == [10_000 - 5 * LADDER_MARGIN, 10_000, 10_000 + 5 * LADDER_MARGIN]
+    assert ladder.level(10_000)[0].id == 1
+    assert ladder.level(10_001) is None
+
+
+def test_ladder_advances_when_best_level_empties():
+    ladder = PriceLadder(is_bid=True)
+    first, second = resting(1, 1, 100), resting(2, 1, 90)
+    ladder.add(first)
+    ladder.add(second)
+    ladder.remove(first)
+    assert ladder.best == 90
+    assert ladder.pop_best() is second
+    assert ladder.best is None and ladder.count == 0
+    assert list(ladder.orders()) == []
+
+
+def test_orders_page_skips_whole_levels():
+    ladder = PriceLadder(is_bid=False)
+    for order_id in range(1, 7):
+        ladder.add(resting(order_id, 1, 100 + (order_id - 1) // 2, 'sell'))
+    assert [order.id for order in ladder.orders_page(3, 2)] == [4, 5]
+    assert [order.id for order in ladder.orders_page(5, 10)] == [6]
+    assert ladder.orders_page(6, 10) == []
@@ -0,0 +1,75 @@
+import os
+import pickle
+
+import pytest
+
+from simulation.trade_tape import TradeTape
+
+
+def fill(tape, count):
+    for i in range(count):
+        tape.append(i, 100.0 + i, i + 1, f"b{i % 3}", f"s{i % 2}", 1_700_000_000.0 + i)
+
+
+def test_append_assigns_row_ids_and_interns_traders():
+    tape = TradeTape(memory_rows=8)
+    fill(tape, 5)
+    assert len(tape) == 5
+    assert tape.column('id').tolist() == [0, 1, 2, 3, 4]
+    assert tape.trader_ids == ['b0', 's0', 'b1', 's1', 'b2']
+    assert [tape.trader_ids[i] for i in tape.column('buyer')] == ['b0', 'b1', 'b2', 'b0', 'b1']
+    tape.close()
+
+
+def test_columns_span_spilled_and_buffered_rows(tmp_path):
+    tape = TradeTape(memory_rows=4, spill_dir=str(tmp_path))
+    fill(tape, 10)
+    assert len(tape) == 10
+    assert os.path.getsize(tmp_path / 'price.bin') == 8 * 8
+    assert tape.column('price').tolist() == [100.0 + i for i in range(10)]
+    assert tape.column('quantity', 3, 6).tolist() == [4, 5, 6]
+    assert tape.column('tick', 7).tolist() == [7, 8, 9]
+    tape.close()
+
+
+def test_records_and_recent():
+    tape = TradeTape(memory_rows=3)
+    fill(tape, 7)
+    records = tape.recent(2)
+    assert [record['id'] for record in records] == [5, 6]
+    assert records[-1]['buyer_id'] == 'b0' and records[-1]['seller_id'] == 's0'
+    assert tape.records([1])[0]['quantity'] == 2
+    tape.close()
+
+
+def test_owned_spill_directory_is_removed_on_close():
+    tape = TradeTape(memory_rows=2)
+    fill(tape, 5)
+    spill_dir = tape._spill_dir
+    assert os.path.isdir(spill_dir)
+    tape.close()
+    assert not os.path.exists(spill_dir)
+
+
+def test_pickle_round_trip_keeps_every_row():
+    tape = TradeTape(memory_rows=4)
+    fill(tape, 9)
+    restored = pickle.loads(pickle.dumps(tape))
+    assert len(restored) == 9
+    assert restored.trader_ids == tape.trader_ids
+    for name in ('id', 'price', 'quantity', 'buyer', 'seller', 'timestamp'):
+        assert restored.column(name).tolist() == tape.column(name).tolist()
+    restored.append(9, 1.0, 1, 'b0', 'new', 0.0)
+    assert restored.column('seller')[-1] == restored.trader_ids.index('new')
+    tape.close()
+    restored.close()
+
+
+def test_restore_rejects_unknown_trader_indices():
+    tape = TradeTape(memory_rows=4)
+    fill(tape, 3)
+    state = tape.__getstate__()
+    state['trader_ids'] = state['trader_ids'][:1]
+    with pytest.raises(ValueError):
+        TradeTape.__new__(TradeTape).__setstate__(state)
+    tape.close()